@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+#
+# Measures the cost of reading a device's name, phys, uniq and id, both
+# straight from libevdev (what Device did before it cached DeviceInfo) and
+# through the cached Device properties.
+
+import sys
+import timeit
+
+import libevdev
+
+
+def main(args):
+    count = int(args[1]) if len(args) > 1 else 100000
+
+    d = libevdev.Device()
+    d.name = 'benchmark device'
+    d.phys = 'benchmark/phys'
+    d.uniq = 'benchmark-uniq'
+    d.id = {'bustype': 3, 'vendor': 0x1234, 'product': 0x5678, 'version': 1}
+    l = d._libevdev
+
+    def uncached():
+        return l.name, l.phys, l.uniq, l.id
+
+    def cached():
+        return d.name, d.phys, d.uniq, d.id
+
+    def info():
+        i = d.info
+        return i.name, i.phys, i.uniq, i.vendor, i.product
+
+    print("{:20s} {:>10s}".format('', 'us/read'))
+    for name, func in [('libevdev', uncached),
+                       ('Device properties', cached),
+                       ('Device.info', info)]:
+        t = min(timeit.repeat(func, number=count, repeat=5)) / count
+        print("{:20s} {:10.3f}".format(name, t * 1e6))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+#
+# Measures the construction cost and memory footprint of InputEvent,
+# comparing the previous dict-based class with the slotted InputEvent,
+# both through the public constructor and the internal one used when
+# reading events from a device.
+
+import sys
+import timeit
+import tracemalloc
+
+import libevdev
+from libevdev import InputEvent, EventCode, EventType
+
+
+class DictInputEvent(object):
+    """
+    InputEvent as it was before it had __slots__, for comparison
+    """
+    def __init__(self, code, value=None, sec=0, usec=0):
+        assert isinstance(code, EventCode) or isinstance(code, EventType)
+
+        if isinstance(code, EventCode):
+            self._type = code.type
+            self._code = code
+        else:
+            self._type = code
+            self._code = None
+        self.sec = sec
+        self.usec = usec
+        self.value = value
+
+
+def per_event_bytes(factory, count=100000):
+    tracemalloc.start()
+    events = [factory() for _ in range(count)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del events
+    return size / count
+
+
+def per_event_ns(factory, count):
+    return min(timeit.repeat(factory, number=count, repeat=5)) / count * 1e9
+
+
+def main(args):
+    count = int(args[1]) if len(args) > 1 else 1000000
+    code = libevdev.EV_ABS.ABS_X
+
+    candidates = [
+        ('dict-based InputEvent()', lambda: DictInputEvent(code, 1, 2, 3)),
+        ('InputEvent()', lambda: InputEvent(code, 1, 2, 3)),
+        ('InputEvent._new()', lambda: InputEvent._new(code, 1, 2, 3)),
+    ]
+
+    print("{:28s} {:>10s} {:>12s}".format('', 'ns/event', 'bytes/event'))
+    for name, factory in candidates:
+        print("{:28s} {:10.1f} {:12.1f}".format(name,
+                                                per_event_ns(factory, count),
+                                                per_event_bytes(factory)))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+#
+# Measures the time taken by "import libevdev" in a fresh interpreter,
+# compared to importing and then creating every event code (which is
+# what the import used to do before the codes were loaded lazily).
+
+import statistics
+import subprocess
+import sys
+
+IMPORT_ONLY = '''
+import time
+t = time.perf_counter()
+import libevdev
+print(time.perf_counter() - t)
+'''
+
+IMPORT_ALL_CODES = '''
+import time
+t = time.perf_counter()
+import libevdev
+for t_ in libevdev.types:
+    t_.codes
+print(time.perf_counter() - t)
+'''
+
+
+def measure(script, runs):
+    times = []
+    for _ in range(runs):
+        out = subprocess.check_output([sys.executable, '-c', script])
+        times.append(float(out))
+    return statistics.median(times)
+
+
+def main(args):
+    runs = int(args[1]) if len(args) > 1 else 20
+
+    lazy = measure(IMPORT_ONLY, runs)
+    eager = measure(IMPORT_ALL_CODES, runs)
+
+    print("import libevdev:                {:8.2f} ms".format(lazy * 1000))
+    print("import libevdev + all codes:    {:8.2f} ms".format(eager * 1000))
+    print("saving:                         {:8.2f} ms ({:.0f}%)".format(
+        (eager - lazy) * 1000, 100 * (eager - lazy) / eager))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+#
+# Runs the benchmarks for the binding's hot paths and optionally compares
+# them against a stored baseline:
+#
+#   python3 benchmarks/run.py --json baseline.json
+#   ... change something ...
+#   python3 benchmarks/run.py --baseline baseline.json
+#
+# Every benchmark reports the best time per operation out of several
+# rounds, in nanoseconds. With --baseline, the exit status is 1 if any
+# benchmark got slower by more than --threshold percent. Benchmarks that
+# need /dev/uinput are skipped if it is not accessible.
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import timeit
+
+import libevdev
+from libevdev.device import InputAbsInfo
+
+BENCHMARKS = []
+
+
+def benchmark(name, uinput=False):
+    def register(func):
+        BENCHMARKS.append((name, func, uinput))
+        return func
+    return register
+
+
+class Skip(Exception):
+    pass
+
+
+def best_of(func, number, rounds):
+    """
+    :returns: the best time of one call of func in seconds
+    """
+    return min(timeit.repeat(func, number=number, repeat=rounds)) / number
+
+
+def test_device():
+    d = libevdev.Device()
+    d.name = 'libevdev-python benchmark device'
+    d.enable(libevdev.EV_REL.REL_X)
+    d.enable(libevdev.EV_REL.REL_Y)
+    for code in range(libevdev.EV_KEY.KEY_ESC.value, libevdev.EV_KEY.KEY_Z.value + 1):
+        d.enable(libevdev.EV_KEY.codes[code])
+    d.enable(libevdev.EV_KEY.BTN_LEFT)
+    d.enable(libevdev.EV_ABS.ABS_X, InputAbsInfo(0, 1000, 0, 0, 10, 0))
+    d.enable(libevdev.EV_ABS.ABS_Y, InputAbsInfo(0, 1000, 0, 0, 10, 0))
+    return d
+
+
+def uinput_device(source):
+    try:
+        return source.create_uinput_device()
+    except OSError as e:
+        raise Skip('uinput not available: {}'.format(e))
+
+
+def open_device(uinput):
+    if uinput.devnode is None:
+        raise Skip('uinput device has no device node')
+    fd = open(uinput.devnode, 'rb')
+    os.set_blocking(fd.fileno(), False)
+    # give udev and the kernel a moment before reading
+    time.sleep(0.2)
+    return libevdev.Device(fd)
+
+
+def motion(count, x=1):
+    events = []
+    for _ in range(count):
+        events += [libevdev.InputEvent(libevdev.EV_REL.REL_X, x),
+                   libevdev.InputEvent(libevdev.EV_REL.REL_Y, -x),
+                   libevdev.InputEvent(libevdev.EV_SYN.SYN_REPORT, 0)]
+    return events
+
+
+IMPORT_SCRIPT = '''
+import time
+t = time.perf_counter()
+import libevdev
+print(time.perf_counter() - t)
+'''
+
+
+@benchmark('import')
+def bench_import(scale):
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(p for p in [os.path.dirname(os.path.dirname(libevdev.__file__)),
+                                                    env.get('PYTHONPATH')] if p)
+    times = [float(subprocess.check_output([sys.executable, '-c', IMPORT_SCRIPT], env=env))
+             for _ in range(max(3, 10 * scale))]
+    return statistics.median(times)
+
+
+@benchmark('evbit(type, code)')
+def bench_evbit_values(scale):
+    evbit = libevdev.evbit
+    return best_of(lambda: evbit(3, 0), 100000 * scale, 5)
+
+
+@benchmark('evbit(name, name)')
+def bench_evbit_names(scale):
+    evbit = libevdev.evbit
+    return best_of(lambda: evbit('EV_ABS', 'ABS_X'), 100000 * scale, 5)
+
+
+@benchmark('evbit(code name)')
+def bench_evbit_code_name(scale):
+    evbit = libevdev.evbit
+    return best_of(lambda: evbit('ABS_X'), 100000 * scale, 5)
+
+
+@benchmark('propbit()')
+def bench_propbit(scale):
+    propbit = libevdev.propbit
+    return best_of(lambda: propbit('INPUT_PROP_POINTER'), 100000 * scale, 5)
+
+
+@benchmark('Device.evbits')
+def bench_evbits(scale):
+    d = test_device()
+    return best_of(lambda: d.evbits, 1000 * scale, 5)
+
+
+@benchmark('Device.absinfo()')
+def bench_absinfo(scale):
+    d = test_device()
+    code = libevdev.EV_ABS.ABS_X
+    return best_of(lambda: d.absinfo(code), 10000 * scale, 5)
+
+
+@benchmark('FakeDevice read_events() per event')
+def bench_fake_read_events(scale):
+    d = libevdev.FakeDevice.from_template(test_device(), buffer_size=None)
+    data = libevdev.device._pack_events(motion(1000))
+    buf = libevdev.InputEventBuffer(1024)
+
+    def read():
+        d.send_events(data)
+        while len(d.read_events(buf.capacity, buf)):
+            pass
+
+    return best_of(read, 10 * scale, 5) / (len(data) // buf._struct.size)
+
+
+@benchmark('send_events() per event', uinput=True)
+def bench_send_events(scale):
+    u = uinput_device(test_device())
+    events = motion(20)
+    return best_of(lambda: u.send_events(events), 100 * scale, 5) / len(events)
+
+
+@benchmark('events() per event', uinput=True)
+def bench_events(scale):
+    u = uinput_device(test_device())
+    d = open_device(u)
+    # stay well below the kernel's per-client buffer
+    events = motion(10)
+    times = []
+    for _ in range(5):
+        elapsed = 0
+        for i in range(100 * scale):
+            u.send_events(events)
+            start = time.perf_counter()
+            count = sum(1 for _ in d.events())
+            elapsed += time.perf_counter() - start
+            if count != len(events):
+                raise Skip('read {} events instead of {}'.format(count, len(events)))
+        times.append(elapsed)
+    return min(times) / (100 * scale * len(events))
+
+
+@benchmark('sync() after SYN_DROPPED', uinput=True)
+def bench_sync(scale):
+    u = uinput_device(test_device())
+    d = open_device(u)
+    keys = [libevdev.EV_KEY.codes[c] for c in range(libevdev.EV_KEY.KEY_A.value,
+                                                       libevdev.EV_KEY.KEY_Z.value + 1)]
+    times = []
+    for i in range(10 * scale):
+        # Toggle the keys, then overflow the kernel buffer so the sync
+        # has to report them
+        value = (i + 1) % 2
+        u.send_events([libevdev.InputEvent(k, value) for k in keys] +
+                      [libevdev.InputEvent(libevdev.EV_SYN.SYN_REPORT, 0)])
+        for _ in range(200):
+            u.send_events(motion(1, x=i + 1))
+        buf = d.read_events(4096)
+        while len(buf) and not buf.dropped:
+            buf = d.read_events(4096)
+        if not buf.dropped:
+            raise Skip('no SYN_DROPPED')
+        start = time.perf_counter()
+        for _ in d.sync():
+            pass
+        times.append(time.perf_counter() - start)
+        # drain whatever the kernel queued after the drop
+        while len(d.read_events(4096)):
+            pass
+    return min(times)
+
+
+@benchmark('uinput create/destroy', uinput=True)
+def bench_uinput_create(scale):
+    template = libevdev.DeviceTemplate.from_device(test_device())
+    uinput_device(template)._uinput.destroy()
+
+    def create():
+        template.create_uinput_device()._uinput.destroy()
+
+    return best_of(create, 5 * scale, 3)
+
+
+def run(names, scale):
+    results = {}
+    for name, func, uinput in BENCHMARKS:
+        if names and not any(n in name for n in names):
+            continue
+        if uinput and not os.access('/dev/uinput', os.R_OK | os.W_OK):
+            results[name] = {'skipped': 'no access to /dev/uinput'}
+            continue
+        try:
+            results[name] = {'ns': func(scale) * 1e9}
+        except Skip as e:
+            results[name] = {'skipped': str(e)}
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Prints the results next to the baseline.
+
+    :returns: the names of the benchmarks that regressed
+    """
+    regressions = []
+    print("{:36s} {:>14s} {:>14s} {:>8s}".format('', 'baseline ns', 'current ns', 'change'))
+    for name, result in results.items():
+        base = baseline.get(name, {})
+        if 'ns' not in result or 'ns' not in base:
+            reason = result.get('skipped', base.get('skipped', 'not in baseline'))
+            print("{:36s} {}".format(name, reason))
+            continue
+        change = 100 * (result['ns'] - base['ns']) / base['ns']
+        flag = ''
+        if change > threshold:
+            flag = ' REGRESSION'
+            regressions.append(name)
+        print("{:36s} {:14.1f} {:14.1f} {:+7.1f}%{}".format(name, base['ns'], result['ns'],
+                                                            change, flag))
+    return regressions
+
+
+def report(results):
+    print("{:36s} {:>14s}".format('', 'ns'))
+    for name, result in results.items():
+        if 'ns' in result:
+            print("{:36s} {:14.1f}".format(name, result['ns']))
+        else:
+            print("{:36s} skipped: {}".format(name, result['skipped']))
+
+
+def main(args):
+    parser = argparse.ArgumentParser(description='libevdev-python benchmarks')
+    parser.add_argument('--json', metavar='FILE',
+                        help='write the results as JSON to FILE, "-" for stdout')
+    parser.add_argument('--baseline', metavar='FILE',
+                        help='compare against the JSON results in FILE')
+    parser.add_argument('--threshold', type=float, default=10,
+                        help='percent slowdown counted as a regression (default: 10)')
+    parser.add_argument('--scale', type=int, default=1,
+                        help='multiplier for the number of iterations')
+    parser.add_argument('names', nargs='*',
+                        help='only run the benchmarks containing one of these strings')
+    args = parser.parse_args(args[1:])
+
+    results = run(args.names, args.scale)
+    output = {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'results': results,
+    }
+
+    if args.json == '-':
+        json.dump(output, sys.stdout, indent=2)
+        print()
+    else:
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump(output, f, indent=2)
+                f.write('\n')
+        if not args.baseline:
+            report(results)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        if args.json == '-':
+            sys.stdout = sys.stderr
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
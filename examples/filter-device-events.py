@@ -7,6 +7,7 @@
 
 import sys
 import libevdev
+from libevdev import remap
 
 
 def main(args):
@@ -18,21 +19,17 @@ def main(args):
 
     fd = open(path, 'rb')
     d = libevdev.Device(fd)
-    d.grab()
-
-    # create a duplicate of our input device
-    d.enable(code_to)  # make sure the code we map to is available
-    uidev = d.create_uinput_device()
-    print('Device is at {}'.format(uidev.devnode))
-
-    while True:
-        for e in d.events():
-            # change any event with our event code to
-            # the one we want to map to, but pass all other events
-            # through
-            if e.code == code_from:
-                e = libevdev.InputEvent(code_to, e.value)
-            uidev.send_events([e])
+
+    # create a duplicate of our input device that has code_to instead of
+    # code_from, then change any event with code_from to code_to and pass
+    # all other events through
+    remapper = libevdev.Remapper(d, [remap.Remap(code_from, code_to)])
+    print('Device is at {}'.format(remapper.uinput.devnode))
+
+    try:
+        remapper.run()
+    except KeyboardInterrupt:
+        print(remapper.stats)
 
 
 if __name__ == "__main__":
@@ -20,6 +20,23 @@
 # FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
 # DEALINGS IN THE SOFTWARE.
 
-from .device import Device, InvalidFileError, EventsDroppedException, InvalidArgumentException
-from .event import InputEvent
+from .device import Device, DeviceInfo, SlotValues, InvalidFileError, EventsDroppedException, InvalidArgumentException
+from .event import InputEvent, InputEventBuffer, Frame
 from .const import evbit, propbit, EventType, EventCode, InputProperty
+from .deviceset import DeviceSet
+from .capabilities import Bitmask, Capabilities, DeviceTemplate
+from .recording import Recorder, Recording, InvalidRecordingError
+from .replay import Replayer
+from .pool import UinputPool
+from .remap import Remapper
+from .latency import LatencyHistogram
+from .fake import FakeDevice
+
+
+def __getattr__(name):
+    # The ring needs multiprocessing.shared_memory, which is slow to
+    # import, so only load it when it is used.
+    if name in ('EventRing', 'EventRingReader'):
+        from . import ring
+        return getattr(ring, name)
+    raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
@@ -23,8 +23,11 @@
 import libevdev
 
 import os
+import array
 import ctypes
 import errno
+import fcntl
+import struct
 from ctypes import c_char_p
 from ctypes import c_int
 from ctypes import c_uint
@@ -38,6 +41,56 @@ READ_FLAG_NORMAL = 0x2
 READ_FLAG_FORCE_SYNC = 0x4
 READ_FLAG_BLOCKING = 0x8
 
+READ_STATUS_SUCCESS = 0
+READ_STATUS_SYNC = 1
+
+# The event types the kernel reports via EVIOCGBIT, for all others
+# EVIOCGBIT fails with EINVAL
+_EVIOCGBIT_TYPES = (0x01, 0x02, 0x03, 0x04, 0x05, 0x11, 0x12, 0x15)
+_EVIOCGPROP = 0x09
+_EVIOCGMTSLOTS = 0x0a
+# EVIOCGKEY, EVIOCGLED, EVIOCGSND and EVIOCGSW by event type
+_EVIOCGSTATE = {0x01: 0x18, 0x11: 0x19, 0x12: 0x1a, 0x05: 0x1b}
+
+_long = struct.Struct('@L')
+_LONG_BITS = _long.size * 8
+
+_EVIOCSMASK = 0x93
+# struct input_mask { __u32 type; __u32 codes_size; __u64 codes_ptr; }
+_input_mask = struct.Struct('=IIQ')
+_EV_MAX = 0x1f
+# The event types EVIOCSMASK accepts a code mask for
+_EVIOCSMASK_TYPES = (0x01, 0x02, 0x03, 0x04, 0x05, 0x11, 0x12, 0x15)
+
+
+def _ioc_read(nr, size):
+    """
+    :return: the ``_IOC(_IOC_READ, 'E', nr, size)`` ioctl request number
+    """
+    return (2 << 30) | (size << 16) | (ord('E') << 8) | nr
+
+
+def _ioc_write(nr, size):
+    """
+    :return: the ``_IOC(_IOC_WRITE, 'E', nr, size)`` ioctl request number
+    """
+    return (1 << 30) | (size << 16) | (ord('E') << 8) | nr
+
+
+def _ioctl_bits(fd, nr, maxbit):
+    """
+    Issues a bitmask-reading ioctl like ``EVIOCGBIT`` on fd and returns
+    the bits up to and including maxbit as integer.
+
+    :raises: OSError
+    """
+    buf = bytearray((maxbit // _LONG_BITS + 1) * _long.size)
+    fcntl.ioctl(fd, _ioc_read(nr, len(buf)), buf, True)
+    bits = 0
+    for i, (word,) in enumerate(_long.iter_unpack(buf)):
+        bits |= word << (i * _LONG_BITS)
+    return bits & ((1 << (maxbit + 1)) - 1)
+
 
 class _InputAbsinfo(ctypes.Structure):
     _fields_ = [("value", c_int32),
@@ -75,6 +128,15 @@ class _LibraryWrapper(object):
         super(_LibraryWrapper, self).__init__()
         self._load()
 
+    @staticmethod
+    def _release(handle):
+        """
+        Called with a context or uinput device handle right after it was
+        freed. A no-op, :mod:`libevdev.counters` replaces it to drop the
+        counters of the handle.
+        """
+        pass
+
     @classmethod
     def _load(cls):
         if cls._lib is not None:
@@ -386,6 +448,7 @@ class Libevdev(_LibraryWrapper):
     def __del__(self):
         if hasattr(self, "_ctx"):
             self._free(self._ctx)
+            self._release(self._ctx)
 
     @property
     def name(self):
@@ -704,6 +767,109 @@ class Libevdev(_LibraryWrapper):
             r = self._has_event_code(self._ctx, event_type, event_code)
         return bool(r)
 
+    def type_bits(self, kernel=False):
+        """
+        :param kernel: If True, the bits are read from the kernel with the
+                       ``EVIOCGBIT`` ioctl instead of querying libevdev
+        :return: an integer with the bit of each supported event type set
+        :raises: OSError if kernel is True and the ioctl fails
+        """
+        tmax = self.event_to_value("EV_MAX")
+        if kernel:
+            return _ioctl_bits(self._file.fileno(), 0x20, tmax)
+
+        bits = 0
+        for t in range(tmax + 1):
+            if self._has_event_type(self._ctx, t):
+                bits |= 1 << t
+        return bits
+
+    def code_bits(self, event_type, kernel=False):
+        """
+        :param event_type: the numerical event type value
+        :param kernel: If True and the kernel supports it for this type,
+                       the bits are read from the kernel with the
+                       ``EVIOCGBIT`` ioctl instead of querying libevdev
+        :return: an integer with the bit of each supported event code set
+        :raises: OSError if kernel is True and the ioctl fails
+        """
+        cmax = self.type_max(event_type)
+        if cmax is None:
+            return 0
+        if kernel and event_type in _EVIOCGBIT_TYPES:
+            return _ioctl_bits(self._file.fileno(), 0x20 + event_type, cmax)
+
+        bits = 0
+        has_event_code = self._has_event_code
+        for c in range(cmax + 1):
+            if has_event_code(self._ctx, event_type, c):
+                bits |= 1 << c
+        return bits
+
+    def property_bits(self, kernel=False):
+        """
+        :param kernel: If True, the bits are read from the kernel with the
+                       ``EVIOCGPROP`` ioctl instead of querying libevdev
+        :return: an integer with the bit of each input property set
+        :raises: OSError if kernel is True and the ioctl fails
+        """
+        pmax = self.property_to_value("INPUT_PROP_MAX")
+        if kernel:
+            return _ioctl_bits(self._file.fileno(), _EVIOCGPROP, pmax)
+
+        bits = 0
+        for p in range(pmax + 1):
+            if self._has_property(self._ctx, p):
+                bits |= 1 << p
+        return bits
+
+    def state_bits(self, event_type, codes, kernel=False):
+        """
+        :param event_type: the numerical event type value, one of EV_KEY,
+                           EV_LED, EV_SND or EV_SW
+        :param codes: an integer bitmask of the codes to query
+        :param kernel: If True, the state is read from the kernel with the
+                       ``EVIOCGKEY``, ``EVIOCGLED``, ``EVIOCGSND`` or
+                       ``EVIOCGSW`` ioctl instead of querying libevdev
+        :return: an integer with the bit of each code with a nonzero value
+                 set, limited to the bits in codes
+        :raises: OSError if kernel is True and the ioctl fails
+        """
+        if kernel:
+            cmax = self.type_max(event_type)
+            nr = _EVIOCGSTATE[event_type]
+            return _ioctl_bits(self._file.fileno(), nr, cmax) & codes
+
+        bits = 0
+        get_event_value = self._get_event_value
+        while codes:
+            low = codes & -codes
+            if get_event_value(self._ctx, event_type, low.bit_length() - 1):
+                bits |= low
+            codes ^= low
+        return bits
+
+    def set_event_mask(self, event_type, codes):
+        """
+        :param event_type: the numerical event type, or 0 for the mask of
+                           event types
+        :param codes: an integer bitmask of the codes (or types) the
+                      kernel passes on to this file descriptor
+        :raises: OSError if the ``EVIOCSMASK`` ioctl fails
+
+        Sets the per-file descriptor mask of the kernel with the
+        ``EVIOCSMASK`` ioctl. Events not in the mask are discarded by the
+        kernel before they reach the file descriptor, EV_SYN events are
+        never masked.
+        """
+        maxbit = _EV_MAX if event_type == 0 else self.type_max(event_type)
+        words = [(codes >> (i * _LONG_BITS)) & ((1 << _LONG_BITS) - 1)
+                 for i in range(maxbit // _LONG_BITS + 1)]
+        bits = array.array('L', words)
+        arg = _input_mask.pack(event_type, len(bits) * bits.itemsize,
+                               bits.buffer_info()[0])
+        fcntl.ioctl(self._file.fileno(), _ioc_write(_EVIOCSMASK, len(arg)), arg)
+
     def _code(self, t, c):
         """
         Resolves a type+code tuple, either of which could be integer or
@@ -772,6 +938,51 @@ class Libevdev(_LibraryWrapper):
         v = self._get_slot_value(self._ctx, slot, c)
         return v
 
+    def slot_values(self, codes, num_slots, kernel=False):
+        """
+        :param codes: a list of numerical ABS_MT_* codes
+        :param num_slots: the number of slots to read
+        :param kernel: If True, the values are read from the kernel with the
+                       ``EVIOCGMTSLOTS`` ioctl, one per code, instead of
+                       querying libevdev
+        :return: an ``array.array('i')`` with num_slots rows of one value
+                 per code
+        :raises: OSError if kernel is True and the ioctl fails
+        """
+        ncodes = len(codes)
+        values = array.array('i', bytes(4 * ncodes * num_slots))
+        if kernel:
+            fd = self._file.fileno()
+            buf = array.array('i', bytes(4 * (num_slots + 1)))
+            request = _ioc_read(_EVIOCGMTSLOTS, len(buf) * buf.itemsize)
+            for i, c in enumerate(codes):
+                buf[0] = c
+                fcntl.ioctl(fd, request, buf, True)
+                values[i::ncodes] = buf[1:]
+            return values
+
+        get_slot_value = self._get_slot_value
+        ctx = self._ctx
+        i = 0
+        for slot in range(num_slots):
+            for c in codes:
+                values[i] = get_slot_value(ctx, slot, c)
+                i += 1
+        return values
+
+    def set_slot_values(self, codes, values):
+        """
+        :param codes: a list of numerical ABS_MT_* codes
+        :param values: a sequence of rows of one value per code, one row
+                       per slot starting at slot 0, as returned by
+                       :func:`slot_values`
+        """
+        set_slot_value = self._set_slot_value
+        ctx = self._ctx
+        ncodes = len(codes)
+        for i, v in enumerate(values):
+            set_slot_value(ctx, i // ncodes, codes[i % ncodes], v)
+
     def enable(self, event_type, event_code=None, data=None):
         """
         :param event_type: the event type, either as integer or as string
@@ -807,6 +1018,41 @@ class Libevdev(_LibraryWrapper):
                 data = ctypes.pointer(c_int(data))
             self._enable_event_code(self._ctx, t, c, data)
 
+    def enable_bits(self, types, properties=0, absinfo=None, rep=None):
+        """
+        Enables all given event types, codes and properties in one call.
+
+        :param types: a dict of the numerical event type values mapped to
+                      the integer bitmask of the codes to enable
+        :param properties: the integer bitmask of properties to enable
+        :param absinfo: a dict of EV_ABS codes to dicts as returned by
+                        :func:`absinfo`, required for all EV_ABS codes
+        :param rep: a dict of EV_REP codes to their integer value, required
+                    for all EV_REP codes
+        """
+        ctx = self._ctx
+        enable_event_code = self._enable_event_code
+        for t, codes in types.items():
+            self._enable_event_type(ctx, t)
+            while codes:
+                low = codes & -codes
+                codes ^= low
+                c = low.bit_length() - 1
+                data = None
+                if t == 0x03:  # EV_ABS
+                    a = absinfo[c]
+                    data = ctypes.pointer(_InputAbsinfo(a["value"], a["minimum"],
+                                                        a["maximum"], a["fuzz"],
+                                                        a["flat"], a["resolution"]))
+                elif t == 0x14:  # EV_REP
+                    data = ctypes.pointer(c_int(rep[c]))
+                enable_event_code(ctx, t, c, data)
+
+        while properties:
+            low = properties & -properties
+            properties ^= low
+            self._enable_property(ctx, low.bit_length() - 1)
+
     def disable(self, event_type, event_code=None):
         """
         :param event_type: the event type, either as integer or as string
@@ -864,6 +1110,58 @@ class Libevdev(_LibraryWrapper):
 
         return ev
 
+    def has_event_pending(self):
+        """
+        :return: True if there are events pending in libevdev's queue or on
+                 the file descriptor, False otherwise
+
+        This function is the equivalent to ``libevdev_has_event_pending()``
+        """
+        return self._has_event_pending(self._ctx) > 0
+
+    def next_events(self, flags, pointers):
+        """
+        :param flags: ``READ_FLAG_NORMAL`` or ``READ_FLAG_BLOCKING``
+        :param pointers: a list of ctypes pointers to ``_InputEvent`` structs,
+                         filled in order
+        :return: the number of events read, at most ``len(pointers)``
+
+        Reads as many events as are pending into the given structs. With
+        ``READ_FLAG_BLOCKING`` only the first event blocks, the remaining
+        ones are only read while ``libevdev_has_event_pending()`` says so.
+
+        Reading stops after a SYN_DROPPED event, which is always the last
+        event read. If an error occurs after some events have been read,
+        those events are returned and the error is left for the next call.
+
+        :raises: OSError if no event could be read due to an error
+        """
+        ctx = self._ctx
+        next_event = self._next_event
+        has_event_pending = self._has_event_pending
+        blocking = flags & READ_FLAG_BLOCKING
+
+        count = 0
+        for ptr in pointers:
+            if count > 0 and blocking and has_event_pending(ctx) <= 0:
+                break
+
+            rc = next_event(ctx, flags, ptr)
+            if rc == -errno.EAGAIN:
+                break
+            if rc < 0:
+                if count > 0:
+                    break
+                raise OSError(-rc, os.strerror(-rc))
+
+            count += 1
+            # In normal mode, the SYN_DROPPED event is the only one
+            # returned with the sync status
+            if rc == READ_STATUS_SYNC:
+                break
+
+        return count
+
 
 class _UinputDevice(ctypes.Structure):
     pass
@@ -903,6 +1201,11 @@ class UinputDevice(_LibraryWrapper):
             "argtypes": (c_void_p,),
             "restype": c_char_p,
         },
+        # int libevdev_uinput_get_fd(const struct libevdev_uinput *)
+        "libevdev_uinput_get_fd": {
+            "argtypes": (c_void_p,),
+            "restype": c_int,
+        },
         # int libevdev_uinput_write_event(const struct libevdev *, uint, uint, int)
         "libevdev_uinput_write_event": {
             "argtypes": (c_void_p, c_uint, c_uint, c_int),
@@ -934,8 +1237,17 @@ class UinputDevice(_LibraryWrapper):
             raise OSError(-rc, os.strerror(-rc))
 
     def __del__(self):
-        if self._uinput_device is not None:
+        self.destroy()
+
+    def destroy(self):
+        """
+        Destroys the uinput device now rather than when this object is
+        garbage-collected. The object must not be used afterwards.
+        """
+        if getattr(self, '_uinput_device', None) is not None:
             self._uinput_destroy(self._uinput_device)
+            self._release(self._uinput_device)
+            self._uinput_device = None
 
     @property
     def fd(self):
@@ -947,6 +1259,22 @@ class UinputDevice(_LibraryWrapper):
     def write_event(self, type, code, value):
         self._uinput_write_event(self._uinput_device, type, code, value)
 
+    def write_events(self, data):
+        """
+        :param data: a bytes-like object containing one or more packed
+                     ``struct input_event``
+
+        Writes all events to the uinput device in as few ``write()`` calls
+        as the kernel permits, usually one. This is the batched version of
+        ``libevdev_uinput_write_event()``, the timestamps in the events
+        are ignored by the kernel.
+        """
+        fd = self._uinput_get_fd(self._uinput_device)
+        view = memoryview(data)
+        while view:
+            n = os.write(fd, view)
+            view = view[n:]
+
     @property
     def devnode(self):
         """
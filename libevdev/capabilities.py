@@ -0,0 +1,302 @@
+# -*- coding: latin-1 -*-
+# Copyright © 2017 Red Hat, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice (including the next
+# paragraph) shall be included in all copies or substantial portions of the
+# Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import libevdev
+from ._clib import UinputDevice
+
+
+class Bitmask(int):
+    """
+    An integer used as a set of bits, bit n is set if n is in the set.
+    Bitmasks are returned by :class:`Capabilities` and support the usual
+    set operations::
+
+            >>> m = Bitmask(0b1011)
+            >>> list(m)
+            [0, 1, 3]
+            >>> 3 in m
+            True
+            >>> list(m & Bitmask(0b0110))
+            [1]
+            >>> len(m | Bitmask(0b0100))
+            4
+
+    Membership tests also accept an :class:`EventType`,
+    :class:`EventCode` or :class:`InputProperty`, their numerical value is
+    used::
+
+            >>> libevdev.EV_KEY.BTN_LEFT in caps.codes(libevdev.EV_KEY)
+            True
+
+    As a subclass of int, the bits can be converted to bytes with
+    :func:`int.to_bytes` and a Bitmask can be created from bytes with
+    :func:`Bitmask.from_bytes`.
+    """
+    __slots__ = ()
+
+    def __iter__(self):
+        bits = int(self)
+        while bits:
+            low = bits & -bits
+            yield low.bit_length() - 1
+            bits ^= low
+
+    def __len__(self):
+        return bin(self).count('1')
+
+    def __contains__(self, bit):
+        bit = getattr(bit, 'value', bit)
+        return bit >= 0 and bool(int(self) >> bit & 1)
+
+    def __and__(self, other):
+        return Bitmask(int(self) & other)
+
+    __rand__ = __and__
+
+    def __or__(self, other):
+        return Bitmask(int(self) | other)
+
+    __ror__ = __or__
+
+    def __xor__(self, other):
+        return Bitmask(int(self) ^ other)
+
+    __rxor__ = __xor__
+
+    def __repr__(self):
+        return 'Bitmask({:#x})'.format(int(self))
+
+
+class Capabilities(object):
+    """
+    A snapshot of the event types, event codes and input properties of a
+    :class:`Device`, see :attr:`Device.capabilities
+    <libevdev.Device.capabilities>`::
+
+            caps = device.capabilities
+            if libevdev.EV_ABS in caps.types:
+                for c in caps.codes(libevdev.EV_ABS):
+                    print(libevdev.evbit(libevdev.EV_ABS.value, c))
+
+    A snapshot does not change when the device is modified later, query
+    the device's capabilities again to get the current state.
+    """
+    __slots__ = ('_types', '_props')
+
+    def __init__(self, types=None, properties=0):
+        """
+        :param types: a dict of the numerical event type values mapped to
+                      the integer bitmask of the supported codes of that type
+        :param properties: the integer bitmask of input properties
+        """
+        self._types = dict(types or {})
+        self._props = properties
+
+    @property
+    def types(self):
+        """
+        A :class:`Bitmask` of the supported event types
+        """
+        bits = 0
+        for t in self._types:
+            bits |= 1 << t
+        return Bitmask(bits)
+
+    def codes(self, evtype):
+        """
+        :param evtype: the event type
+        :type evtype: EventType or int
+        :returns: a :class:`Bitmask` of the supported codes for the given
+                  type, empty if the type is not supported
+        """
+        return Bitmask(self._types.get(getattr(evtype, 'value', evtype), 0))
+
+    @property
+    def properties(self):
+        """
+        A :class:`Bitmask` of the supported input properties
+        """
+        return Bitmask(self._props)
+
+    def has(self, bit):
+        """
+        :param bit: the event type, event code or input property
+        :type bit: EventType, EventCode or InputProperty
+        :returns: True if this snapshot has the type, code or property
+        """
+        if isinstance(bit, libevdev.InputProperty):
+            return bit in self.properties
+        if isinstance(bit, libevdev.EventCode):
+            return bit in self.codes(bit.type)
+        return bit.value in self._types
+
+    @property
+    def evbits(self):
+        """
+        The supported event types and codes in the same form as
+        :attr:`Device.evbits <libevdev.Device.evbits>`
+        """
+        evbits = {}
+        for t in sorted(self._types):
+            evtype = libevdev.evbit(t)
+            if evtype is None:
+                continue
+            codes = evtype.codes
+            evbits[evtype] = [codes[c] for c in Bitmask(self._types[t])
+                              if c < len(codes)]
+        return evbits
+
+    def _with_type(self, evtype, codes):
+        """
+        :returns: a copy of this snapshot with the codes of the given
+                  numerical type replaced, or the type removed if codes is
+                  None
+        """
+        types = dict(self._types)
+        if codes is None:
+            types.pop(evtype, None)
+        else:
+            types[evtype] = codes
+        return Capabilities(types, self._props)
+
+    def _with_property(self, prop, present):
+        """
+        :returns: a copy of this snapshot with the given numerical property
+                  set or unset
+        """
+        props = self._props | (1 << prop)
+        if not present:
+            props ^= 1 << prop
+        return Capabilities(self._types, props)
+
+    def __eq__(self, other):
+        if not isinstance(other, Capabilities):
+            return NotImplemented
+        return self._types == other._types and self._props == other._props
+
+    __hash__ = None
+
+    def __repr__(self):
+        return 'Capabilities(types={}, properties={:#x})'.format(
+            {t: '{:#x}'.format(c) for t, c in sorted(self._types.items())},
+            self._props)
+
+
+class DeviceTemplate(object):
+    """
+    Everything needed to recreate a device: its :class:`DeviceInfo`,
+    :class:`Capabilities`, absinfo and key repeat values. A template is
+    captured once and can then create any number of identical devices
+    without querying the original device again::
+
+            template = libevdev.DeviceTemplate.from_device(ctx)
+            clones = [template.create_uinput_device() for _ in range(200)]
+
+    :param info: the name, phys, uniq and id of the device
+    :type info: DeviceInfo
+    :param capabilities: the event types, codes and properties
+    :type capabilities: Capabilities
+    :param absinfo: a dict of the numerical EV_ABS codes mapped to dicts
+                    with the keys 'minimum', 'maximum', 'fuzz', 'flat',
+                    'resolution' and 'value', required for every EV_ABS code
+    :param rep: a dict of the numerical EV_REP codes mapped to their value,
+                required for every EV_REP code
+    """
+    __slots__ = ('info', 'capabilities', '_absinfo', '_rep')
+
+    def __init__(self, info, capabilities, absinfo=None, rep=None):
+        self.info = info
+        self.capabilities = capabilities
+        self._absinfo = dict(absinfo or {})
+        self._rep = dict(rep or {})
+
+    @classmethod
+    def from_device(cls, device):
+        """
+        Captures the template of a device.
+
+        :param device: the device to capture
+        :type device: Device
+        :returns: a new :class:`DeviceTemplate`
+        """
+        caps = device.capabilities
+        l = device._libevdev
+        absinfo = {c: l.absinfo(c) for c in caps.codes(libevdev.EV_ABS)}
+        rep = {c: l.event_value(libevdev.EV_REP.value, c)
+               for c in caps.codes(libevdev.EV_REP)}
+        return cls(device.info, caps, absinfo, rep)
+
+    def absinfo(self, code):
+        """
+        :param code: the ABS_<*> code
+        :type code: EventCode
+        :returns: the :class:`InputAbsInfo` for the code or None if the
+                  template does not have the code
+        """
+        a = self._absinfo.get(code.value)
+        if a is None:
+            return None
+        return libevdev.device.InputAbsInfo(a['minimum'], a['maximum'],
+                                            a['fuzz'], a['flat'],
+                                            a['resolution'], a['value'])
+
+    def create_device(self):
+        """
+        :returns: a new :class:`Device` without a file descriptor that has
+                  the name, phys, uniq, id, event codes and properties of
+                  this template
+        """
+        return self._apply(libevdev.Device())
+
+    def _apply(self, d):
+        """
+        Sets up the device without a file descriptor d like this template.
+
+        :returns: d
+        """
+        info = self.info
+        d.name = info.name
+        d.phys = info.phys
+        d.uniq = info.uniq
+        d.id = info.id
+        caps = self.capabilities
+        d._libevdev.enable_bits(caps._types, caps._props, self._absinfo, self._rep)
+        d._capabilities = caps
+        return d
+
+    def create_uinput_device(self, uinput_fd=None):
+        """
+        Creates a new uinput device from this template.
+
+        :param uinput_fd: A file descriptor to the /dev/input/uinput
+                          device. If None, the device is opened and closed
+                          automatically.
+        :returns: the uinput :class:`Device`, see
+                  :func:`Device.create_uinput_device`
+        :raises: OSError
+        """
+        d = self.create_device()
+        d._uinput = UinputDevice(d._libevdev, uinput_fd)
+        return d
+
+    def __repr__(self):
+        return 'DeviceTemplate({}, {})'.format(self.info.name, self.capabilities)
@@ -20,7 +20,9 @@
 # FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
 # DEALINGS IN THE SOFTWARE.
 
+import marshal
 import os
+import threading
 from functools import total_ordering
 
 from ._clib import Libevdev
@@ -147,6 +149,10 @@ class EventType(EvdevBit):
     .. attribute:: max
 
         The maximum event code permitted in this type as integer
+
+    .. note:: The event codes of a type are created on first access to
+              any of them (or to :attr:`codes`). Until then, an
+              :class:`EventType` is just its name, value and max.
     """
     __hash__ = super.__hash__
 
@@ -154,6 +160,15 @@ class EventType(EvdevBit):
         assert isinstance(other, EventType)
         return self.value == other.value
 
+    def __getattr__(self, name):
+        # Only called when the normal lookup fails, i.e. for the codes
+        # before they have been loaded or for names that don't exist
+        if name.startswith('__') or 'codes' in self.__dict__:
+            raise AttributeError(name)
+
+        _load_codes(self)
+        return object.__getattribute__(self, name)
+
 
 class InputProperty(EvdevBit):
     """
@@ -246,27 +261,14 @@ def evbit(evtype, evcode=None):
     :return: An event code value representing the code
     :rtype: EventCode or EventType
     """
-    etype = None
-    for t in libevdev.types:
-        if t.value == evtype or t.name == evtype:
-            etype = t
-            break
-
     if evcode is None and isinstance(evtype, str) and not evtype.startswith('EV_'):
-        for t in libevdev.types:
-            for c in t.codes:
-                if c.name == evtype:
-                    return c
+        return _code_from_name(evtype)
 
+    etype = _lookup(_types_by_value, _types_by_name, evtype)
     if etype is None or evcode is None:
         return etype
 
-    ecode = None
-    for c in etype.codes:
-        if c.value == evcode or c.name == evcode:
-            ecode = c
-
-    return ecode
+    return _lookup(etype.codes, etype._codes_by_name, evcode)
 
 
 def propbit(prop):
@@ -287,11 +289,264 @@ def propbit(prop):
     :return: the converted :class:`InputProperty` or None if it does not exist
     :rtype: InputProperty
     """
+    return _lookup(_props_by_value, _props_by_name, prop)
+
+
+# Lookup tables filled in by _load_consts(). The *_by_value tables are lists
+# indexed by the numeric value (None where there is no such type/property),
+# the *_by_name tables map the string name to the object.
+_types_by_value = []
+_types_by_name = {}
+_props_by_value = []
+_props_by_name = {}
+
+# Serializes the lazy creation of the event codes, see _load_codes()
+_codes_lock = threading.Lock()
+
+
+def _lookup(by_value, by_name, key):
+    """
+    Returns the entry for key, either from the by_name dict if key is a
+    string or from the by_value list if key is a numeric value. Returns None
+    if key is out of range or not a known name.
+    """
+    if isinstance(key, str):
+        return by_name.get(key)
+
+    try:
+        if key < 0:
+            return None
+        return by_value[key]
+    except (IndexError, TypeError):
+        return None
+
+
+def _code_from_name(name):
+    """
+    Looks up an event code by name without knowing its type. The type
+    matching the name's prefix is checked first ('ABS_X' is an EV_ABS code)
+    so that only that type's codes need to be loaded, the others are
+    only searched if that fails.
+    """
+    etype = _types_by_name.get('EV_' + name.split('_')[0])
+    if etype is not None:
+        code = etype._codes_by_name.get(name)
+        if code is not None:
+            return code
+
+    for t in _types_by_value:
+        if t is None:
+            continue
+        code = t._codes_by_name.get(name)
+        if code is not None:
+            return code
+
+    return None
+
+
+def _load_codes(type_object):
+    """
+    Creates the :class:`EventCode` objects for the given type and sets them
+    as attributes on the type, along with the type's codes list. This is
+    deferred until the codes are first needed, creating all of them costs
+    more than a thousand classes and ctypes calls.
+    """
+    with _codes_lock:
+        if 'codes' in type_object.__dict__:
+            return
+
+        t = type_object.value
+        tname = type_object.name
+        cmax = type_object.max
+        names = type_object._code_names
+
+        codes = []
+        codes_by_name = {}
+
+        for c in range(cmax + 1 if cmax is not None else 0):
+            if names is not None:
+                cname = names[c]
+            else:
+                cname = Libevdev.event_to_name(t, c)
+            # For those without names, we just use the type name plus
+            # hexcode
+            if cname is None:
+                cname = "{}_{:02X}".format(tname[3:], c)
+
+            new_class = type(cname, (EventCode, ),
+                             {'type': type_object,
+                              'name': cname,
+                              'value': c})
+            code_object = new_class()
+            setattr(type_object, cname, code_object)
+            codes.append(code_object)
+            codes_by_name.setdefault(cname, code_object)
+
+        setattr(type_object, '_codes_by_name', codes_by_name)
+        # codes goes last, it marks the type as loaded
+        setattr(type_object, 'codes', codes)
+
+
+# Bump this whenever the layout of the cache file changes
+_CACHE_VERSION = 1
+
+
+def _library_path():
+    """
+    Returns the path to the libevdev shared library loaded into this
+    process or None if it cannot be found.
+    """
+    try:
+        with open('/proc/self/maps') as f:
+            for line in f:
+                fields = line.split(None, 5)
+                if len(fields) < 6:
+                    continue
+                path = fields[5].strip()
+                if os.path.basename(path).startswith('libevdev.so'):
+                    return path
+    except OSError:
+        pass
+
+    return None
+
+
+def _cache_file():
+    """
+    Returns the path to the constants cache file for the currently loaded
+    libevdev or None if the cache is disabled or cannot be used.
+
+    The cache directory is ``$LIBEVDEV_CACHE_DIR`` if set (an empty value
+    disables the cache), otherwise ``$XDG_CACHE_HOME/libevdev-python``.
+    The file name is derived from the library's file name, inode, size and
+    modification time, so an updated libevdev gets a new cache file.
+
+    The cache is stored in :mod:`marshal` format, it loads without
+    importing anything and in a single read.
+    """
+    cachedir = os.environ.get('LIBEVDEV_CACHE_DIR')
+    if cachedir is None:
+        xdg = os.environ.get('XDG_CACHE_HOME')
+        if not xdg:
+            xdg = os.path.join(os.path.expanduser('~'), '.cache')
+        cachedir = os.path.join(xdg, 'libevdev-python')
+
+    if not cachedir:
+        return None
+
+    libpath = _library_path()
+    if libpath is None:
+        return None
+
+    try:
+        st = os.stat(libpath)
+    except OSError:
+        return None
+
+    filename = '{}-{:x}-{:x}-{:x}-{:x}.v{}.{}'.format(os.path.basename(libpath),
+                                                   st.st_dev, st.st_ino,
+                                                   st.st_size, st.st_mtime_ns,
+                                                   _CACHE_VERSION,
+                                                   marshal.version)
+    return os.path.join(cachedir, filename)
+
+
+def _query_consts(with_codes=True):
+    """
+    Queries libevdev for all event type, code and property names. The
+    result is a dict in the format of the cache file::
+
+        {
+          'version': 1,
+          'types': [[0, 'EV_SYN', 15, ['SYN_REPORT', ...]], ...],
+          'props': [[0, 'INPUT_PROP_POINTER'], ...],
+        }
+
+    Code names are None where libevdev has no name for the code. If
+    with_codes is False, the list of code names of each type is None.
+    """
+    tmax = Libevdev.event_to_value("EV_MAX")
+    assert tmax is not None
+
+    types = []
+    for t in range(tmax + 1):
+        tname = Libevdev.event_to_name(t)
+        if tname is None:
+            continue
+
+        cmax = Libevdev.type_max(t)
+        names = None
+        if with_codes:
+            names = [Libevdev.event_to_name(t, c)
+                     for c in range(cmax + 1 if cmax is not None else 0)]
+        types.append([t, tname, cmax, names])
+
+    pmax = Libevdev.property_to_value("INPUT_PROP_MAX")
+    assert pmax is not None
+
+    props = []
+    for p in range(pmax + 1):
+        pname = Libevdev.property_to_name(p)
+        if pname is None:
+            continue
+        props.append([p, pname])
+
+    return {'version': _CACHE_VERSION, 'types': types, 'props': props}
+
+
+def _read_cache(path):
+    """
+    Returns the constants stored in the cache file at path or None if the
+    file is missing, unreadable or in an unknown format.
+    """
     try:
-        return [p for p in libevdev.props if p.value == prop or p.name == prop][0]
-    except IndexError:
+        with open(path, 'rb') as f:
+            consts = marshal.loads(f.read())
+        if consts['version'] != _CACHE_VERSION:
+            return None
+        if not consts['types'] or not consts['props']:
+            return None
+        for t, tname, cmax, names in consts['types']:
+            if len(names) != (cmax + 1 if cmax is not None else 0):
+                return None
+        if any(len(p) != 2 for p in consts['props']):
+            return None
+    except (OSError, EOFError, ValueError, KeyError, TypeError):
         return None
 
+    return consts
+
+
+def _write_cache(path, consts):
+    """
+    Writes the constants to the cache file at path. The file is replaced
+    atomically so concurrent processes never see a partial file. Failure
+    to write the cache is silently ignored.
+    """
+    tmppath = '{}.{}.tmp'.format(path, os.getpid())
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmppath, 'wb') as f:
+            f.write(marshal.dumps(consts))
+        os.replace(tmppath, path)
+    except OSError:
+        try:
+            os.unlink(tmppath)
+        except OSError:
+            pass
+
+
+def _cache_writable(path):
+    """
+    :return: True if the cache file at path can be created
+    """
+    cachedir = os.path.dirname(path)
+    try:
+        os.makedirs(cachedir, exist_ok=True)
+    except OSError:
+        return False
+    return os.access(cachedir, os.W_OK)
+
 
 def _load_consts():
     """
@@ -315,64 +570,54 @@ def _load_consts():
     Special attributes are (an apply to all EV_foo enums):
         libevdev.EV_REL.type ... the EV_TYPES entry of the event type
         libevdev.EV_REL.max  ... the maximum code in this event type
+
+    The event types and properties are created immediately, the event
+    codes of each type are only created when first accessed, see
+    _load_codes().
     """
     Libevdev()  # classmethods, need to make sure it's loaded at once
 
-    tmax = Libevdev.event_to_value("EV_MAX")
-    assert tmax is not None
-
-    types = []
+    # All names come from the cache file if we have a valid one. Otherwise
+    # we query libevdev and write the cache for the next process, unless
+    # the cache is disabled or not writable - in that case the code names
+    # are left for _load_codes() to query as needed.
+    path = _cache_file()
+    consts = _read_cache(path) if path is not None else None
+    if consts is None:
+        with_codes = path is not None and _cache_writable(path)
+        consts = _query_consts(with_codes)
+        if with_codes:
+            _write_cache(path, consts)
 
-    for t in range(tmax + 1):
-        tname = Libevdev.event_to_name(t)
-        if tname is None:
-            continue
+    tmax = max(t for t, _, _, _ in consts['types'])
 
-        cmax = Libevdev.type_max(t)
+    types = []
+    _types_by_value[:] = [None] * (tmax + 1)
+    _types_by_name.clear()
 
+    for t, tname, cmax, names in consts['types']:
         new_class = type(tname, (EventType, ),
                          {'value': t,
                           'name': tname,
-                          'max': cmax})
+                          'max': cmax,
+                          '_code_names': names})
 
         type_object = new_class()
         # libevdev.EV_REL, libevdev.EV_ABS, etc.
         setattr(libevdev, tname, type_object)
         types.append(type_object)
-
-        if cmax is None:
-            setattr(type_object, 'codes', [])
-            continue
-
-        codes = []
-        for c in range(cmax + 1):
-            cname = Libevdev.event_to_name(t, c)
-            # For those without names, we just use the type name plus
-            # hexcode
-            if cname is None:
-                cname = "{}_{:02X}".format(tname[3:], c)
-
-            new_class = type(cname, (EventCode, ),
-                             {'type': type_object,
-                              'name': cname,
-                              'value': c})
-            code_object = new_class()
-            setattr(type_object, cname, code_object)
-            codes.append(code_object)
-
-        setattr(type_object, 'codes', codes)
+        _types_by_value[t] = type_object
+        _types_by_name[tname] = type_object
 
     # list of all types
     setattr(libevdev, 'types', types)
 
-    pmax = Libevdev.property_to_value("INPUT_PROP_MAX")
-    assert pmax is not None
-    props = []
-    for p in range(pmax + 1):
-        pname = Libevdev.property_to_name(p)
-        if pname is None:
-            continue
+    pmax = max(p for p, _ in consts['props'])
 
+    props = []
+    _props_by_value[:] = [None] * (pmax + 1)
+    _props_by_name.clear()
+    for p, pname in consts['props']:
         new_class = type(pname, (InputProperty, ),
                          {'value': p,
                           'name': pname})
@@ -380,6 +625,8 @@ def _load_consts():
 
         setattr(libevdev, pname, prop_object)
         props.append(prop_object)
+        _props_by_value[p] = prop_object
+        _props_by_name[pname] = prop_object
 
     setattr(libevdev, 'props', props)
 
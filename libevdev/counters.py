@@ -0,0 +1,284 @@
+# -*- coding: latin-1 -*-
+# Copyright © 2017 Red Hat, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice (including the next
+# paragraph) shall be included in all copies or substantial portions of the
+# Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import collections
+import ctypes
+import time
+
+from ._clib import Libevdev, UinputDevice, _LibraryWrapper
+from ._clib import READ_FLAG_SYNC, READ_FLAG_FORCE_SYNC, READ_STATUS_SYNC
+from .device import Device
+from .fake import FakeDevice
+from .event import _input_event_struct
+
+_counters = collections.defaultdict(collections.Counter)
+_hooks = []
+_originals = {}
+
+
+def _key(handle):
+    """
+    :returns: the address of a libevdev context or uinput device handle
+    """
+    if handle is None or isinstance(handle, int):
+        return handle
+    return ctypes.cast(handle, ctypes.c_void_p).value
+
+
+def _release(handle):
+    """
+    Drops the counters of a context or uinput device that was freed, so
+    a new one at the same address starts from zero and the counters do
+    not grow with every device. The counts stay in the process totals.
+    """
+    counts = _counters.pop(_key(handle), None)
+    if counts:
+        _counters[None].update(counts)
+
+
+def _count_next_event(counts, args, rc):
+    flags = args[1]
+    if rc < 0 or flags & READ_FLAG_FORCE_SYNC:
+        return
+    if flags & READ_FLAG_SYNC:
+        counts['sync_events'] += 1
+    else:
+        counts['events'] += 1
+        if rc == READ_STATUS_SYNC:
+            counts['syn_dropped'] += 1
+
+
+def _count_new(counts, args, rc):
+    # A context freed while the instrumentation was disabled may have left
+    # counters behind at this address
+    _release(rc)
+
+
+def _count_write_event(counts, args, rc):
+    counts['uinput_events'] += 1
+    counts['uinput_writes'] += 1
+
+
+_extra_counts = {
+    '_new': _count_new,
+    '_next_event': _count_next_event,
+    '_uinput_write_event': _count_write_event,
+}
+
+
+def _wrap_function(pyname, func, timing):
+    """
+    :returns: a counting replacement for the ctypes function func
+    """
+    name = 'calls.' + pyname.lstrip('_')
+    time_name = 'time.' + pyname.lstrip('_')
+    extra = _extra_counts.get(pyname)
+    # Only functions taking a context or uinput device are per device
+    keyed = bool(func.argtypes) and func.argtypes[0] is ctypes.c_void_p
+
+    def call(*args):
+        if timing:
+            start = time.perf_counter()
+            result = func(*args)
+            elapsed = time.perf_counter() - start
+        else:
+            result = func(*args)
+        counts = _counters[_key(args[0]) if keyed and args else None]
+        counts[name] += 1
+        if timing:
+            counts[time_name] += elapsed
+        if extra is not None:
+            extra(counts, args, result)
+        for hook in _hooks:
+            hook(pyname.lstrip('_'), args, result)
+        return result
+
+    return staticmethod(call)
+
+
+def _wrap_sync(sync):
+    def counting_sync(self, force=False):
+        _counters[self._libevdev._ctx]['syncs'] += 1
+        return sync(self, force)
+
+    counting_sync.__doc__ = sync.__doc__
+    return counting_sync
+
+
+def _wrap_fake_sync(sync):
+    # A FakeDevice syncs without libevdev_next_event(), count its events
+    # here instead
+    def counting_sync(self, force=False):
+        counts = _counters[self._libevdev._ctx]
+        counts['syncs'] += 1
+        events = list(sync(self, force))
+        counts['sync_events'] += len(events)
+        return iter(events)
+
+    counting_sync.__doc__ = sync.__doc__
+    return counting_sync
+
+
+def _wrap_write_events(write_events):
+    def counting_write_events(self, data):
+        counts = _counters[_key(self._uinput_device)]
+        counts['uinput_events'] += len(memoryview(data).cast('B')) // _input_event_struct.size
+        counts['uinput_writes'] += 1
+        return write_events(self, data)
+
+    counting_write_events.__doc__ = write_events.__doc__
+    return counting_write_events
+
+
+def _replace(cls, name, replacement):
+    _originals[(cls, name)] = cls.__dict__[name]
+    setattr(cls, name, replacement)
+
+
+def is_enabled():
+    """
+    :returns: True if the instrumentation is enabled
+    """
+    return bool(_originals)
+
+
+def enable(timing=False):
+    """
+    Enables call counting for the whole process. While disabled, the
+    bindings call the C library directly and the counters cost nothing.
+    Enabling swaps every foreign function of the libevdev wrappers, as well
+    as :meth:`Device.sync` and the batched uinput writes, for counting
+    versions and installs a hook dropping the counters of freed devices;
+    :func:`disable` puts the originals back::
+
+        import libevdev.counters
+
+        libevdev.counters.enable()
+        ...
+        print(libevdev.counters.snapshot())
+        print(libevdev.counters.snapshot(device))
+
+    Counters keep their values across :func:`disable` and :func:`enable`,
+    use :func:`reset` to clear them.
+
+    :param timing: if True, the time spent in each C function is
+                   accumulated as well, at the cost of two clock reads per
+                   call
+    """
+    if is_enabled():
+        disable()
+
+    for cls in (Libevdev, UinputDevice):
+        cls._load()
+        for name, attrs in cls._api_prototypes.items():
+            pyname = attrs.get('name', name[len('libevdev'):])
+            _replace(cls, pyname, _wrap_function(pyname, cls.__dict__[pyname], timing))
+
+    _replace(_LibraryWrapper, '_release', staticmethod(_release))
+    _replace(Device, 'sync', _wrap_sync(Device.__dict__['sync']))
+    _replace(FakeDevice, 'sync', _wrap_fake_sync(FakeDevice.__dict__['sync']))
+    _replace(UinputDevice, 'write_events',
+             _wrap_write_events(UinputDevice.__dict__['write_events']))
+
+
+def disable():
+    """
+    Disables the instrumentation, the bindings call the C library directly
+    again.
+    """
+    for (cls, name), original in _originals.items():
+        setattr(cls, name, original)
+    _originals.clear()
+
+
+def reset():
+    """
+    Resets all counters to zero.
+    """
+    _counters.clear()
+
+
+def snapshot(device=None):
+    """
+    Returns the current counter values as a flat dict, ready for periodic
+    export. The counters are kept per libevdev context and uinput device
+    until that is freed, after which they only count towards the totals:
+
+    ``calls.<function>``
+        the number of calls of each C function, named without the
+        ``libevdev_`` prefix, e.g. ``calls.next_event``
+    ``time.<function>``
+        the seconds spent in each C function, only if enabled with
+        ``timing=True``
+    ``events``
+        events returned by ``libevdev_next_event()`` outside of a sync
+    ``syn_dropped``
+        ``SYN_DROPPED`` events among those
+    ``syncs``
+        calls of :meth:`Device.sync`, including those of a
+        :class:`FakeDevice`
+    ``sync_events``
+        events returned while syncing
+    ``uinput_events``
+        events written to uinput devices
+    ``uinput_writes``
+        write calls to uinput devices, a batched write of many events is one
+
+    A :class:`FakeDevice` does not read its events through libevdev, so
+    only its syncs and sync events are counted, not its ``events``.
+
+    The returned dict is a copy and does not change with further calls.
+
+    :param device: a :class:`Device` to return the counters for, including
+                   those of its uinput device, or None for the totals of
+                   the process
+    :returns: a dict mapping counter names to their values
+    """
+    if device is None:
+        keys = list(_counters)
+    else:
+        keys = [device._libevdev._ctx]
+        if device._uinput is not None:
+            keys.append(_key(device._uinput._uinput_device))
+
+    total = collections.Counter()
+    for key in keys:
+        total.update(_counters.get(key, ()))
+    return dict(total)
+
+
+def add_hook(hook):
+    """
+    Adds a profiling hook, called after every call of a C function while
+    the instrumentation is enabled as ``hook(name, args, result)`` with
+    the function name without the ``libevdev_`` prefix, the arguments as
+    passed to ctypes and the return value. Hooks run in the calling thread
+    and must be fast, they run in the hot path.
+    """
+    _hooks.append(hook)
+
+
+def remove_hook(hook):
+    """
+    Removes a hook added with :func:`add_hook`.
+    """
+    _hooks.remove(hook)
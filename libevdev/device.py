@@ -20,14 +20,73 @@
 # FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
 # DEALINGS IN THE SOFTWARE.
 
+import collections
 import time
 import os
 
 import libevdev
-from ._clib import Libevdev, UinputDevice
+from ._clib import Libevdev
 from ._clib import READ_FLAG_SYNC, READ_FLAG_NORMAL, READ_FLAG_FORCE_SYNC, READ_FLAG_BLOCKING
-from .event import InputEvent
+from ._clib import _EVIOCSMASK_TYPES, _EV_MAX
+from .event import InputEvent, InputEventBuffer, Frame, _input_event_struct
+from .event import _typecode, _typecode_indices
 from .const import InputProperty
+from .capabilities import Bitmask, Capabilities, DeviceTemplate
+from .latency import LatencyHistogram
+
+
+# the EV_SYN/SYN_REPORT type and code as one word, see Device.frames()
+_SYN_REPORT = _typecode(0x00, 0x00)
+
+
+def _pack_events(events, sec=0, usec=0):
+    """
+    :param events: a list of :class:`InputEvent` events, an
+                   :class:`InputEventBuffer` or a bytes-like object
+    :param sec: the timestamp for events from the list
+    :param usec: the timestamp for events from the list
+    :returns: a bytes-like object with the packed events
+    :raises: InvalidArgumentException if an event has no code or value or
+             the bytes-like object is not a multiple of ``struct
+             input_event``
+    """
+    size = _input_event_struct.size
+
+    if isinstance(events, InputEventBuffer):
+        return events.raw
+    if isinstance(events, (bytes, bytearray, memoryview)):
+        data = memoryview(events).cast('B')
+        if len(data) % size != 0:
+            raise InvalidArgumentException()
+        return data
+
+    events = list(events)
+    data = bytearray(len(events) * size)
+    pack_into = _input_event_struct.pack_into
+    offset = 0
+    for e in events:
+        code = e.code
+        value = e.value
+        if code is None or value is None:
+            raise InvalidArgumentException()
+        pack_into(data, offset, sec, usec, code.type.value, code.value, value)
+        offset += size
+    return data
+
+
+def _is_masked(mask, t, c):
+    """
+    :param mask: an event mask as built by :func:`Device.set_event_mask`
+    :returns: True if the kernel filters events of that numerical type
+              and code. Only the types in ``_EVIOCSMASK_TYPES`` are ever
+              filtered, see :func:`Device._write_event_mask`.
+    """
+    if t not in _EVIOCSMASK_TYPES:
+        return False
+    if t not in mask:
+        return True
+    codes = mask[t]
+    return codes is not None and not codes >> c & 1
 
 
 class InvalidFileError(Exception):
@@ -106,6 +165,107 @@ class InputAbsInfo(object):
         self.value = value
 
 
+class DeviceInfo(collections.namedtuple('DeviceInfo',
+                                          ['name', 'phys', 'uniq',
+                                           'bustype', 'vendor', 'product',
+                                           'version', 'driver_version'])):
+    """
+    An immutable snapshot of a device's identifying metadata, see
+    :attr:`Device.info`.
+
+    :property name: the device name
+    :property phys: the device's kernel phys or None
+    :property uniq: the device's uniq string or None
+    :property bustype: the bus type of the device ID
+    :property vendor: the vendor of the device ID
+    :property product: the product of the device ID
+    :property version: the version of the device ID
+    :property driver_version: the device's driver version
+    """
+    __slots__ = ()
+
+    @property
+    def id(self):
+        """
+        :returns: A new dict with the keys 'bustype', 'vendor', 'product',
+                  'version', as returned by :attr:`Device.id`
+        """
+        return {'bustype': self.bustype, 'vendor': self.vendor,
+                'product': self.product, 'version': self.version}
+
+
+class SlotValues(object):
+    """
+    A snapshot of the ``ABS_MT_*`` values of all slots of a multitouch
+    device, see :func:`Device.slot_values`. The values are stored as a
+    compact 2-D array of 32-bit integers, one row per slot and one column
+    per code::
+
+            values = ctx.slot_values()
+            for slot in range(len(values)):
+                print(values[slot, libevdev.EV_ABS.ABS_MT_POSITION_X])
+
+            xy = values.numpy()  # shape (num_slots, len(values.codes))
+
+    Values may be assigned to and the snapshot then passed to
+    :func:`Device.set_slot_values`.
+
+    .. attribute:: codes
+
+        The list of :class:`EventCode` of the columns
+
+    .. attribute:: values
+
+        The values as flat ``array.array('i')``, in row-major order
+    """
+    __slots__ = ('codes', 'values', '_columns')
+
+    def __init__(self, codes, values):
+        self.codes = list(codes)
+        self.values = values
+        self._columns = {c.value: i for i, c in enumerate(self.codes)}
+
+    def __len__(self):
+        return len(self.values) // len(self.codes) if self.codes else 0
+
+    def _index(self, key):
+        slot, code = key
+        if not 0 <= slot < len(self):
+            raise IndexError(slot)
+        try:
+            column = self._columns[code.value]
+        except (AttributeError, KeyError):
+            raise KeyError(code)
+        return slot * len(self.codes) + column
+
+    def __getitem__(self, key):
+        """
+        :param key: a ``(slot, code)`` tuple or a slot number
+        :returns: the value of the code in the slot or, for a slot number,
+                  a dict of all codes and their values in that slot
+        """
+        if isinstance(key, tuple):
+            return self.values[self._index(key)]
+        return {c: self[key, c] for c in self.codes}
+
+    def __setitem__(self, key, value):
+        self.values[self._index(key)] = value
+
+    def numpy(self):
+        """
+        :returns: a NumPy int32 array of shape ``(slots, codes)`` viewing
+                  the values without copying
+        :raises: ImportError if NumPy is not available
+        """
+        import numpy
+        return numpy.frombuffer(self.values, dtype=numpy.int32).reshape(
+            len(self), len(self.codes))
+
+    def __repr__(self):
+        return 'SlotValues(slots={}, codes=[{}])'.format(
+            len(self), ', '.join(c.name for c in self.codes))
+
+
 class Device(object):
     """
     This class represents an evdev device backed by libevdev. The device may
@@ -137,51 +297,97 @@ class Device(object):
         self._libevdev = Libevdev(fd)
         self._uinput = None
         self._is_grabbed = False
+        self._event_mask = None
+        self._event_buffer = None
+        self._force_sync = False
+        self._async_reader = None
+        self._capabilities = None
+        self._capabilities_modified = False
+        self._info = None
+        self._frame_buffer = None
+        self._frame_slot = None
+        self._partial_frame = bytearray()
+        self._latency = None
         if fd is not None:
             try:
                 self._libevdev.set_clock_id(time.CLOCK_MONOTONIC)
             except AttributeError:
                 self._libevdev.set_clock_id(1)
 
+    @property
+    def info(self):
+        """
+        Returns a :class:`DeviceInfo` with the name, phys, uniq, id and
+        driver version of this device::
+
+            info = ctx.info
+            print(info.name, info.vendor, info.product)
+
+        The snapshot is cached, it is only re-read from libevdev after one
+        of the setters of this class or an assignment to :attr:`fd`, or
+        after :func:`refresh()`. :attr:`name`, :attr:`phys`, :attr:`uniq`,
+        :attr:`id` and :attr:`driver_version` are served from it.
+        """
+        info = self._info
+        if info is None:
+            l = self._libevdev
+            id = l.id
+            info = DeviceInfo(l.name, l.phys, l.uniq,
+                              id['bustype'], id['vendor'], id['product'],
+                              id['version'], l.driver_version)
+            self._info = info
+        return info
+
+    def refresh(self):
+        """
+        Discards the cached :attr:`info`, it is re-read from libevdev on the
+        next access. This is only needed if the underlying libevdev context
+        was changed by other means than this object.
+        """
+        self._info = None
+
     @property
     def name(self):
         """
         :returns: the device name
         """
-        return self._libevdev.name
+        return self.info.name
 
     @name.setter
     def name(self, name):
         self._libevdev.name = name
+        self._info = None
 
     @property
     def phys(self):
         """
         :returns: the device's kernel phys or None.
         """
-        return self._libevdev.phys
+        return self.info.phys
 
     @phys.setter
     def phys(self, phys):
         self._libevdev.phys = phys
+        self._info = None
 
     @property
     def uniq(self):
         """
         :returns: the device's uniq string or None
         """
-        return self._libevdev.uniq
+        return self.info.uniq
 
     @uniq.setter
     def uniq(self, uniq):
         self._libevdev.uniq = uniq
+        self._info = None
 
     @property
     def driver_version(self):
         """
         :returns: the device's driver version
         """
-        return self._libevdev.driver_version
+        return self.info.driver_version
 
     @property
     def id(self):
@@ -196,11 +402,12 @@ class Device(object):
                 ctx.id = id
 
         """
-        return self._libevdev.id
+        return self.info.id
 
     @id.setter
     def id(self, vals):
         self._libevdev.id = vals
+        self._info = None
 
     @property
     def fd(self):
@@ -236,12 +443,82 @@ class Device(object):
         if self._libevdev.fd is None:
             raise InvalidFileError()
         self._libevdev.fd = fileobj
+        self._info = None
         try:
             self._libevdev.set_clock_id(time.CLOCK_MONOTONIC)
         except AttributeError:
             self._libevdev.set_clock_id(1)
         if self._is_grabbed:
             self.grab()
+        if self._event_mask is not None:
+            self._write_event_mask(self._event_mask)
+
+    @property
+    def capabilities(self):
+        """
+        Returns a :class:`Capabilities` snapshot of the supported event
+        types, event codes and input properties::
+
+            caps = ctx.capabilities
+            if libevdev.EV_KEY.BTN_LEFT in caps.codes(libevdev.EV_KEY):
+                print("device has a left button")
+
+        For a device initialized from a file descriptor, the bits are read
+        from the kernel in bulk with the ``EVIOCGBIT`` and ``EVIOCGPROP``
+        ioctls. Otherwise, or once the device was modified with
+        :func:`enable()` or :func:`disable()`, libevdev is queried for each
+        bit. The snapshot is cached and kept up to date when the device is
+        modified, so repeated access is cheap.
+        """
+        if self._capabilities is None:
+            kernel = self.fd is not None and not self._capabilities_modified
+            try:
+                self._capabilities = self._read_capabilities(kernel)
+            except OSError:
+                self._capabilities = self._read_capabilities(False)
+        return self._capabilities
+
+    def _read_capabilities(self, kernel):
+        types = {}
+        tbits = self._libevdev.type_bits(kernel)
+        for t in range(tbits.bit_length()):
+            if tbits >> t & 1:
+                types[t] = self._libevdev.code_bits(t, kernel)
+        props = self._libevdev.property_bits(kernel)
+        return Capabilities(types, props)
+
+    def _update_capabilities(self, event_code):
+        """
+        Updates the cached capabilities after event_code was enabled or
+        disabled. Enabling a type restores the codes libevdev still has for
+        it, so those are re-read, for codes only the type and code bit can
+        change.
+        """
+        caps = self._capabilities
+        if caps is None:
+            self._capabilities_modified = True
+            return
+
+        if isinstance(event_code, InputProperty):
+            present = self._libevdev.has_property(event_code.value)
+            self._capabilities = caps._with_property(event_code.value, present)
+            return
+
+        if isinstance(event_code, libevdev.EventCode):
+            t = event_code.type.value
+        else:
+            t = event_code.value
+            event_code = None
+
+        if not self._libevdev.has_event(t):
+            codes = None
+        elif event_code is None or t not in caps.types:
+            codes = self._libevdev.code_bits(t)
+        else:
+            codes = caps.codes(t) | (1 << event_code.value)
+            if not self._libevdev.has_event(t, event_code.value):
+                codes ^= 1 << event_code.value
+        self._capabilities = caps._with_type(t, codes)
 
     @property
     def evbits(self):
@@ -253,27 +530,19 @@ class Device(object):
               libevdev.EV_ABS: [libevdev.EV_ABS.ABS_X, ...],
               libevdev.EV_KEY: [libevdev.EV_KEY.BTN_LEFT, ...],
             }
-        """
-        types = {}
-        for t in libevdev.types:
-            if not self.has_event(t):
-                continue
 
-            codes = []
-            for c in t.codes:
-                if not self.has_event(c):
-                    continue
-                codes.append(c)
-            types[t] = codes
-
-        return types
+        This is derived from :attr:`capabilities`.
+        """
+        return self.capabilities.evbits
 
     @property
     def properties(self):
         """
         Returns a list of all supported input properties
+
+        This is derived from :attr:`capabilities`.
         """
-        return [p for p in libevdev.props if self.has_property(p)]
+        return [libevdev.propbit(p) for p in self.capabilities.properties]
 
     def has_property(self, prop):
         """
@@ -391,11 +660,397 @@ class Device(object):
         ev = self._libevdev.next_event(flags)
         while ev is not None:
             code = libevdev.evbit(ev.type, ev.code)
-            yield InputEvent(code, ev.value, ev.sec, ev.usec)
+            if self._latency is not None and ev.type == 0x00 and ev.code == 0x00:
+                self._latency.record((time.monotonic() - ev.sec) * 1000000 - ev.usec)
+            yield InputEvent._new(code, ev.value, ev.sec, ev.usec)
             if code == libevdev.EV_SYN.SYN_DROPPED:
                 raise EventsDroppedException()
             ev = self._libevdev.next_event(flags)
 
+    def frames(self, max_events=64):
+        """
+        Returns an iterable with the currently pending frames, i.e. the
+        events up to and including each ``EV_SYN.SYN_REPORT``, as
+        :class:`Frame` objects::
+
+            fd = open("/dev/input/event0", "rb")
+            ctx = libevdev.Device(fd)
+
+            while True:
+                for frame in ctx.frames():
+                    if libevdev.EV_KEY.BTN_LEFT in frame.codes:
+                        print("button change at", frame.sec, frame.usec)
+
+        Events are read in batches of up to max_events with
+        :func:`read_events` and split into frames without converting them
+        into :class:`InputEvent` objects. Events after the last
+        ``SYN_REPORT`` are kept until the next call completes their frame.
+
+        A ``SYN_DROPPED`` is handled internally: the events of the frame
+        that was interrupted are discarded, :func:`sync` is called and its
+        events are returned as one frame with ``synced`` set.
+        :class:`EventsDroppedException` is never raised.
+
+        As with :func:`events`, this function blocks on a blocking file
+        descriptor and returns once no more events are pending on a
+        non-blocking one. Mixing this function with other ways to read
+        events from the same device splits frames.
+
+        :param max_events: the maximum number of events read at once
+        :returns: an iterable with the currently pending frames
+        """
+        if not self._can_read():
+            return
+
+        buffer = self._frame_buffer
+        if buffer is None or buffer.capacity < max_events:
+            buffer = InputEventBuffer(max_events)
+            if self._frame_buffer is None:
+                self._frame_slot = self.current_slot
+            self._frame_buffer = buffer
+
+        size = _input_event_struct.size
+        has_slots = self.num_slots is not None
+        partial = self._partial_frame
+
+        while True:
+            self.read_events(max_events, buffer)
+            count = len(buffer)
+            if count == 0:
+                return
+
+            if buffer.dropped:
+                count -= 1
+            raw = buffer.raw[:count * size]
+
+            start = 0
+            for end in _typecode_indices(raw, _SYN_REPORT):
+                data = raw[start * size:(end + 1) * size]
+                if partial:
+                    partial += data
+                    data = bytes(partial)
+                    del partial[:]
+                else:
+                    data = data.tobytes()
+                frame = Frame(data, self._frame_slot)
+                if has_slots:
+                    self._frame_slot = frame._end_slot()
+                start = end + 1
+                yield frame
+
+            if not buffer.dropped:
+                partial += raw[start * size:]
+                continue
+
+            del partial[:]
+            data = bytearray()
+            for e in self.sync():
+                data += _input_event_struct.pack(e.sec, e.usec, e.type.value,
+                                                 e.code.value, e.value)
+            if data:
+                frame = Frame(bytes(data), self._frame_slot, synced=True)
+                self._frame_slot = self.current_slot
+                yield frame
+
+    def read_events(self, max_events=64, buffer=None):
+        """
+        Reads up to max_events currently pending events in one go. The
+        events are stored in their packed C form in an
+        :class:`InputEventBuffer`, avoiding the per-event allocations of
+        :func:`events`::
+
+            fd = open("/dev/input/event0", "rb")
+            ctx = libevdev.Device(fd)
+
+            while True:
+                buf = ctx.read_events()
+                for e in buf:
+                    print(e)
+                if buf.dropped:
+                    for e in ctx.sync():
+                        print(e)
+
+        If no buffer is given, the device's own buffer is used and
+        returned. That buffer is reused by the next call to this function,
+        a caller that needs to keep the events must copy them or pass in
+        its own buffer.
+
+        As with :func:`events`, a blocking file descriptor blocks until at
+        least one event is available, a non-blocking file descriptor
+        returns an empty buffer if no events are available.
+
+        The buffer ends after a ``SYN_DROPPED`` event and its ``dropped``
+        attribute is set, the caller should then call :func:`sync`.
+
+        :param max_events: the maximum number of events to read, if a
+                           buffer is given this is capped to its capacity
+        :param buffer: an :class:`InputEventBuffer` to fill or None
+        :returns: the :class:`InputEventBuffer` with the events read
+        """
+        buffer = self._buffer(max_events, buffer)
+        if self._libevdev.fd is None:
+            buffer._filled(0)
+            return buffer
+
+        if os.get_blocking(self._libevdev.fd.fileno()):
+            flags = READ_FLAG_BLOCKING
+        else:
+            flags = READ_FLAG_NORMAL
+
+        buffer._filled(0)
+        count = self._libevdev.next_events(flags, buffer._pointers[:max_events])
+        buffer._filled(count)
+        if self._latency is not None:
+            self._record_latency(buffer)
+        return buffer
+
+    def read_raw_events(self, max_events=64, buffer=None):
+        """
+        Reads up to max_events pending events directly from the file
+        descriptor into an :class:`InputEventBuffer`, bypassing libevdev.
+        This is the fastest way to get at the events, one ``read()`` fills
+        the whole buffer and no per-event processing is done::
+
+            fd = open("/dev/input/event0", "rb")
+            ctx = libevdev.Device(fd)
+
+            while True:
+                buf = ctx.read_raw_events()
+                recorder.write(buf.raw)
+                if buf.dropped:
+                    for e in ctx.sync():
+                        recorder.write_event(e)
+
+        libevdev does not see the events read this way, so its view of the
+        device state (e.g. :func:`event_value`, :func:`slot_value`) goes
+        stale. The next call to :func:`sync` always forces a full sync to
+        bring libevdev (and the caller) back to the current device state.
+        A caller switching back to :func:`events` or :func:`read_events`
+        should call :func:`sync` first.
+
+        If the buffer contains a ``SYN_DROPPED`` event anywhere, its
+        ``dropped`` attribute is set. Unlike :func:`read_events`, events
+        after the ``SYN_DROPPED`` are left in the buffer.
+
+        For use with NumPy, the buffer can be converted without copying::
+
+            events = buf.numpy()
+            print(events['value'][events['type'] == libevdev.EV_ABS.value])
+
+        :param max_events: the maximum number of events to read, if a
+                           buffer is given this is capped to its capacity
+        :param buffer: an :class:`InputEventBuffer` to fill or None
+        :returns: the :class:`InputEventBuffer` with the events read
+        """
+        buffer = self._buffer(max_events, buffer)
+        if self._libevdev.fd is None:
+            buffer._filled(0)
+            return buffer
+
+        buffer._readinto(self._libevdev.fd.fileno(), max_events)
+        self._force_sync = True
+        if self._latency is not None:
+            self._record_latency(buffer)
+        return buffer
+
+    @property
+    def latency(self):
+        """
+        The :class:`LatencyHistogram` of this device if latency tracking
+        is enabled with :func:`track_latency`, otherwise None.
+        """
+        return self._latency
+
+    def track_latency(self, enable=True, precision=7):
+        """
+        Enables or disables latency tracking. While enabled, every
+        ``SYN_REPORT`` read through :func:`events`, :func:`frames`,
+        :func:`read_events` or :func:`read_raw_events` records the time
+        between the kernel timestamp of the frame and the moment it was
+        handed to the caller, in microseconds::
+
+            ctx.track_latency()
+            for frame in ctx.frames():
+                handle(frame)
+            h = ctx.latency
+            print(h.percentile(50), h.percentile(99), h.max)
+
+        For :func:`events`, the time is taken when the ``SYN_REPORT`` is
+        yielded and thus includes the time the caller spent on the
+        preceding events. For the batch functions it is taken once the
+        batch was read, so the latency covers the time the events spent
+        queued in the kernel and in libevdev but not the caller's
+        processing.
+
+        The kernel timestamps use ``CLOCK_MONOTONIC``, so this is only
+        meaningful for devices initialized from a file. While disabled,
+        reading events costs one attribute check.
+
+        :param enable: True to start tracking with an empty histogram,
+                       False to stop tracking and discard the histogram
+        :param precision: see :class:`LatencyHistogram`
+        :returns: the new histogram or None
+        """
+        self._latency = LatencyHistogram(precision) if enable else None
+        return self._latency
+
+    def _record_latency(self, buffer):
+        """
+        Records the latency of each ``SYN_REPORT`` in the buffer.
+        """
+        count = len(buffer)
+        if count == 0:
+            return
+        now = time.monotonic()
+        raw = buffer.raw
+        unpack = _input_event_struct.unpack_from
+        size = _input_event_struct.size
+        record = self._latency.record
+        for index in _typecode_indices(raw, _SYN_REPORT):
+            sec, usec = unpack(raw, index * size)[:2]
+            record((now - sec) * 1000000 - usec)
+
+    async def async_events(self, max_events=64, max_batches=16):
+        """
+        An asynchronous iterator over the events of this device, for use
+        within an :mod:`asyncio` event loop::
+
+            fd = open("/dev/input/event0", "rb")
+            ctx = libevdev.Device(fd)
+
+            async def process():
+                while True:
+                    try:
+                        async for e in ctx.async_events():
+                            print(e)
+                    except EventsDroppedException:
+                        for e in await ctx.async_sync():
+                            print(e)
+
+        The device's file descriptor is registered with the running loop
+        and whenever it is readable, up to max_events pending events are
+        read in one batch (see :func:`read_events`). Batches are queued
+        until the caller consumes them. Once max_batches batches are
+        queued, the device is no longer read until the caller catches up,
+        events then queue up in the kernel instead. If the kernel buffer
+        overflows, the caller gets a ``SYN_DROPPED``.
+
+        As with :func:`events`, a ``SYN_DROPPED`` event is passed on and
+        then :class:`EventsDroppedException` is raised. The caller should
+        call :func:`async_sync` and then iterate over this function again.
+
+        This function never blocks the loop, whether the file descriptor
+        is in blocking mode or not. Only one iterator per device may be
+        active at any time, a new one takes over the file descriptor from
+        the previous one.
+
+        :param max_events: the maximum number of events read in one batch
+        :param max_batches: the maximum number of batches queued
+        """
+        if self._libevdev.fd is None:
+            return
+
+        # asyncio is slow to import and only needed here
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        fileno = self._libevdev.fd.fileno()
+        queue = asyncio.Queue(max_batches)
+        reading = False
+        dropped = False
+
+        def read_batch():
+            nonlocal dropped
+            if dropped or queue.full():
+                stop_reading()
+                return
+
+            buf = self._read_pending(max_events)
+            if len(buf) > 0:
+                queue.put_nowait(list(buf))
+            if buf.dropped:
+                dropped = True
+
+            if dropped or queue.full():
+                stop_reading()
+            elif self._libevdev.has_event_pending():
+                # libevdev may have events queued internally that won't
+                # make the fd readable again
+                loop.call_soon(read_batch)
+
+        def start_reading():
+            nonlocal reading
+            if not reading and not dropped:
+                loop.add_reader(fileno, read_batch)
+                self._async_reader = read_batch
+                reading = True
+                loop.call_soon(read_batch)
+
+        def stop_reading():
+            nonlocal reading
+            if reading:
+                # An abandoned iterator is only closed when garbage
+                # collected, by then a new one may own the fd
+                if self._async_reader is read_batch:
+                    loop.remove_reader(fileno)
+                    self._async_reader = None
+                reading = False
+
+        start_reading()
+        try:
+            while True:
+                batch = await queue.get()
+                start_reading()
+                for e in batch:
+                    yield e
+                    if e.matches(libevdev.EV_SYN.SYN_DROPPED):
+                        raise EventsDroppedException()
+        finally:
+            stop_reading()
+
+    async def async_sync(self, force=False):
+        """
+        The :mod:`asyncio` version of :func:`sync`. The sync events are
+        generated from libevdev's state and the device's current state,
+        this does not wait for the file descriptor.
+
+        :param force: see :func:`sync`
+        :returns: a list of the events needed to re-sync the caller's view
+                  of the device
+        """
+        return list(self.sync(force))
+
+    def _can_read(self):
+        """
+        :returns: True if events can be read from this device
+        """
+        return self._libevdev.fd is not None
+
+    def _read_pending(self, max_events):
+        """
+        Like :func:`read_events` but never blocks, even on a blocking file
+        descriptor.
+        """
+        if (os.get_blocking(self._libevdev.fd.fileno()) and
+                not self._libevdev.has_event_pending()):
+            buffer = self._buffer(max_events, None)
+            buffer._filled(0)
+            return buffer
+
+        return self.read_events(max_events)
+
+    def _buffer(self, max_events, buffer):
+        """
+        Returns buffer or, if that is None, this device's own buffer for at
+        least max_events.
+        """
+        if buffer is None:
+            buffer = self._event_buffer
+            if buffer is None or buffer.capacity < max_events:
+                buffer = InputEventBuffer(max_events)
+                self._event_buffer = buffer
+        return buffer
+
     def sync(self, force=False):
         """
         Returns an iterator with events pending to re-sync the caller's
@@ -404,20 +1059,32 @@ class Device(object):
         :param force: if set, the device forces an internal sync. This is
             required after changing the fd of the device when the device state
             may have changed while libevdev was not processing events.
+            A sync is always forced after :func:`read_raw_events`.
         """
         if self._libevdev.fd is None:
             return []
 
-        if force:
-            flags = READ_FLAG_FORCE_SYNC
-        else:
-            flags = READ_FLAG_SYNC
+        if force or self._force_sync:
+            # This only marks the device as needing a sync, the sync events
+            # are then read with READ_FLAG_SYNC like after a SYN_DROPPED
+            self._libevdev.next_event(READ_FLAG_FORCE_SYNC)
+            self._force_sync = False
 
-        ev = self._libevdev.next_event(flags)
+        mask = self._event_mask
+        empty = True
+        ev = self._libevdev.next_event(READ_FLAG_SYNC)
         while ev is not None:
+            if mask is not None:
+                # libevdev syncs all codes, drop those the kernel filters
+                # and the frames left empty by that
+                report = ev.type == 0x00 and ev.code == 0x00
+                if _is_masked(mask, ev.type, ev.code) or (report and empty):
+                    ev = self._libevdev.next_event(READ_FLAG_SYNC)
+                    continue
+                empty = report
             code = libevdev.evbit(ev.type, ev.code)
-            yield InputEvent(code, ev.value, ev.sec, ev.usec)
-            ev = self._libevdev.next_event(flags)
+            yield InputEvent._new(code, ev.value, ev.sec, ev.usec)
+            ev = self._libevdev.next_event(READ_FLAG_SYNC)
 
     def event_value(self, event_code, new_value=None):
         """
@@ -434,6 +1101,72 @@ class Device(object):
         """
         return self._libevdev.event_value(event_code.type.value, event_code.value, new_value)
 
+    def key_state(self, kernel=False):
+        """
+        Returns the state of all EV_KEY codes at once, this is much faster
+        than calling :func:`event_value()` for every key::
+
+            pressed = ctx.key_state()
+            if libevdev.EV_KEY.KEY_LEFTCTRL in pressed:
+                print("Ctrl is down")
+
+            for c in pressed:
+                print(libevdev.evbit(libevdev.EV_KEY.value, c))
+
+        By default, the state is the one libevdev tracks from the events
+        read so far, e.g. after :func:`sync()`. If kernel is True, the
+        current state is read from the kernel with the ``EVIOCGKEY`` ioctl
+        instead, the libevdev state is not updated.
+
+        :param kernel: read the state from the kernel instead of libevdev
+        :returns: a :class:`Bitmask` with the bits of all keys that are
+                  down set
+        :raises: InvalidFileError if kernel is True and this device has no
+                 file descriptor, OSError if the ioctl fails
+        """
+        return self._state(libevdev.EV_KEY, kernel)
+
+    def led_state(self, kernel=False):
+        """
+        Returns the state of all EV_LED codes at once, see
+        :func:`key_state()`. The kernel state is read with ``EVIOCGLED``.
+
+        :returns: a :class:`Bitmask` with the bits of all LEDs that are on
+                  set
+        """
+        return self._state(libevdev.EV_LED, kernel)
+
+    def sound_state(self, kernel=False):
+        """
+        Returns the state of all EV_SND codes at once, see
+        :func:`key_state()`.
+
+        libevdev does not track EV_SND values, so if this device has a file
+        descriptor the state is always read from the kernel with
+        ``EVIOCGSND``, regardless of kernel. Without a file descriptor,
+        the state is always empty.
+
+        :returns: a :class:`Bitmask` with the bits of all sounds that are on
+                  set
+        """
+        return self._state(libevdev.EV_SND, kernel or self.fd is not None)
+
+    def switch_state(self, kernel=False):
+        """
+        Returns the state of all EV_SW codes at once, see
+        :func:`key_state()`. The kernel state is read with ``EVIOCGSW``.
+
+        :returns: a :class:`Bitmask` with the bits of all switches that are
+                  on set
+        """
+        return self._state(libevdev.EV_SW, kernel)
+
+    def _state(self, evtype, kernel):
+        if kernel and self.fd is None:
+            raise InvalidFileError()
+        codes = self.capabilities.codes(evtype)
+        return Bitmask(self._libevdev.state_bits(evtype.value, codes, kernel))
+
     def slot_value(self, slot, event_code, new_value=None):
         """
         Retrieve the current value of the given event code for the given
@@ -456,6 +1189,104 @@ class Device(object):
 
         return self._libevdev.slot_value(slot, event_code.value, new_value)
 
+    def slot_values(self, codes=None, kernel=False):
+        """
+        Retrieve the current values of the given event codes for all slots
+        at once, this is much faster than calling :func:`slot_value()` for
+        every slot and code::
+
+            values = ctx.slot_values()
+            x = values[0, libevdev.EV_ABS.ABS_MT_POSITION_X]
+
+        If kernel is True, the values are read from the kernel with the
+        ``EVIOCGMTSLOTS`` ioctl, one per code, instead of the state libevdev
+        tracks from the events read so far.
+
+        :param codes: a list of ``libevdev.EV_ABS.ABS_MT_*`` event codes, or
+                      None for all ``ABS_MT_*`` codes of this device
+        :param kernel: read the values from the kernel instead of libevdev
+        :returns: a :class:`SlotValues` for all slots of this device
+        :raises: InvalidArgumentException if the device does not support
+                 slots or a code is not a valid slot event code,
+                 InvalidFileError if kernel is True and this device has no
+                 file descriptor
+        """
+        num_slots = self.num_slots
+        if num_slots is None:
+            raise InvalidArgumentException()
+
+        codes = self._slot_codes(codes)
+        if kernel and self.fd is None:
+            raise InvalidFileError()
+
+        values = self._libevdev.slot_values([c.value for c in codes],
+                                            num_slots, kernel)
+        return SlotValues(codes, values)
+
+    def set_slot_values(self, values):
+        """
+        Sets the values of all slots at once from a :class:`SlotValues`,
+        usually one previously returned by :func:`slot_values()` and
+        modified::
+
+            values = ctx.slot_values()
+            values[1, libevdev.EV_ABS.ABS_MT_TRACKING_ID] = 5
+            ctx.set_slot_values(values)
+
+        On a uinput device, the values that changed are also sent through
+        the device as a single frame, terminated by a
+        ``libevdev.EV_SYN.SYN_REPORT`` event. On other devices, only the
+        values libevdev tracks are changed.
+
+        :param values: the new slot values
+        :type values: SlotValues
+        :raises: InvalidArgumentException if the device does not support
+                 slots, the number of slots differs or a code is not a
+                 valid slot event code
+        """
+        if self.num_slots is None or self.num_slots != len(values):
+            raise InvalidArgumentException()
+
+        codes = self._slot_codes(values.codes)
+        numeric_codes = [c.value for c in codes]
+
+        events = []
+        if self._uinput:
+            old = self._libevdev.slot_values(numeric_codes, len(values))
+            ncodes = len(codes)
+            for slot in range(len(values)):
+                changed = [InputEvent(codes[i], values.values[slot * ncodes + i])
+                           for i in range(ncodes)
+                           if values.values[slot * ncodes + i] != old[slot * ncodes + i]]
+                if changed:
+                    events.append(InputEvent(libevdev.EV_ABS.ABS_MT_SLOT, slot))
+                    events += changed
+
+        self._libevdev.set_slot_values(numeric_codes, values.values)
+
+        if events:
+            events.append(InputEvent(libevdev.EV_SYN.SYN_REPORT, 0))
+            self.send_events(events)
+
+    def _slot_codes(self, codes):
+        """
+        :returns: the given codes as list, or all ``ABS_MT_*`` codes of this
+                  device if codes is None
+        :raises: InvalidArgumentException for codes that are not slot codes
+        """
+        slot = libevdev.EV_ABS.ABS_MT_SLOT.value
+        if codes is None:
+            abs_codes = libevdev.EV_ABS.codes
+            return [abs_codes[c]
+                    for c in self.capabilities.codes(libevdev.EV_ABS)
+                    if c > slot]
+
+        codes = list(codes)
+        for c in codes:
+            if c.type != libevdev.EV_ABS or c.value <= slot:
+                raise InvalidArgumentException()
+        return codes
+
     def enable(self, event_code, data=None):
         """
         Enable an event type or event code on this device, even if not
@@ -487,6 +1318,7 @@ class Device(object):
         """
         if isinstance(event_code, InputProperty):
             self._libevdev.enable_property(event_code.value)
+            self._update_capabilities(event_code)
             return
 
         try:
@@ -508,6 +1340,7 @@ class Device(object):
             self._libevdev.enable(event_code.type.value, event_code.value, data)
         except AttributeError:
             self._libevdev.enable(event_code.value)
+        self._update_capabilities(event_code)
 
     def disable(self, event_code):
         """
@@ -533,6 +1366,7 @@ class Device(object):
             self._libevdev.disable(event_code.type.value, event_code.value)
         except AttributeError:
             self._libevdev.disable(event_code.value)
+        self._update_capabilities(event_code)
 
     @property
     def devnode(self):
@@ -578,28 +1412,14 @@ class Device(object):
             d.create_uinput_device()
             # d is now a device with a single button
 
+        The device is created through a :class:`DeviceTemplate` captured from
+        this device. To create many identical devices, capture the template
+        once and use :func:`DeviceTemplate.create_uinput_device` instead.
+
         :param uinput_fd: A file descriptor to the /dev/input/uinput device. If None, the device is opened and closed automatically.
         :raises: OSError
         """
-        d = libevdev.Device()
-        d.name = self.name
-        d.id = self.id
-
-        for t, cs in self.evbits.items():
-            for c in cs:
-                if t == libevdev.EV_ABS:
-                    data = self.absinfo(c)
-                elif t == libevdev.EV_REP:
-                    data = self.event_value(c)
-                else:
-                    data = None
-                d.enable(c, data)
-
-        for p in self.properties:
-            self.enable(p)
-
-        d._uinput = UinputDevice(self._libevdev, uinput_fd)
-        return d
+        return DeviceTemplate.from_device(self).create_uinput_device(uinput_fd)
 
     def send_events(self, events):
         """
@@ -616,20 +1436,100 @@ class Device(object):
             ``libevdev.EV_SYN.SYN_REPORT`` event or the kernel may delay
             processing.
 
-        :param events: a list of :class:`InputEvent` events
+        The events are packed into one buffer and written to the uinput
+        device with a single ``write()``. Where the events are already
+        available in packed form, e.g. from :func:`read_raw_events` or a
+        recording, they can be passed in directly as
+        :class:`InputEventBuffer` or as a bytes-like object of ``struct
+        input_event``, skipping the packing step::
+
+            buf = source.read_raw_events()
+            uidev.send_events(buf)
+
+        :param events: a list of :class:`InputEvent` events, an
+                       :class:`InputEventBuffer` or a bytes-like object
+        :raises: InvalidArgumentException if an event has no code or value
+                 or the bytes-like object is not a multiple of ``struct
+                 input_event``
         """
 
         if not self._uinput:
             raise InvalidFileError()
 
-        if None in [e.code for e in events]:
-            raise InvalidArgumentException()
+        self._uinput.write_events(_pack_events(events))
 
-        if None in [e.value for e in events]:
-            raise InvalidArgumentException()
+    def set_event_mask(self, codes):
+        """
+        Tells the kernel to only pass on the given event types and codes
+        to this device's file descriptor, using the ``EVIOCSMASK``
+        ioctl::
+
+            fd = open("/dev/input/event0", "rb")
+            ctx = libevdev.Device(fd)
+            ctx.set_event_mask([libevdev.EV_SW.SW_LID,
+                                libevdev.EV_KEY.KEY_POWER])
+            for e in ctx.events():
+                print(e)  # only SW_LID, KEY_POWER and EV_SYN events
+
+        An :class:`EventType` passes on all codes of that type, an
+        :class:`EventCode` only that code. ``EV_SYN`` events are always
+        passed on but the kernel drops frames that end up empty, so a
+        process waiting for the masked events is not woken up for others.
+        Event types the kernel cannot mask by code, e.g. ``EV_REP``, are
+        always passed on as well. The mask replaces any previous mask,
+        None passes on all events again. The mask is re-applied when the
+        fd changes.
+
+        Masked events never reach libevdev either, so its state (e.g.
+        :func:`event_value`) for masked codes is only updated by
+        :func:`sync`, which leaves the masked codes out of the events it
+        returns. After allowing codes that were masked, call :func:`sync`
+        with ``force=True`` and then query their current state with e.g.
+        :func:`event_value` or :func:`key_state`.
+
+        :param codes: an iterable of :class:`EventType` and
+                      :class:`EventCode`, or None
+        :raises: InvalidFileError if this device has no file descriptor,
+                 OSError if the ioctl fails, e.g. on kernels before 4.4
+        """
+        if codes is None:
+            mask = None
+        else:
+            mask = {}
+            for c in codes:
+                if isinstance(c, libevdev.EventType):
+                    mask[c.value] = None
+                elif mask.get(c.type.value, 0) is not None:
+                    mask[c.type.value] = mask.get(c.type.value, 0) | (1 << c.value)
 
-        for e in events:
-            self._uinput.write_event(e.type.value, e.code.value, e.value)
+        self._write_event_mask(mask)
+        self._event_mask = mask
+
+    def _write_event_mask(self, mask):
+        """
+        Issues the ioctls for a mask as built by :func:`set_event_mask`,
+        a dict of the numerical types mapped to their code bits or None
+        for all codes. Types not in ``_EVIOCSMASK_TYPES`` (including
+        EV_SYN) are always enabled in the type mask.
+        """
+        if self.fd is None:
+            raise InvalidFileError()
+
+        l = self._libevdev
+        if mask is None:
+            types = (1 << (_EV_MAX + 1)) - 1
+        else:
+            types = sum(1 << t for t in mask)
+            types |= ((1 << (_EV_MAX + 1)) - 1) & ~sum(1 << t for t in _EVIOCSMASK_TYPES)
+        for t in _EVIOCSMASK_TYPES:
+            if mask is None or mask.get(t, 0) is None:
+                codes = (1 << (l.type_max(t) + 1)) - 1
+            else:
+                codes = mask.get(t, 0)
+            l.set_event_mask(t, codes)
+        # The type mask goes last, so no unwanted codes slip through while
+        # the code masks are changed
+        l.set_event_mask(0x00, types)
 
     def grab(self):
         """
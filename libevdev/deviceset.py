@@ -0,0 +1,242 @@
+# -*- coding: latin-1 -*-
+# Copyright © 2017 Red Hat, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice (including the next
+# paragraph) shall be included in all copies or substantial portions of the
+# Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import errno
+import selectors
+import time
+
+from .device import InvalidFileError
+
+
+class DeviceSet(object):
+    """
+    A set of :class:`Device` objects whose events are read together. All
+    devices are waited on with a single ``epoll`` (or whatever
+    :class:`selectors.DefaultSelector` is on this system)::
+
+            devices = libevdev.DeviceSet()
+            for path in ["/dev/input/event0", "/dev/input/event1"]:
+                fd = open(path, "rb")
+                devices.add(libevdev.Device(fd))
+
+            for device, events in devices.events():
+                for e in events:
+                    print(device.name, e)
+
+    Devices are drained fairly: in each round, every device with pending
+    events gets one batch of up to max_events events, the device that goes
+    first rotates from round to round. A busy device thus cannot starve the
+    others, its remaining events are picked up in the next round.
+
+    If a device reports a ``SYN_DROPPED``, :func:`Device.sync()
+    <libevdev.Device.sync>` is called immediately and the sync events are
+    appended to that device's batch, after the ``SYN_DROPPED`` event.
+    :class:`EventsDroppedException <libevdev.EventsDroppedException>` is
+    never raised.
+
+    A device that disappears (i.e. reading fails with ``ENODEV``) is
+    removed from the set.
+
+    The file descriptors may be blocking or non-blocking, this class never
+    blocks on a device's file descriptor.
+
+    :param devices: an iterable of :class:`Device` objects
+    :param max_events: the maximum number of events read from one device
+                       in one round
+    """
+
+    def __init__(self, devices=(), max_events=64):
+        self._selector = selectors.DefaultSelector()
+        self._devices = []
+        self._max_events = max_events
+        self._first = 0
+        # devices that may have events queued in libevdev that won't
+        # make the fd readable again
+        self._pending = set()
+
+        for d in devices:
+            self.add(d)
+
+    def __len__(self):
+        return len(self._devices)
+
+    def __contains__(self, device):
+        return device in self._devices
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @property
+    def devices(self):
+        """
+        :returns: a list of all devices in this set
+        """
+        return list(self._devices)
+
+    def add(self, device):
+        """
+        Adds a device to this set. Adding a device twice does nothing.
+
+        :param device: the device to add
+        :type device: Device
+        :raises: InvalidFileError if the device does not have a file
+                 descriptor
+        """
+        if device in self._devices:
+            return
+
+        if device.fd is None:
+            raise InvalidFileError()
+
+        self._selector.register(device.fd.fileno(), selectors.EVENT_READ, device)
+        self._devices.append(device)
+        # libevdev may have events queued already
+        self._pending.add(device)
+
+    def remove(self, device):
+        """
+        Removes a device from this set. Removing a device that is not in
+        this set does nothing.
+
+        :param device: the device to remove
+        :type device: Device
+        """
+        if device not in self._devices:
+            return
+
+        for key in self._selector.get_map().values():
+            if key.data is device:
+                self._selector.unregister(key.fileobj)
+                break
+        self._devices.remove(device)
+        self._pending.discard(device)
+
+    def close(self):
+        """
+        Removes all devices and releases the ``epoll`` file descriptor. The
+        devices themselves are not closed.
+        """
+        self._selector.close()
+        self._devices = []
+        self._pending.clear()
+
+    def poll(self, timeout=None):
+        """
+        Waits for events on any device in this set and reads one batch of
+        events from each device that has events.
+
+        :param timeout: the timeout in seconds, None waits forever, 0 does
+                        not wait at all
+        :returns: a list of ``(device, events)`` tuples, where events is a
+                  list of :class:`InputEvent`. The list is empty if the
+                  timeout expired.
+        """
+        if not self._devices:
+            return []
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            # Devices with events left from the last batch are read
+            # without waiting. If they turn out to have nothing left, we
+            # wait for the rest of the caller's timeout.
+            if self._pending:
+                wait = 0
+            elif deadline is None:
+                wait = None
+            else:
+                wait = max(0, deadline - time.monotonic())
+
+            ready = set(self._pending)
+            ready.update(key.data for key, mask in self._selector.select(wait))
+
+            batches = self._read_ready(ready)
+            if batches or not self._devices:
+                return batches
+            if deadline is not None and time.monotonic() >= deadline and wait == 0:
+                return batches
+
+    def _read_ready(self, ready):
+        """
+        Reads one batch from each of the ready devices, starting with a
+        different device each time so no device starves the others.
+
+        :returns: a list of ``(device, events)`` tuples
+        """
+        n = len(self._devices)
+        first = self._first % n
+        self._first = first + 1
+        order = self._devices[first:] + self._devices[:first]
+
+        batches = []
+        for device in order:
+            if device not in ready:
+                continue
+
+            events = self._read(device)
+            if events:
+                batches.append((device, events))
+
+        return batches
+
+    def events(self, timeout=None):
+        """
+        Returns an iterator over the ``(device, events)`` batches of all
+        devices in this set, see :func:`poll`. If a timeout is given, the
+        iterator ends once the timeout expires without any events.
+
+        :param timeout: the timeout in seconds or None to wait forever
+        """
+        while True:
+            batches = self.poll(timeout)
+            if not batches and timeout is not None:
+                return
+
+            for batch in batches:
+                yield batch
+
+    def _read(self, device):
+        """
+        Reads one batch from the device and handles SYN_DROPPED and
+        removed devices.
+        """
+        try:
+            buf = device._read_pending(self._max_events)
+        except OSError as e:
+            if e.errno != errno.ENODEV:
+                raise
+            self.remove(device)
+            return []
+
+        events = list(buf)
+        if len(buf) >= self._max_events:
+            self._pending.add(device)
+        else:
+            self._pending.discard(device)
+
+        if buf.dropped:
+            events.extend(device.sync())
+            self._pending.add(device)
+
+        return events
@@ -20,7 +20,65 @@
 # FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
 # DEALINGS IN THE SOFTWARE.
 
-from .const import EventType, EventCode
+import ctypes
+import os
+import struct
+
+from ._clib import _InputEvent
+from .const import EventType, EventCode, evbit
+
+
+# struct input_event, for packing and unpacking events from/to bytes
+_input_event_struct = struct.Struct('@llHHi')
+assert _input_event_struct.size == ctypes.sizeof(_InputEvent)
+
+_object_new = object.__new__
+
+
+def _typecode(t, c):
+    """
+    :returns: the type and code of an event as the 32-bit word they form
+              in ``struct input_event``
+    """
+    return struct.unpack('=I', struct.pack('=HH', t, c))[0]
+
+
+def _typecodes(data):
+    """
+    :param data: a bytes-like object of packed ``struct input_event``
+    :returns: the type/code words of all events in data, as bytes
+    """
+    stride = _input_event_struct.size // 4
+    words = memoryview(data).cast('B').cast('I')
+    return words[_InputEvent.type.offset // 4::stride].tobytes()
+
+
+def _word_indices(typecodes, typecode):
+    """
+    :param typecodes: the type/code words as returned by :func:`_typecodes`
+    :param typecode: a word as returned by :func:`_typecode`
+    :returns: the indices of all events with that type and code
+    """
+    needle = struct.pack('=I', typecode)
+
+    indices = []
+    pos = typecodes.find(needle)
+    while pos != -1:
+        if pos % 4 == 0:
+            indices.append(pos // 4)
+            pos = typecodes.find(needle, pos + 4)
+        else:
+            pos = typecodes.find(needle, pos + 1)
+    return indices
+
+
+def _typecode_indices(data, typecode):
+    """
+    :param data: a bytes-like object of packed ``struct input_event``
+    :param typecode: a word as returned by :func:`_typecode`
+    :returns: the indices of all events in data with that type and code
+    """
+    return _word_indices(_typecodes(data), typecode)
 
 
 class InputEvent(object):
@@ -63,6 +121,8 @@ class InputEvent(object):
         The timestamp, microseconds
     """
 
+    __slots__ = ('_type', '_code', 'value', 'sec', 'usec')
+
     def __init__(self, code, value=None, sec=0, usec=0):
         assert isinstance(code, EventCode) or isinstance(code, EventType)
 
@@ -76,6 +136,20 @@ class InputEvent(object):
         self.usec = usec
         self.value = value
 
+    @classmethod
+    def _new(cls, code, value, sec, usec):
+        """
+        Creates an event without any argument checking, for events read
+        from a device. code must be an :class:`EventCode`.
+        """
+        ev = _object_new(cls)
+        ev._type = code.type
+        ev._code = code
+        ev.value = value
+        ev.sec = sec
+        ev.usec = usec
+        return ev
+
     @property
     def code(self):
         """
@@ -139,3 +213,271 @@ class InputEvent(object):
         if self.code is not None:
             cname = self.code.name
         return 'InputEvent({}, {}, {})'.format(tname, cname, self.value)
+
+
+class InputEventBuffer(object):
+    """
+    A preallocated, reusable buffer of ``struct input_event`` as defined in
+    ``linux/input.h``. This buffer is filled by
+    :func:`Device.read_events() <libevdev.Device.read_events>`,
+    the events are kept in their packed C form until accessed::
+
+        >>> buf = InputEventBuffer(64)
+        >>> buf.capacity
+        64
+        >>> len(buf)
+        0
+
+    Iterating over the buffer or indexing it returns :class:`InputEvent`
+    objects, :func:`tuples` returns plain ``(sec, usec, type, code,
+    value)`` tuples and :attr:`raw` gives access to the packed events
+    without any conversion.
+
+    .. attribute:: dropped
+
+        True if the last event in this buffer is a ``SYN_DROPPED`` event,
+        see :class:`EventsDroppedException
+        <libevdev.EventsDroppedException>`.
+
+    :param capacity: the maximum number of events in this buffer
+    """
+
+    _struct = _input_event_struct
+
+    dtype = [('sec', 'l'), ('usec', 'l'), ('type', 'H'), ('code', 'H'), ('value', 'i')]
+    """
+    The NumPy-compatible description of ``struct input_event``, e.g.
+    ``numpy.frombuffer(buf.raw, dtype=InputEventBuffer.dtype)``
+    """
+
+    # type and code read together as one 32-bit word, the word index of the
+    # first event and the number of words per event
+    _typecode_index = _InputEvent.type.offset // 4
+    _typecode_stride = ctypes.sizeof(_InputEvent) // 4
+    _syn_dropped = struct.unpack('=I', struct.pack('=HH', 0x00, 0x03))[0]  # EV_SYN, SYN_DROPPED
+
+    def __init__(self, capacity=64):
+        self._events = (_InputEvent * capacity)()
+        self._pointers = [ctypes.pointer(e) for e in self._events]
+        self._count = 0
+        self.dropped = False
+
+    @property
+    def capacity(self):
+        """
+        :returns: the maximum number of events in this buffer
+        """
+        return len(self._events)
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def raw(self):
+        """
+        :returns: a read-only ``memoryview`` of the bytes of all events
+                  currently in the buffer. This view is only valid until the
+                  buffer is filled again.
+        """
+        view = memoryview(self._events).cast('B')
+        return view[:self._count * self._struct.size].toreadonly()
+
+    def tuples(self):
+        """
+        :returns: an iterator of ``(sec, usec, type, code, value)`` tuples,
+                  one per event in the buffer, with all values as integers
+        """
+        return self._struct.iter_unpack(self.raw)
+
+    def numpy(self):
+        """
+        :returns: a NumPy structured array of :attr:`dtype` viewing the
+                  events in the buffer without copying. The array is only
+                  valid until the buffer is filled again.
+        :raises: ImportError if NumPy is not available
+        """
+        import numpy
+        return numpy.frombuffer(self.raw, dtype=self.dtype)
+
+    def __iter__(self):
+        new = InputEvent._new
+        for sec, usec, t, c, value in self.tuples():
+            yield new(evbit(t, c), value, sec, usec)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+
+        ev = self._events[index]
+        return InputEvent._new(evbit(ev.type, ev.code), ev.value, ev.sec, ev.usec)
+
+    def _filled(self, count):
+        """
+        Updates the buffer after the first count events have been written
+        into it.
+        """
+        self._count = count
+        self.dropped = False
+        if count > 0:
+            last = self._events[count - 1]
+            self.dropped = last.type == 0x00 and last.code == 0x03  # EV_SYN, SYN_DROPPED
+
+    def _readinto(self, fileno, max_events):
+        """
+        Fills the buffer with up to max_events events read directly from
+        the file descriptor. A non-blocking fd without events results in an
+        empty buffer.
+        """
+        size = self._struct.size
+        view = memoryview(self._events).cast('B')[:min(max_events, self.capacity) * size]
+        try:
+            nbytes = os.readv(fileno, [view])
+        except BlockingIOError:
+            nbytes = 0
+
+        self._count = nbytes // size
+        # Search the type/code words of all events for SYN_DROPPED, this
+        # way the buffer is never converted into Python objects
+        words = memoryview(self._events).cast('B').cast('I')
+        typecodes = words[self._typecode_index:self._count * self._typecode_stride:self._typecode_stride]
+        self.dropped = self._syn_dropped in typecodes
+
+    def __repr__(self):
+        return 'InputEventBuffer({}/{})'.format(self._count, self.capacity)
+
+
+class Frame(object):
+    """
+    One frame of events as returned by :func:`Device.frames()
+    <libevdev.Device.frames>`, i.e. all events up to and including an
+    ``EV_SYN.SYN_REPORT``. The events are stored packed in one contiguous
+    buffer and only converted when accessed::
+
+        for frame in ctx.frames():
+            print(frame.sec, frame.usec, frame.codes, frame.slots)
+            for e in frame:
+                print(e)
+
+    Iterating over the frame returns :class:`InputEvent` objects,
+    :func:`tuples` returns plain ``(sec, usec, type, code, value)`` tuples
+    and :attr:`raw` gives access to the packed events.
+
+    .. attribute:: synced
+
+        True if this frame holds the events of a :func:`Device.sync()
+        <libevdev.Device.sync>` after a ``SYN_DROPPED``. Events received
+        before the drop that did not form a complete frame are discarded,
+        this frame brings the caller's state up to date instead.
+    """
+    __slots__ = ('_data', '_slot', 'synced')
+
+    _struct = _input_event_struct
+
+    _mt_slot = 0x2f  # ABS_MT_SLOT
+
+    def __init__(self, data, slot=None, synced=False):
+        """
+        :param data: the packed events, the last one is the
+                     ``SYN_REPORT``
+        :param slot: the device's current slot before this frame or None
+        :param synced: True for the events from a sync
+        """
+        self._data = data
+        self._slot = slot
+        self.synced = synced
+
+    def __len__(self):
+        return len(self._data) // self._struct.size
+
+    @property
+    def raw(self):
+        """
+        :returns: a read-only ``memoryview`` of the bytes of all events in
+                  this frame
+        """
+        return memoryview(self._data).toreadonly()
+
+    def tuples(self):
+        """
+        :returns: an iterator of ``(sec, usec, type, code, value)`` tuples
+                  for all events in this frame
+        """
+        return self._struct.iter_unpack(self._data)
+
+    def numpy(self):
+        """
+        :returns: a NumPy structured array of
+                  :attr:`InputEventBuffer.dtype` viewing the events in this
+                  frame without copying
+        :raises: ImportError if NumPy is not available
+        """
+        import numpy
+        return numpy.frombuffer(self._data, dtype=InputEventBuffer.dtype)
+
+    def __iter__(self):
+        new = InputEvent._new
+        for sec, usec, t, c, value in self.tuples():
+            yield new(evbit(t, c), value, sec, usec)
+
+    @property
+    def sec(self):
+        """
+        The seconds of the timestamp of the frame's ``SYN_REPORT``
+        """
+        return self._struct.unpack_from(self._data, len(self._data) - self._struct.size)[0]
+
+    @property
+    def usec(self):
+        """
+        The microseconds of the timestamp of the frame's ``SYN_REPORT``
+        """
+        return self._struct.unpack_from(self._data, len(self._data) - self._struct.size)[1]
+
+    @property
+    def codes(self):
+        """
+        A list of the :class:`EventCode` of every event code in this frame,
+        in the order they first appear, excluding ``EV_SYN`` codes.
+        """
+        seen = set()
+        codes = []
+        for _, _, t, c, _ in self.tuples():
+            if t != 0x00 and (t, c) not in seen:  # EV_SYN
+                seen.add((t, c))
+                codes.append(evbit(t, c))
+        return codes
+
+    @property
+    def slots(self):
+        """
+        A sorted list of the multitouch slots with ``ABS_MT_*`` events in
+        this frame. Always empty for devices without slots.
+        """
+        slot = self._slot
+        slots = set()
+        for _, _, t, c, value in self.tuples():
+            if t != 0x03:  # EV_ABS
+                continue
+            if c == self._mt_slot:
+                slot = value
+            elif c > self._mt_slot and slot is not None:
+                slots.add(slot)
+        return sorted(slots)
+
+    def _end_slot(self):
+        """
+        :returns: the device's current slot after this frame
+        """
+        indices = _typecode_indices(self._data, _typecode(0x03, self._mt_slot))
+        if not indices:
+            return self._slot
+        return self._struct.unpack_from(self._data, indices[-1] * self._struct.size)[4]
+
+    def __repr__(self):
+        return 'Frame({} events, {}.{:06d}{})'.format(
+            len(self), self.sec, self.usec, ', synced' if self.synced else '')
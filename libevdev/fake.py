@@ -0,0 +1,397 @@
+# -*- coding: latin-1 -*-
+# Copyright © 2017 Red Hat, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice (including the next
+# paragraph) shall be included in all copies or substantial portions of the
+# Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import time
+
+import libevdev
+from .device import Device, InvalidArgumentException, _pack_events, _is_masked
+from .capabilities import Bitmask, DeviceTemplate
+from .event import InputEvent, InputEventBuffer, _input_event_struct
+
+_EV_SYN = 0x00
+_EV_KEY = 0x01
+_EV_ABS = 0x03
+_EV_SW = 0x05
+_EV_LED = 0x11
+_SYN_REPORT = 0x00
+_SYN_DROPPED = 0x03
+_ABS_MT_SLOT = 0x2f
+_ABS_MT_TRACKING_ID = 0x39
+_ABS_MT_MAX = 0x3d
+
+# The order libevdev syncs the event types in
+_SYNC_ORDER = {_EV_KEY: 0, _EV_LED: 1, _EV_SW: 2, _EV_ABS: 3}
+_STATEFUL_TYPES = sum(1 << t for t in _SYNC_ORDER)
+
+
+def _timestamp():
+    now = time.monotonic()
+    return int(now), int(now % 1 * 1000000)
+
+
+class FakeDevice(Device):
+    """
+    A :class:`Device` whose events come from an in-memory queue instead of
+    the kernel, for testing and benchmarking event consumers without
+    ``/dev/uinput`` or root privileges. Events sent with
+    :func:`send_events` are queued and returned by :func:`events`,
+    :func:`frames`, :func:`read_events` and :func:`read_raw_events` of the
+    same device::
+
+            template = libevdev.DeviceTemplate.from_device(ctx)
+            fake = libevdev.FakeDevice.from_template(template)
+            fake.send_events([InputEvent(libevdev.EV_REL.REL_X, 1),
+                              InputEvent(libevdev.EV_SYN.SYN_REPORT, 0)])
+            for e in fake.events():
+                print(e)
+
+    The capabilities, absinfo and the state of keys, LEDs, switches, axes
+    and slots behave as on a device read through libevdev: the state
+    returned by e.g. :func:`event_value`, :func:`key_state` and
+    :func:`slot_values` follows the events read so far, the state with
+    ``kernel=True`` follows the events sent so far.
+
+    The queue mimics the kernel's per-client buffer. Once more than
+    buffer_size events are queued, the queued events are discarded and a
+    ``SYN_DROPPED`` is queued in their place. :func:`drop` forces this.
+    After a ``SYN_DROPPED``, :func:`sync` discards the queue and returns
+    the events that bring the read state up to the sent state, as
+    libevdev does for a real device.
+
+    Unlike the kernel, the fake device does not filter events that do not
+    change the state and it never blocks, reading from an empty queue
+    returns no events. A list of :class:`InputEvent` is timestamped when
+    it is sent, packed events keep their timestamps. A mask set with
+    :func:`set_event_mask` filters the events as they are sent. The fake
+    device has no file descriptor and cannot be used with
+    :class:`DeviceSet` or :func:`async_events`.
+
+    :param buffer_size: the number of events the queue holds before
+                        events are dropped, or None for no limit
+    """
+
+    def __init__(self, buffer_size=1024):
+        super(FakeDevice, self).__init__()
+        if buffer_size is not None and buffer_size < 2:
+            raise InvalidArgumentException('buffer_size must be at least 2')
+        self._buffer_size = buffer_size
+        self._queue = bytearray()
+        self._needs_sync = False
+        self._frame_empty = True
+        # The state after all events sent, i.e. what the kernel would
+        # report. Only values that were ever sent are stored, all others
+        # are the same in libevdev's state.
+        self._kernel_state = {}
+        self._kernel_slots = {}
+        self._kernel_slot = None
+        # libevdev cannot set its current slot, the slot of the events
+        # read so far is tracked here instead
+        self._slot = None
+
+    @classmethod
+    def from_template(cls, template, buffer_size=1024):
+        """
+        :param template: the device to mimic
+        :type template: DeviceTemplate or Device
+        :param buffer_size: see :class:`FakeDevice`
+        :returns: a new :class:`FakeDevice` with the name, phys, uniq, id,
+                  event codes, absinfo and properties of the template
+        """
+        if isinstance(template, Device):
+            template = DeviceTemplate.from_device(template)
+        return template._apply(cls(buffer_size))
+
+    @property
+    def current_slot(self):
+        """
+        :returns: the current slot on this device or ``None`` if this device
+                  does not support slots
+
+        :note: Read-only
+        """
+        if self.num_slots is None:
+            return None
+        if self._slot is None:
+            self._slot = self._libevdev.current_slot
+        return self._slot
+
+    @property
+    def pending(self):
+        """
+        :returns: the number of events queued and not read yet
+        """
+        return len(self._queue) // _input_event_struct.size
+
+    def send_events(self, events):
+        """
+        Queues events to be read from this device, see
+        :func:`Device.send_events`.
+
+        :param events: a list of :class:`InputEvent` events, an
+                       :class:`InputEventBuffer` or a bytes-like object
+        :raises: InvalidArgumentException if an event has no code or value
+                 or the bytes-like object is not a multiple of ``struct
+                 input_event``
+        """
+        sec, usec = _timestamp()
+        data = _pack_events(events, sec, usec)
+        if self.capabilities.types & _STATEFUL_TYPES:
+            self._update_kernel_state(data)
+
+        if self._event_mask is not None:
+            data = self._filter(data)
+
+        size = _input_event_struct.size
+        queue = self._queue
+        view = memoryview(data).cast('B')
+        while self._buffer_size is not None:
+            free = self._buffer_size - len(queue) // size
+            if len(view) // size <= free:
+                break
+            # The kernel keeps a SYN_DROPPED with the timestamp of the
+            # event that did not fit, followed by that event
+            sec, usec = _input_event_struct.unpack_from(view, free * size)[:2]
+            queue[:] = _input_event_struct.pack(sec, usec, _EV_SYN, _SYN_DROPPED, 0)
+            queue += view[free * size:(free + 1) * size]
+            view = view[(free + 1) * size:]
+        queue += view
+
+    def _filter(self, data):
+        """
+        :returns: the events of data that pass the event mask, without
+                  the frames left empty
+        """
+        mask = self._event_mask
+        empty = self._frame_empty
+        pack = _input_event_struct.pack
+        filtered = bytearray()
+        for sec, usec, t, c, v in _input_event_struct.iter_unpack(data):
+            report = t == _EV_SYN and c == _SYN_REPORT
+            if _is_masked(mask, t, c) or (report and empty):
+                continue
+            empty = report
+            filtered += pack(sec, usec, t, c, v)
+        self._frame_empty = empty
+        return filtered
+
+    def _write_event_mask(self, mask):
+        # The mask is applied in send_events(), like the kernel does
+        pass
+
+    def drop(self):
+        """
+        Simulates an overflow of the kernel buffer: all queued events are
+        discarded and replaced by a ``SYN_DROPPED``.
+        """
+        sec, usec = _timestamp()
+        self._queue[:] = _input_event_struct.pack(sec, usec, _EV_SYN, _SYN_DROPPED, 0)
+
+    def _update_kernel_state(self, data):
+        state = self._kernel_state
+        slots = self._kernel_slots
+        has_slots = self.num_slots is not None
+        slot = self._kernel_slot
+        if has_slots and slot is None:
+            slot = self.current_slot
+        for _, _, t, c, v in _input_event_struct.iter_unpack(data):
+            if t == _EV_ABS:
+                if has_slots and _ABS_MT_SLOT <= c <= _ABS_MT_MAX:
+                    if c == _ABS_MT_SLOT:
+                        slot = v
+                    else:
+                        slots[slot, c] = v
+                else:
+                    state[t, c] = v
+            elif t == _EV_KEY or t == _EV_SW or t == _EV_LED:
+                state[t, c] = 1 if v else 0
+        self._kernel_slot = slot
+
+    def _update_state(self, data):
+        """
+        Updates libevdev's state with the events read.
+        """
+        l = self._libevdev
+        ctx = l._ctx
+        set_event_value = l._set_event_value
+        set_slot_value = l._set_slot_value
+        has_slots = self.num_slots is not None
+        slot = self.current_slot
+        for _, _, t, c, v in _input_event_struct.iter_unpack(data):
+            if t == _EV_ABS:
+                if has_slots and _ABS_MT_SLOT <= c <= _ABS_MT_MAX:
+                    if c == _ABS_MT_SLOT:
+                        slot = v
+                    else:
+                        set_slot_value(ctx, slot, c, v)
+                else:
+                    set_event_value(ctx, t, c, v)
+            elif t == _EV_KEY or t == _EV_SW or t == _EV_LED:
+                set_event_value(ctx, t, c, v)
+        self._slot = slot
+
+    def _can_read(self):
+        return True
+
+    def read_events(self, max_events=64, buffer=None):
+        """
+        Moves up to max_events queued events into the buffer, see
+        :func:`Device.read_events`. This function never blocks.
+        """
+        buffer = self._buffer(max_events, buffer)
+        max_events = min(max_events, buffer.capacity)
+        if self._needs_sync:
+            # libevdev silently syncs if the caller did not ask for the
+            # sync events
+            self._sync_events()
+
+        size = _input_event_struct.size
+        queue = self._queue
+        count = min(max_events, len(queue) // size)
+        if count > 0 and _input_event_struct.unpack_from(queue)[2:4] == (_EV_SYN, _SYN_DROPPED):
+            # SYN_DROPPED is always first in the queue and ends the batch
+            count = 1
+            self._needs_sync = True
+
+        nbytes = count * size
+        memoryview(buffer._events).cast('B')[:nbytes] = queue[:nbytes]
+        del queue[:nbytes]
+        buffer._filled(count)
+        if count > 0:
+            if self.capabilities.types & _STATEFUL_TYPES and not self._needs_sync:
+                self._update_state(buffer.raw)
+            if self._latency is not None:
+                self._record_latency(buffer)
+        return buffer
+
+    read_raw_events = read_events
+
+    def events(self):
+        """
+        Returns an iterable with the queued events, see
+        :func:`Device.events`. This function never blocks.
+        """
+        buffer = InputEventBuffer(64)
+        while True:
+            self.read_events(buffer.capacity, buffer)
+            if len(buffer) == 0:
+                return
+            for e in buffer:
+                yield e
+            if buffer.dropped:
+                raise libevdev.EventsDroppedException()
+
+    def sync(self, force=False):
+        """
+        Returns an iterator with the events that bring the caller's view of
+        the device up to date after a ``SYN_DROPPED``, see
+        :func:`Device.sync`. All events still queued are discarded.
+
+        :param force: sync even if there was no ``SYN_DROPPED``
+        """
+        if not (force or self._needs_sync):
+            return iter([])
+        return iter(self._sync_events())
+
+    def _sync_events(self):
+        """
+        Discards the queue and updates libevdev's state to the kernel
+        state.
+
+        :returns: a list of the events for the changes
+        """
+        del self._queue[:]
+        self._needs_sync = False
+
+        l = self._libevdev
+        ctx = l._ctx
+        changes = []
+        for (t, c), v in sorted(self._kernel_state.items(),
+                                key=lambda item: (_SYNC_ORDER[item[0][0]], item[0][1])):
+            if l._get_event_value(ctx, t, c) != v:
+                l._set_event_value(ctx, t, c, v)
+                changes.append((t, c, v))
+
+        terminated = []
+        num_slots = self.num_slots
+        if num_slots is not None:
+            slot_changes = []
+            slot = self.current_slot
+            for (s, c), v in sorted(self._kernel_slots.items()):
+                if s >= num_slots:
+                    continue
+                old = l._get_slot_value(ctx, s, c)
+                if old == v:
+                    continue
+                if s != slot:
+                    slot_changes.append((_EV_ABS, _ABS_MT_SLOT, s))
+                    slot = s
+                if c == _ABS_MT_TRACKING_ID and old != -1 and v != -1:
+                    # A different touch in the same slot, end the old
+                    # one first
+                    terminated += [(_EV_ABS, _ABS_MT_SLOT, s),
+                                   (_EV_ABS, _ABS_MT_TRACKING_ID, -1)]
+                l._set_slot_value(ctx, s, c, v)
+                slot_changes.append((_EV_ABS, c, v))
+            kernel_slot = self._kernel_slot if self._kernel_slot is not None else slot
+            if kernel_slot != slot:
+                slot_changes.append((_EV_ABS, _ABS_MT_SLOT, kernel_slot))
+            self._slot = kernel_slot
+            changes += slot_changes
+
+        mask = self._event_mask
+        if mask is not None:
+            terminated = [e for e in terminated if not _is_masked(mask, e[0], e[1])]
+            changes = [e for e in changes if not _is_masked(mask, e[0], e[1])]
+
+        if terminated:
+            terminated.append((_EV_SYN, _SYN_REPORT, 0))
+        if changes:
+            changes.append((_EV_SYN, _SYN_REPORT, 0))
+
+        sec, usec = _timestamp()
+        evbit = libevdev.evbit
+        return [InputEvent._new(evbit(t, c), v, sec, usec) for t, c, v in terminated + changes]
+
+    def _state(self, evtype, kernel):
+        bits = Bitmask(self._libevdev.state_bits(evtype.value, self.capabilities.codes(evtype)))
+        if kernel:
+            t = evtype.value
+            for (stype, c), v in self._kernel_state.items():
+                if stype == t:
+                    bits |= 1 << c
+                    if not v:
+                        bits ^= 1 << c
+        return bits
+
+    def slot_values(self, codes=None, kernel=False):
+        """
+        See :func:`Device.slot_values`.
+        """
+        values = super(FakeDevice, self).slot_values(codes)
+        if kernel:
+            for (s, c), v in self._kernel_slots.items():
+                if s < len(values):
+                    try:
+                        values[s, libevdev.EV_ABS.codes[c]] = v
+                    except KeyError:
+                        pass
+        return values
@@ -0,0 +1,179 @@
+# -*- coding: latin-1 -*-
+# Copyright © 2017 Red Hat, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice (including the next
+# paragraph) shall be included in all copies or substantial portions of the
+# Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+
+class LatencyHistogram(object):
+    """
+    A streaming histogram of latencies in microseconds, using the bucket
+    layout of an HDR histogram: values below ``2**precision`` are counted
+    exactly, larger values in buckets whose width is below
+    ``2**-(precision - 1)`` of their value. With the default precision, any
+    percentile is reported within 1.6% of the recorded value, the number of
+    buckets grows only with the logarithm of the largest value and
+    recording a value is a constant-time operation::
+
+            >>> h = LatencyHistogram()
+            >>> for v in (120, 250, 90, 4000):
+            ...     h.record(v)
+            >>> h.count, h.min, h.max
+            (4, 90, 4000)
+            >>> h.percentile(50)
+            120
+
+    .. attribute:: count
+
+        The number of values recorded
+
+    .. attribute:: total
+
+        The sum of all values recorded
+
+    .. attribute:: min
+
+        The smallest value recorded or None
+
+    .. attribute:: max
+
+        The largest value recorded or None
+    """
+    __slots__ = ('_precision', '_half', '_counts', 'count', 'total', 'min', 'max')
+
+    def __init__(self, precision=7):
+        """
+        :param precision: the number of significant bits kept per value
+        """
+        if precision < 1:
+            raise ValueError('precision must be at least 1')
+        self._precision = precision
+        self._half = 1 << (precision - 1)
+        self.reset()
+
+    def reset(self):
+        """
+        Discards all recorded values.
+        """
+        self._counts = [0] * (2 * self._half)
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def _index(self, value):
+        shift = value.bit_length() - self._precision
+        if shift <= 0:
+            return value
+        return shift * self._half + (value >> shift)
+
+    def _bounds(self, index):
+        """
+        :returns: the smallest and largest value counted in that bucket
+        """
+        if index < 2 * self._half:
+            return index, index
+        shift = index // self._half - 1
+        low = (index - shift * self._half) << shift
+        return low, low + (1 << shift) - 1
+
+    def record(self, value):
+        """
+        Records one latency, negative values are recorded as 0.
+
+        :param value: the latency in microseconds
+        """
+        value = max(0, int(value))
+        index = self._index(value)
+        counts = self._counts
+        if index >= len(counts):
+            counts.extend([0] * (index + 1 - len(counts)))
+        counts[index] += 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        """
+        Adds all values recorded in other to this histogram. Both
+        histograms must have the same precision.
+        """
+        if other._precision != self._precision:
+            raise ValueError('Histograms differ in precision')
+        counts = self._counts
+        if len(other._counts) > len(counts):
+            counts.extend([0] * (len(other._counts) - len(counts)))
+        for index, n in enumerate(other._counts):
+            counts[index] += n
+        self.count += other.count
+        self.total += other.total
+        for value in (other.min, other.max):
+            if value is not None:
+                self.min = value if self.min is None else min(self.min, value)
+                self.max = value if self.max is None else max(self.max, value)
+
+    @property
+    def mean(self):
+        """
+        :returns: the mean of all values or None if nothing was recorded
+        """
+        if self.count == 0:
+            return None
+        return self.total / self.count
+
+    def percentile(self, percent):
+        """
+        :param percent: the percentile between 0 and 100
+        :returns: the value below or at which the given percentage of
+                  values lies, or None if nothing was recorded. The result
+                  is the upper bound of the value's bucket, capped by
+                  :attr:`max`.
+        """
+        if self.count == 0:
+            return None
+        if not 0 <= percent <= 100:
+            raise ValueError('percent must be between 0 and 100')
+
+        rank = max(1, -(-self.count * percent // 100))
+        seen = 0
+        for index, n in enumerate(self._counts):
+            seen += n
+            if seen >= rank:
+                return min(self._bounds(index)[1], self.max)
+        return self.max
+
+    def buckets(self):
+        """
+        :returns: an iterable of ``(low, high, count)`` tuples for the
+                  non-empty buckets, low and high are the smallest and
+                  largest value in that bucket
+        """
+        for index, n in enumerate(self._counts):
+            if n:
+                low, high = self._bounds(index)
+                yield low, high, n
+
+    def __repr__(self):
+        if self.count == 0:
+            return '<LatencyHistogram empty>'
+        return '<LatencyHistogram count {} min {}us p50 {}us p99 {}us max {}us>'.format(
+            self.count, self.min, self.percentile(50), self.percentile(99), self.max)
@@ -0,0 +1,212 @@
+# -*- coding: latin-1 -*-
+# Copyright © 2017 Red Hat, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice (including the next
+# paragraph) shall be included in all copies or substantial portions of the
+# Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import collections
+import contextlib
+import threading
+import time
+
+import libevdev
+from .device import Device, InvalidArgumentException
+from .capabilities import DeviceTemplate
+from .event import InputEvent
+
+
+class UinputPool(object):
+    """
+    A pool of identical uinput devices, for test suites that would
+    otherwise create and destroy a uinput device per test::
+
+            template = libevdev.Device()
+            template.name = "test keyboard"
+            template.enable(libevdev.EV_KEY.KEY_A)
+
+            pool = libevdev.UinputPool(template, size=4, idle_timeout=30)
+
+            with pool.device() as uinput:
+                with open(uinput.devnode, "rb") as fd:
+                    ...
+
+    All devices are created from the same :class:`DeviceTemplate`,
+    captured once if a :class:`Device` is given as template. A
+    device handed out by :func:`acquire` belongs to the caller until
+    it is given back with :func:`release`. On release, all keys and
+    buttons still down are released and all multitouch slots still in use
+    are terminated, so the next user sees a device in its neutral state.
+
+    Devices that are idle for longer than idle_timeout seconds are
+    destroyed whenever the pool is used or :func:`reap` is called, the
+    pool then shrinks back until new devices are needed. The pool is safe
+    to use from multiple threads.
+
+    :param template: the device to create the uinput devices from
+    :type template: Device or DeviceTemplate
+    :param size: the number of devices to create immediately
+    :param idle_timeout: the time in seconds after which idle devices are
+                         destroyed, or None to keep them until
+                         :func:`close`
+    :param uinput_fd: the file descriptor to /dev/uinput used when
+                      creating devices, see
+                      :func:`Device.create_uinput_device`
+    """
+    def __init__(self, template, size=0, idle_timeout=None, uinput_fd=None):
+        if size < 0 or (idle_timeout is not None and idle_timeout < 0):
+            raise InvalidArgumentException()
+
+        if isinstance(template, Device):
+            template = DeviceTemplate.from_device(template)
+        self._template = template
+        self._idle_timeout = idle_timeout
+        self._uinput_fd = uinput_fd
+        self._lock = threading.Lock()
+        # (device, time of release) tuples, oldest first
+        self._idle = collections.deque()
+        self._in_use = set()
+
+        now = time.monotonic()
+        for _ in range(size):
+            self._idle.append((self._create(), now))
+
+    def _create(self):
+        return self._template.create_uinput_device(self._uinput_fd)
+
+    @property
+    def idle(self):
+        """
+        The number of idle devices in the pool
+        """
+        return len(self._idle)
+
+    def acquire(self):
+        """
+        :returns: an idle uinput :class:`Device` from the pool, or a newly
+                  created one if none is idle
+        :raises: OSError if a new device cannot be created
+        """
+        with self._lock:
+            self._reap(time.monotonic())
+            device = self._idle.pop()[0] if self._idle else None
+        if device is None:
+            device = self._create()
+        with self._lock:
+            self._in_use.add(device)
+        return device
+
+    def release(self, device):
+        """
+        Returns a device obtained from :func:`acquire` to the pool, after
+        resetting its state. The caller must not use the device afterwards.
+
+        :param device: the device to return
+        :raises: InvalidArgumentException if the device is not from this
+                 pool or was released already
+        """
+        with self._lock:
+            if device not in self._in_use:
+                raise InvalidArgumentException()
+            self._in_use.remove(device)
+
+        try:
+            self._reset(device)
+        except OSError:
+            # a device we cannot reset is not reused
+            device._uinput.destroy()
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            self._idle.append((device, now))
+            self._reap(now)
+
+    @contextlib.contextmanager
+    def device(self):
+        """
+        A context manager acquiring a device and releasing it on exit::
+
+            with pool.device() as uinput:
+                uinput.send_events(...)
+        """
+        device = self.acquire()
+        try:
+            yield device
+        finally:
+            self.release(device)
+
+    def _reset(self, device):
+        """
+        Sends the events to release all keys and end all touches still
+        active on the device. The state is read from the kernel through the
+        device node.
+        """
+        events = []
+        with open(device.devnode, 'rb') as fd:
+            state = Device(fd)
+            keys = libevdev.EV_KEY.codes
+            for c in state.key_state():
+                events.append(InputEvent(keys[c], 0))
+
+            if state.num_slots is not None:
+                tracking_id = libevdev.EV_ABS.ABS_MT_TRACKING_ID
+                values = state.slot_values([tracking_id])
+                for slot in range(len(values)):
+                    if values[slot, tracking_id] != -1:
+                        events.append(InputEvent(libevdev.EV_ABS.ABS_MT_SLOT, slot))
+                        events.append(InputEvent(tracking_id, -1))
+
+        if events:
+            events.append(InputEvent(libevdev.EV_SYN.SYN_REPORT, 0))
+            device.send_events(events)
+
+    def reap(self):
+        """
+        Destroys all devices idle for longer than the idle timeout. This
+        happens automatically in :func:`acquire` and :func:`release`, call
+        this function to shrink a pool that is not being used.
+        """
+        with self._lock:
+            self._reap(time.monotonic())
+
+    def _reap(self, now):
+        if self._idle_timeout is None:
+            return
+        while self._idle and now - self._idle[0][1] > self._idle_timeout:
+            device, _ = self._idle.popleft()
+            device._uinput.destroy()
+
+    def close(self):
+        """
+        Destroys all idle devices. Devices still in use are destroyed when
+        they are garbage-collected.
+        """
+        with self._lock:
+            while self._idle:
+                device, _ = self._idle.popleft()
+                device._uinput.destroy()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __repr__(self):
+        return 'UinputPool(idle={}, in use={})'.format(len(self._idle), len(self._in_use))
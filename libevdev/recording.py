@@ -0,0 +1,370 @@
+# -*- coding: latin-1 -*-
+# Copyright © 2017 Red Hat, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice (including the next
+# paragraph) shall be included in all copies or substantial portions of the
+# Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import json
+import mmap
+import struct
+import sys
+
+import libevdev
+from .device import DeviceInfo, InputAbsInfo
+from .capabilities import Capabilities, DeviceTemplate
+from .event import InputEvent, InputEventBuffer, Frame, _input_event_struct
+
+
+class InvalidRecordingError(Exception):
+    """
+    The file is not a recording or was written on an incompatible system
+    """
+    pass
+
+
+# File layout: magic, the format version and header length as two
+# little-endian uint32, the JSON header padded with spaces so the records
+# start 8-byte aligned, then the packed struct input_event records.
+_MAGIC = b'EVDEVREC'
+_VERSION = 1
+_preamble = struct.Struct('<8sII')
+
+
+def _device_header(device):
+    """
+    :returns: the header dict describing device
+    """
+    info = device.info
+    caps = device.capabilities
+    evbits = []
+    absinfo = []
+    rep = []
+    for t, codes in device.evbits.items():
+        evbits.append([t.value, [c.value for c in codes]])
+        for c in codes:
+            if t == libevdev.EV_ABS:
+                a = device.absinfo(c)
+                absinfo.append([c.value, a.minimum, a.maximum, a.fuzz,
+                                a.flat, a.resolution, a.value])
+            elif t == libevdev.EV_REP:
+                rep.append([c.value, device.event_value(c)])
+
+    return {
+        'record_size': _input_event_struct.size,
+        'byteorder': sys.byteorder,
+        'name': info.name,
+        'phys': info.phys,
+        'uniq': info.uniq,
+        'id': info.id,
+        'evbits': evbits,
+        'absinfo': absinfo,
+        'rep': rep,
+        'properties': list(caps.properties),
+    }
+
+
+class Recorder(object):
+    """
+    Writes the events of a :class:`Device` to a compact binary recording,
+    to be read back with :class:`Recording`::
+
+            fd = open("/dev/input/event0", "rb")
+            ctx = libevdev.Device(fd)
+
+            with libevdev.Recorder("trace.evrec", ctx) as recorder:
+                while True:
+                    recorder.record(ctx.read_events())
+
+    The file starts with a header describing the device (name, phys, uniq,
+    id, event types and codes, absinfo, key repeat values and properties),
+    followed by the events as packed ``struct input_event`` records in
+    the native layout, i.e. a recording can only be read on a system with
+    the same ``struct input_event``. Records are only ever appended.
+
+    :param path: the path of the file to create, an existing file is
+                 overwritten
+    :param device: the device the recorded events come from
+    :type device: Device
+    """
+    def __init__(self, path, device):
+        header = json.dumps(_device_header(device)).encode('utf-8')
+        offset = _preamble.size + len(header)
+        header += b' ' * (-offset % 8)
+
+        self._file = open(path, 'wb')
+        self._file.write(_preamble.pack(_MAGIC, _VERSION, len(header)))
+        self._file.write(header)
+        self.count = 0
+
+    def record(self, events):
+        """
+        Appends events to the recording, with their timestamps.
+
+        :param events: an :class:`InputEventBuffer`, a :class:`Frame`, a
+                       bytes-like object of packed ``struct input_event`` or
+                       a list of :class:`InputEvent`
+        """
+        size = _input_event_struct.size
+        if isinstance(events, (InputEventBuffer, Frame)):
+            data = events.raw
+        elif isinstance(events, (bytes, bytearray, memoryview)):
+            data = memoryview(events).cast('B')
+            if len(data) % size != 0:
+                raise libevdev.InvalidArgumentException()
+        else:
+            pack = _input_event_struct.pack
+            data = b''.join(pack(e.sec, e.usec, e.type.value, e.code.value, e.value)
+                            for e in events)
+
+        self._file.write(data)
+        self.count += len(data) // size
+
+    def flush(self):
+        """
+        Flushes the recorded events to the file
+        """
+        self._file.flush()
+
+    def close(self):
+        """
+        Closes the recording file
+        """
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class Recording(object):
+    """
+    A recording written by :class:`Recorder`. The file is memory-mapped, so
+    opening it only parses the header and the events are only converted
+    when accessed, regardless of the size of the recording::
+
+            with libevdev.Recording("trace.evrec") as rec:
+                print(rec.name, len(rec))
+                for e in rec[1000:2000]:
+                    print(e)
+
+    Iterating or indexing returns :class:`InputEvent` objects, slicing
+    returns another :class:`Recording` sharing the same mapping.
+    :func:`tuples` returns plain ``(sec, usec, type, code, value)`` tuples
+    and :attr:`raw` gives access to the packed events.
+
+    Only events that were in the file when it was opened are visible, a
+    trailing incomplete record (e.g. from an interrupted recorder) is
+    ignored.
+
+    .. attribute:: header
+
+        The header dict as written by the :class:`Recorder`
+
+    :param path: the path to the recording
+    :raises: InvalidRecordingError
+    """
+    _struct = _input_event_struct
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            try:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise InvalidRecordingError('empty file')
+
+        try:
+            magic, version, length = _preamble.unpack_from(self._mmap)
+        except struct.error:
+            self._mmap.close()
+            raise InvalidRecordingError('invalid header')
+
+        if magic != _MAGIC or version != _VERSION:
+            self._mmap.close()
+            raise InvalidRecordingError('not a recording')
+
+        try:
+            offset = _preamble.size
+            header = json.loads(self._mmap[offset:offset + length].decode('utf-8'))
+        except ValueError:
+            self._mmap.close()
+            raise InvalidRecordingError('invalid header')
+
+        if (header.get('record_size') != self._struct.size or
+                header.get('byteorder') != sys.byteorder):
+            self._mmap.close()
+            raise InvalidRecordingError('recorded on an incompatible system')
+
+        self.header = header
+        self._owns_mmap = True
+        offset += length
+        nevents = (len(self._mmap) - offset) // self._struct.size
+        self._view = memoryview(self._mmap)[offset:offset + nevents * self._struct.size]
+
+    @property
+    def name(self):
+        """
+        The name of the recorded device
+        """
+        return self.header['name']
+
+    @property
+    def id(self):
+        """
+        The id of the recorded device as dict, see :attr:`Device.id`
+        """
+        return dict(self.header['id'])
+
+    @property
+    def evbits(self):
+        """
+        The event types and codes of the recorded device, see
+        :attr:`Device.evbits`
+        """
+        evbits = {}
+        for t, codes in self.header['evbits']:
+            evtype = libevdev.evbit(t)
+            evbits[evtype] = [libevdev.evbit(t, c) for c in codes]
+        return evbits
+
+    @property
+    def properties(self):
+        """
+        The input properties of the recorded device
+        """
+        return [libevdev.propbit(p) for p in self.header['properties']]
+
+    def absinfo(self, code):
+        """
+        :param code: the ABS_<*> code
+        :type code: EventCode
+        :returns: the recorded device's :class:`InputAbsInfo` for the code
+                  or None if the device does not have the event code
+        """
+        for c, minimum, maximum, fuzz, flat, resolution, value in self.header['absinfo']:
+            if c == code.value:
+                return InputAbsInfo(minimum, maximum, fuzz, flat, resolution, value)
+        return None
+
+    @property
+    def template(self):
+        """
+        A :class:`DeviceTemplate` of the recorded device, e.g. to create a
+        uinput device to replay the events on
+        """
+        h = self.header
+        id = h['id']
+        info = DeviceInfo(h['name'], h['phys'], h['uniq'], id['bustype'],
+                          id['vendor'], id['product'], id['version'], 0)
+        types = {}
+        for t, codes in h['evbits']:
+            bits = 0
+            for c in codes:
+                bits |= 1 << c
+            types[t] = bits
+        props = 0
+        for p in h['properties']:
+            props |= 1 << p
+        absinfo = {a[0]: dict(zip(('minimum', 'maximum', 'fuzz', 'flat',
+                                   'resolution', 'value'), a[1:]))
+                   for a in h['absinfo']}
+        return DeviceTemplate(info, Capabilities(types, props), absinfo,
+                              dict(h['rep']))
+
+    def create_device(self):
+        """
+        :returns: a new :class:`Device` without a file descriptor that has
+                  the name, ids, event codes and properties of the recorded
+                  device, see :attr:`template`
+        """
+        return self.template.create_device()
+
+    def __len__(self):
+        return len(self._view) // self._struct.size
+
+    @property
+    def raw(self):
+        """
+        :returns: a read-only ``memoryview`` of the packed events
+        """
+        return self._view
+
+    def tuples(self):
+        """
+        :returns: an iterator of ``(sec, usec, type, code, value)`` tuples
+                  for all events
+        """
+        return self._struct.iter_unpack(self._view)
+
+    def numpy(self):
+        """
+        :returns: a NumPy structured array of
+                  :attr:`InputEventBuffer.dtype` viewing the events without
+                  copying
+        :raises: ImportError if NumPy is not available
+        """
+        import numpy
+        return numpy.frombuffer(self._view, dtype=InputEventBuffer.dtype)
+
+    def __iter__(self):
+        new = InputEvent._new
+        evbit = libevdev.evbit
+        for sec, usec, t, c, value in self.tuples():
+            yield new(evbit(t, c), value, sec, usec)
+
+    def __getitem__(self, index):
+        size = self._struct.size
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                raise ValueError('slice step must be 1')
+            rec = object.__new__(Recording)
+            rec._mmap = self._mmap
+            rec._owns_mmap = False
+            rec.header = self.header
+            rec._view = self._view[start * size:max(start, stop) * size]
+            return rec
+
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+
+        sec, usec, t, c, value = self._struct.unpack_from(self._view, index * size)
+        return InputEvent._new(libevdev.evbit(t, c), value, sec, usec)
+
+    def close(self):
+        """
+        Closes the mapping. This fails with BufferError while slices or
+        views returned by :attr:`raw` or :func:`numpy` are still referenced.
+        Closing a slice only releases that slice.
+        """
+        self._view.release()
+        if self._owns_mmap:
+            self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __repr__(self):
+        return 'Recording({}, {} events)'.format(self.name, len(self))
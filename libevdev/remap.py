@@ -0,0 +1,356 @@
+# -*- coding: latin-1 -*-
+# Copyright © 2017 Red Hat, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice (including the next
+# paragraph) shall be included in all copies or substantial portions of the
+# Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import errno
+import time
+
+import libevdev
+from .capabilities import DeviceTemplate
+from .device import InvalidArgumentException
+from .event import (InputEventBuffer, _input_event_struct, _typecode,
+                    _typecodes, _word_indices)
+
+_INT32_MIN = -0x80000000
+_INT32_MAX = 0x7fffffff
+_SYN_REPORT = _typecode(0x00, 0x00)
+
+
+class Remap(object):
+    """
+    A rule changing all events with code_from into events with code_to.
+    For an ``EV_ABS`` code, the new device's code_to axis takes the
+    absinfo of code_from.
+    """
+    def __init__(self, code_from, code_to):
+        self.code_from = code_from
+        self.code_to = code_to
+
+
+class Drop(object):
+    """
+    A rule discarding all events with the given code, or with any code of
+    the given type.
+    """
+    def __init__(self, code):
+        self.code = code
+
+
+class Scale(object):
+    """
+    A rule changing the value of all events with the given code to
+    ``round(value * factor + offset)``, clamped to the range of the
+    event's signed 32-bit value.
+    """
+    def __init__(self, code, factor, offset=0):
+        self.code = code
+        self.factor = factor
+        self.offset = offset
+
+
+class Invert(object):
+    """
+    A rule inverting the value of all events with the given code. An
+    ``EV_ABS`` value is mirrored within the axis' minimum and maximum,
+    any other value is negated.
+    """
+    def __init__(self, code):
+        self.code = code
+
+
+class Swap(object):
+    """
+    A rule exchanging two codes, e.g. ``Swap(ABS_X, ABS_Y)`` to swap two
+    axes.
+    """
+    def __init__(self, code_a, code_b):
+        self.code_a = code_a
+        self.code_b = code_b
+
+
+class RemapStats(object):
+    """
+    Counters of a :class:`Remapper`
+
+    .. attribute:: batches
+
+        The number of batches processed
+
+    .. attribute:: events_in
+
+        The number of events read from the device
+
+    .. attribute:: events_out
+
+        The number of events written to the uinput device
+
+    .. attribute:: latency_max
+
+        The maximum time in seconds between the kernel timestamp of the
+        last event in a batch and the batch being written
+    """
+    __slots__ = ('batches', 'events_in', 'events_out', 'latency_total', 'latency_max')
+
+    def __init__(self):
+        self.batches = 0
+        self.events_in = 0
+        self.events_out = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
+    @property
+    def latency_mean(self):
+        """
+        The mean latency in seconds per batch, see :attr:`latency_max`
+        """
+        return self.latency_total / self.batches if self.batches else 0.0
+
+    def __repr__(self):
+        return ('RemapStats(batches={}, events_in={}, events_out={}, '
+                'latency_mean={:.6f}, latency_max={:.6f})'.format(
+                    self.batches, self.events_in, self.events_out,
+                    self.latency_mean, self.latency_max))
+
+
+class Remapper(object):
+    """
+    Forwards the events of a device to a new uinput device, changing them
+    according to a list of rules::
+
+            from libevdev import remap
+
+            fd = open("/dev/input/event0", "rb")
+            d = libevdev.Device(fd)
+            rules = [remap.Remap(libevdev.EV_KEY.BTN_LEFT,
+                                 libevdev.EV_KEY.BTN_RIGHT),
+                     remap.Drop(libevdev.EV_REL.REL_HWHEEL),
+                     remap.Invert(libevdev.EV_REL.REL_WHEEL)]
+            remapper = libevdev.Remapper(d, rules)
+            print("Device is at", remapper.uinput.devnode)
+            remapper.run()
+
+    The rules are compiled into one table indexed by the events' type and
+    code. Events are read and written in batches in their packed form,
+    only events matched by a rule are unpacked and changed, a batch without
+    any matching event is passed through unmodified. Each code may be
+    matched by one rule only, all rules apply to the original events, i.e.
+    ``Remap(A, B)`` does not affect events created by ``Remap(C, A)``.
+
+    The uinput device is created from the device's capabilities, with the
+    codes of :class:`Remap` and :class:`Swap` targets added and the codes
+    that can no longer occur removed.
+
+    :param device: the device to read from
+    :type device: Device
+    :param rules: a list of :class:`Remap`, :class:`Drop`,
+                  :class:`Scale`, :class:`Invert` and :class:`Swap` rules
+    :param uinput_fd: the file descriptor to /dev/uinput used when
+                      creating the uinput device, see
+                      :func:`Device.create_uinput_device`
+    :raises: InvalidArgumentException if a code is matched by more than
+             one rule, a rule matches ``SYN_REPORT`` or a rule is invalid
+             for its code
+    """
+    def __init__(self, device, rules, uinput_fd=None):
+        self._device = device
+        self._template = DeviceTemplate.from_device(device)
+        self._table = {}
+        self._codes = {}
+        self._buffer = None
+        self.stats = RemapStats()
+
+        self._targets = {}
+        for rule in rules:
+            self._compile(rule, self._targets)
+        self._uinput_fd = uinput_fd
+        self._uinput = None
+
+    @property
+    def uinput(self):
+        """
+        The uinput :class:`Device` the events are written to. It is
+        created on first access, a reader can open its ``devnode`` before
+        events are forwarded.
+        """
+        if self._uinput is None:
+            self._uinput = self._create_uinput(self._targets, self._uinput_fd)
+        return self._uinput
+
+    def _add(self, code, action):
+        """
+        Adds the action for code to the table, action is either None for
+        a dropped code or a (type, code, factor, offset) tuple.
+        SYN_REPORT cannot be matched by any rule, it ends the frames.
+        """
+        key = _typecode(code.type.value, code.value)
+        if key in self._table or key == _SYN_REPORT:
+            raise InvalidArgumentException()
+        self._table[key] = action
+        self._codes[key] = code
+
+    def _compile(self, rule, targets):
+        if isinstance(rule, Remap):
+            self._add(rule.code_from, (rule.code_to.type.value, rule.code_to.value, 1, 0))
+            targets[rule.code_to] = rule.code_from
+        elif isinstance(rule, Swap):
+            self._compile(Remap(rule.code_a, rule.code_b), targets)
+            self._compile(Remap(rule.code_b, rule.code_a), targets)
+        elif isinstance(rule, Drop):
+            if isinstance(rule.code, libevdev.EventType):
+                codes = self._template.capabilities.codes(rule.code)
+                for c in codes:
+                    self._add(rule.code.codes[c], None)
+            else:
+                self._add(rule.code, None)
+        elif isinstance(rule, Scale):
+            c = rule.code
+            self._add(c, (c.type.value, c.value, rule.factor, rule.offset))
+        elif isinstance(rule, Invert):
+            c = rule.code
+            if c.type == libevdev.EV_ABS:
+                a = self._template.absinfo(c)
+                if a is None:
+                    raise InvalidArgumentException()
+                self._add(c, (c.type.value, c.value, -1, a.minimum + a.maximum))
+            elif c.type == libevdev.EV_REL:
+                self._add(c, (c.type.value, c.value, -1, 0))
+            else:
+                raise InvalidArgumentException()
+        else:
+            raise InvalidArgumentException()
+
+    def _create_uinput(self, targets, uinput_fd):
+        d = self._template.create_device()
+        # codes that are remapped or dropped can no longer occur, unless
+        # they are the target of another rule
+        for key, action in self._table.items():
+            code = self._codes[key]
+            if code in targets:
+                continue
+            if action is None or action[:2] != (code.type.value, code.value):
+                d.disable(code)
+        for code_to, code_from in targets.items():
+            data = None
+            if code_to.type == libevdev.EV_ABS:
+                data = self._template.absinfo(code_from)
+            d.enable(code_to, data)
+        return d.create_uinput_device(uinput_fd)
+
+    def _transform(self, data):
+        """
+        :param data: a bytes-like object of packed events
+        :returns: the packed events after applying all rules
+        """
+        typecodes = _typecodes(data)
+        matches = []
+        for key, action in self._table.items():
+            for i in _word_indices(typecodes, key):
+                matches.append((i, action))
+        if not matches:
+            return data
+
+        size = _input_event_struct.size
+        unpack_from = _input_event_struct.unpack_from
+        pack_into = _input_event_struct.pack_into
+        out = bytearray(data)
+        drops = []
+        for i, action in matches:
+            if action is None:
+                drops.append(i)
+                continue
+            t, c, factor, offset = action
+            sec, usec, _, _, value = unpack_from(out, i * size)
+            if factor != 1 or offset != 0:
+                value = int(round(value * factor + offset))
+                value = min(max(value, _INT32_MIN), _INT32_MAX)
+            pack_into(out, i * size, sec, usec, t, c, value)
+
+        if drops:
+            drops.sort()
+            view = memoryview(out)
+            parts = []
+            start = 0
+            for i in drops:
+                parts.append(view[start * size:i * size])
+                start = i + 1
+            parts.append(view[start * size:])
+            out = b''.join(parts)
+        return out
+
+    def process(self, max_events=64):
+        """
+        Reads, transforms and writes one batch of up to max_events events.
+        After a ``SYN_DROPPED``, the device is synced and the sync events
+        are forwarded instead of the ``SYN_DROPPED``.
+
+        :returns: the number of events read
+        """
+        if self._buffer is None or self._buffer.capacity < max_events:
+            self._buffer = InputEventBuffer(max_events)
+        buf = self._device.read_events(max_events, self._buffer)
+        count = len(buf)
+        if count == 0:
+            return 0
+
+        size = _input_event_struct.size
+        data = buf.raw
+        if buf.dropped:
+            pack = _input_event_struct.pack
+            data = data[:-size].tobytes() + b''.join(
+                pack(e.sec, e.usec, e.type.value, e.code.value, e.value)
+                for e in self._device.sync())
+        data = self._transform(data)
+
+        if data:
+            self.uinput.send_events(data)
+        sec, usec = _input_event_struct.unpack_from(buf.raw, (count - 1) * size)[:2]
+        latency = time.monotonic() - (sec + usec / 1e6)
+
+        stats = self.stats
+        stats.batches += 1
+        stats.events_in += count
+        stats.events_out += len(data) // size
+        stats.latency_total += latency
+        stats.latency_max = max(stats.latency_max, latency)
+        return count
+
+    def run(self, max_events=64):
+        """
+        Grabs the device and forwards its events until reading fails,
+        e.g. because the device was removed. The device is ungrabbed
+        again before returning. The device's file descriptor should be
+        blocking, a non-blocking one makes this function busy-loop.
+
+        :raises: OSError if reading fails for other reasons than the
+                 device being removed
+        """
+        self._device.grab()
+        try:
+            while True:
+                self.process(max_events)
+        except OSError as e:
+            if e.errno != errno.ENODEV:
+                raise
+        finally:
+            try:
+                self._device.ungrab()
+            except OSError:
+                pass
@@ -0,0 +1,157 @@
+# -*- coding: latin-1 -*-
+# Copyright © 2017 Red Hat, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice (including the next
+# paragraph) shall be included in all copies or substantial portions of the
+# Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import time
+
+from .device import InvalidArgumentException, _SYN_REPORT
+from .event import _input_event_struct, _typecode_indices
+
+
+def _sleep_until(deadline):
+    """
+    Sleeps until the given absolute time.monotonic() deadline. Sleeping
+    towards a deadline rather than for an interval means oversleeping
+    once does not delay all later events.
+    """
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        time.sleep(remaining)
+
+
+class Replayer(object):
+    """
+    Replays a :class:`Recording` through a uinput device::
+
+            rec = libevdev.Recording("trace.evrec")
+            replayer = libevdev.Replayer(rec, speed=2.0)
+            print("replaying on", replayer.device.devnode)
+            replayer.run()
+
+    Each frame, i.e. the events up to and including a ``SYN_REPORT``, is
+    sent when its deadline is reached. Deadlines are absolute, derived from
+    the frame's recorded timestamp relative to the first frame and the time
+    :func:`run` started, so the timing does not drift over long
+    recordings. Frames that are due at the same time are sent with a single
+    write.
+
+    :param recording: the recording to replay
+    :type recording: Recording
+    :param speed: 1.0 to replay in real time, 2.0 to replay twice as fast,
+                  etc. If None, events are replayed as fast as possible in
+                  batches of max_batch events.
+    :param max_batch: the maximum number of events per write, batches
+                      always end at the end of a frame unless a single
+                      frame is larger than this
+    :param device: the device to send the events through, by default a
+                   new uinput device recreating the recorded device, see
+                   :func:`Recording.create_device`
+    :param uinput_fd: the file descriptor to /dev/uinput used when
+                      creating the device, see
+                      :func:`Device.create_uinput_device`
+
+    .. note:: Replaying faster than a reader of the device can process the
+              events causes ``SYN_DROPPED`` events for that reader.
+    """
+    def __init__(self, recording, speed=1.0, max_batch=1024, device=None,
+                 uinput_fd=None):
+        if speed is not None and speed <= 0:
+            raise InvalidArgumentException()
+        if max_batch < 1:
+            raise InvalidArgumentException()
+
+        self._recording = recording
+        self._speed = speed
+        self._max_batch = max_batch
+        self._uinput_fd = uinput_fd
+        self._device = device
+
+    @property
+    def device(self):
+        """
+        The device the events are sent through. The uinput device is
+        created on first access, a reader can open its ``devnode`` before
+        calling :func:`run`.
+        """
+        if self._device is None:
+            template = self._recording.template
+            self._device = template.create_uinput_device(self._uinput_fd)
+        return self._device
+
+    def run(self):
+        """
+        Replays the recording, returning once all events have been sent.
+
+        :returns: the number of events sent
+        """
+        device = self.device
+        raw = self._recording.raw
+        size = _input_event_struct.size
+        nevents = len(raw) // size
+        speed = self._speed
+
+        def send(first, last):
+            device.send_events(raw[first * size:last * size])
+
+        t0 = None
+        start = 0
+        pos = 0  # the first event not yet sent
+        frame_start = 0
+        for end in self._frame_ends(raw):
+            if speed is not None:
+                sec, usec = _input_event_struct.unpack_from(raw, (end - 1) * size)[:2]
+                t = sec + usec / 1e6
+                if t0 is None:
+                    t0 = t
+                    start = time.monotonic()
+                deadline = start + (t - t0) / speed
+                if deadline > time.monotonic():
+                    if pos < frame_start:
+                        send(pos, frame_start)
+                        pos = frame_start
+                    _sleep_until(deadline)
+
+            if end - pos > self._max_batch and pos < frame_start:
+                send(pos, frame_start)
+                pos = frame_start
+            if end - pos >= self._max_batch:
+                send(pos, end)
+                pos = end
+            frame_start = end
+
+        if pos < nevents:
+            send(pos, nevents)
+        return nevents
+
+    @staticmethod
+    def _frame_ends(raw, window=65536):
+        """
+        :returns: an iterator over the index after each ``SYN_REPORT`` in
+                  the packed events, scanning window events at a time
+        """
+        size = _input_event_struct.size
+        nevents = len(raw) // size
+        for base in range(0, nevents, window):
+            chunk = raw[base * size:min(base + window, nevents) * size]
+            for i in _typecode_indices(chunk, _SYN_REPORT):
+                yield base + i + 1
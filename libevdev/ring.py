@@ -0,0 +1,354 @@
+# -*- coding: latin-1 -*-
+# Copyright © 2017 Red Hat, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice (including the next
+# paragraph) shall be included in all copies or substantial portions of the
+# Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import os
+import struct
+import sys
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+from .device import InvalidArgumentException
+from .event import InputEventBuffer, Frame, _input_event_struct, _typecode_indices, _typecode
+
+_MAGIC = b'EVDEVRNG'
+# magic, record size, capacity, reserved sequence, committed sequence,
+# resource tracker of the creator
+_header_struct = struct.Struct('<8sIIqqq')
+_RESERVED_OFFSET = 16
+_COMMITTED_OFFSET = 24
+_seq_struct = struct.Struct('<q')
+_SYN_REPORT = _typecode(0x00, 0x00)
+
+
+def _tracker_id():
+    """
+    :returns: the inode of the pipe to this process' resource tracker,
+              the same for all processes sharing the tracker
+    """
+    return os.fstat(resource_tracker.getfd()).st_ino
+
+
+class EventRing(object):
+    """
+    A single-producer, multi-consumer ring buffer of packed
+    ``struct input_event`` records in shared memory, for fanning the
+    events of one device out to several processes without a copy per
+    consumer in the producer. ::
+
+        ring = libevdev.EventRing.create(capacity=8192)
+        # in each consumer process:
+        #   reader = libevdev.EventRing.attach(name).reader()
+        while True:
+            ring.pump(device)
+
+    The producer process creates the ring and is the only one allowed to
+    publish events, consumers attach to it by :attr:`name` and each read
+    through their own :class:`EventRingReader`. The producer never waits
+    for consumers: a consumer that falls more than :attr:`capacity` events
+    behind sees an overrun, reported like the kernel's ``SYN_DROPPED``.
+
+    Sharing a ring between processes is only supported on x86 and x86-64.
+    The ring is a seqlock without memory barriers: it relies on aligned
+    64-bit stores being atomic and on stores becoming visible to other
+    processes in program order, neither of which Python guarantees. Both
+    hold on strongly ordered CPUs like x86 and x86-64. On weakly ordered
+    CPUs (ARM, POWER) a reader may see the committed sequence number
+    before the events it covers.
+    """
+
+    def __init__(self, shm, owner):
+        """
+        Use :meth:`create` or :meth:`attach` instead.
+        """
+        magic, size, capacity, _, _, _ = _header_struct.unpack_from(shm.buf)
+        if magic != _MAGIC or size != _input_event_struct.size:
+            shm.close()
+            raise InvalidArgumentException('Not an event ring: {}'.format(shm.name))
+
+        self._shm = shm
+        self._owner = owner
+        self._capacity = capacity
+        self._records = shm.buf[_header_struct.size:]
+
+    @classmethod
+    def create(cls, capacity=4096, name=None):
+        """
+        Creates a new ring in shared memory. The shared memory is removed
+        again when the ring is closed.
+
+        :param capacity: the number of events the ring can hold
+        :param name: the shared memory name, a random name if None
+        """
+        if capacity <= 0:
+            raise InvalidArgumentException('capacity must be positive')
+
+        size = _header_struct.size + capacity * _input_event_struct.size
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        tracker = _tracker_id() if sys.version_info < (3, 13) else 0
+        _header_struct.pack_into(shm.buf, 0, _MAGIC, _input_event_struct.size,
+                                 capacity, 0, 0, tracker)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        """
+        Attaches to an existing ring created by another process.
+
+        :param name: the ring's :attr:`name`
+        """
+        if sys.version_info >= (3, 13):
+            return cls(shared_memory.SharedMemory(name=name, track=False), owner=False)
+
+        # Before Python 3.13, attaching registers the shared memory with
+        # this process' resource tracker, which removes it when the
+        # process exits. Undo that unless the tracker is the creator's,
+        # e.g. in a multiprocessing child, where the registration is the
+        # creator's own and unregistering it would leak the shared memory
+        # if the creator crashes.
+        shm = shared_memory.SharedMemory(name=name)
+        if shm.size >= _header_struct.size:
+            tracker = _header_struct.unpack_from(shm.buf)[5]
+        else:
+            tracker = None
+        if tracker != _tracker_id():
+            resource_tracker.unregister('/' + shm.name, 'shared_memory')
+        return cls(shm, owner=False)
+
+    @property
+    def name(self):
+        """
+        :returns: the shared memory name consumers attach to
+        """
+        return self._shm.name
+
+    @property
+    def capacity(self):
+        """
+        :returns: the number of events the ring can hold
+        """
+        return self._capacity
+
+    @property
+    def sequence(self):
+        """
+        :returns: the total number of events published so far
+        """
+        return _seq_struct.unpack_from(self._shm.buf, _COMMITTED_OFFSET)[0]
+
+    def _reserved(self):
+        return _seq_struct.unpack_from(self._shm.buf, _RESERVED_OFFSET)[0]
+
+    def _copy_out(self, dest, seq, count):
+        """
+        Copies count records starting at sequence number seq into dest.
+        """
+        size = _input_event_struct.size
+        start = seq % self._capacity
+        first = min(count, self._capacity - start)
+        dest[:first * size] = self._records[start * size:(start + first) * size]
+        if first < count:
+            dest[first * size:count * size] = self._records[:(count - first) * size]
+
+    def publish(self, events):
+        """
+        Appends events to the ring. Only the process that created the
+        ring may publish.
+
+        :param events: an :class:`InputEventBuffer`, a :class:`Frame`, a
+                       bytes-like object of packed ``struct input_event`` or
+                       a list of :class:`InputEvent`
+        :returns: the number of events published
+        """
+        if not self._owner:
+            raise InvalidArgumentException('Only the ring creator may publish')
+
+        size = _input_event_struct.size
+        if isinstance(events, (InputEventBuffer, Frame)):
+            data = events.raw
+        elif isinstance(events, (bytes, bytearray, memoryview)):
+            data = memoryview(events).cast('B')
+            if len(data) % size != 0:
+                raise InvalidArgumentException()
+        else:
+            pack = _input_event_struct.pack
+            data = memoryview(b''.join(pack(e.sec, e.usec, e.type.value, e.code.value, e.value)
+                                       for e in events))
+
+        count = len(data) // size
+        seq = self.sequence
+        buf = self._shm.buf
+        records = self._records
+        # Larger batches are published in chunks, readers see an overrun
+        for offset in range(0, count, self._capacity):
+            n = min(self._capacity, count - offset)
+            chunk = data[offset * size:(offset + n) * size]
+            # Announce the slots about to be overwritten before touching
+            # them, readers check this after copying
+            _seq_struct.pack_into(buf, _RESERVED_OFFSET, seq + n)
+            start = seq % self._capacity
+            first = min(n, self._capacity - start)
+            records[start * size:(start + first) * size] = chunk[:first * size]
+            if first < n:
+                records[:(n - first) * size] = chunk[first * size:]
+            seq += n
+            _seq_struct.pack_into(buf, _COMMITTED_OFFSET, seq)
+        return count
+
+    def pump(self, device, max_events=64):
+        """
+        Reads one batch of up to max_events events from the device and
+        publishes it. After a ``SYN_DROPPED`` from the device, the
+        ``SYN_DROPPED`` is published followed by the events from
+        :meth:`Device.sync`, so consumers see the same sequence a reader
+        of the device would.
+
+        :returns: the number of events published
+        """
+        buf = device.read_events(max_events)
+        count = self.publish(buf)
+        if buf.dropped:
+            count += self.publish(list(device.sync()))
+        return count
+
+    def reader(self, from_start=False):
+        """
+        :param from_start: if True, the reader starts at the oldest event
+                           still in the ring, otherwise it only sees events
+                           published after this call
+        :returns: a new :class:`EventRingReader` with its own cursor
+        """
+        return EventRingReader(self, from_start)
+
+    def close(self):
+        """
+        Detaches from the ring. If this process created the ring, the
+        shared memory is removed, consumers still attached keep their
+        mapping until they close it.
+        """
+        if self._shm is None:
+            return
+        self._records.release()
+        self._records = None
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+        self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __repr__(self):
+        return '<EventRing {} capacity {}>'.format(self.name if self._shm else None,
+                                                  self._capacity)
+
+
+class EventRingReader(object):
+    """
+    A consumer's cursor into an :class:`EventRing`. Readers do not
+    coordinate with each other or with the producer.
+
+    If the producer overwrites events before the reader got to them, the
+    reader returns a buffer with a single ``SYN_DROPPED`` event, its
+    :attr:`InputEventBuffer.dropped` is set. As after a ``SYN_DROPPED``
+    from the kernel, the events up to and including the next
+    ``SYN_REPORT`` are then discarded and the consumer must consider its
+    view of the device state invalid. :attr:`lost` counts the events
+    that were never returned.
+    """
+
+    def __init__(self, ring, from_start=False):
+        self._ring = ring
+        seq = ring.sequence
+        if from_start:
+            seq = max(0, seq - ring.capacity)
+            self._discard = seq > 0
+        else:
+            self._discard = False
+        self._cursor = seq
+        self._buffer = None
+        self.lost = 0
+
+    @property
+    def pending(self):
+        """
+        :returns: the number of published events not read yet, this may
+                  exceed the ring capacity if the reader was overrun
+        """
+        return self._ring.sequence - self._cursor
+
+    def read(self, max_events=64, buffer=None):
+        """
+        Returns the next events published to the ring. Unlike
+        :meth:`Device.read_events`, this never blocks, the returned
+        buffer is empty if there are no new events.
+
+        :param max_events: the maximum number of events to return
+        :param buffer: an :class:`InputEventBuffer` to reuse, see
+                       :meth:`Device.read_events`
+        :returns: an :class:`InputEventBuffer`
+        """
+        if buffer is None:
+            if self._buffer is None or self._buffer.capacity < max_events:
+                self._buffer = InputEventBuffer(max_events)
+            buffer = self._buffer
+        max_events = min(max_events, buffer.capacity)
+
+        ring = self._ring
+        size = _input_event_struct.size
+        dest = memoryview(buffer._events).cast('B')
+        while True:
+            committed = ring.sequence
+            count = min(max_events, committed - self._cursor)
+            if count > 0:
+                ring._copy_out(dest, self._cursor, count)
+            # Anything the producer started overwriting while we were
+            # copying is unusable
+            if self._cursor < ring._reserved() - ring.capacity:
+                return self._overrun(buffer, dest)
+
+            self._cursor += count
+            if self._discard and count > 0:
+                end = _typecode_indices(dest[:count * size], _SYN_REPORT)
+                if not end:
+                    self.lost += count
+                    continue
+                self._discard = False
+                skip = end[0] + 1
+                self.lost += skip
+                count -= skip
+                dest[:count * size] = dest[skip * size:(skip + count) * size]
+            buffer._filled(count)
+            return buffer
+
+    def _overrun(self, buffer, dest):
+        committed = self._ring.sequence
+        self.lost += committed - self._cursor
+        self._cursor = committed
+        self._discard = True
+        now = time.monotonic()
+        _input_event_struct.pack_into(dest, 0, int(now), int(now % 1 * 1000000),
+                                      0x00, 0x03, 0)  # EV_SYN, SYN_DROPPED
+        buffer._filled(1)
+        return buffer
@@ -0,0 +1,151 @@
+# -*- coding: latin-1 -*-
+# Copyright © 2017 Red Hat, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice (including the next
+# paragraph) shall be included in all copies or substantial portions of the
+# Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+
+import os
+import unittest
+
+import libevdev
+from libevdev import Bitmask, Capabilities, DeviceTemplate
+from libevdev.device import InputAbsInfo
+
+
+def is_root():
+    return os.getuid() == 0
+
+
+class TestBitmask(unittest.TestCase):
+    def test_bits(self):
+        m = Bitmask(0b101001)
+        self.assertEqual(list(m), [0, 3, 5])
+        self.assertEqual(len(m), 3)
+        self.assertIn(3, m)
+        self.assertNotIn(4, m)
+        self.assertNotIn(-1, m)
+        self.assertEqual(list(Bitmask()), [])
+        self.assertEqual(list(Bitmask(1 << 700)), [700])
+
+    def test_set_operations(self):
+        a = Bitmask(0b0110)
+        b = Bitmask(0b0011)
+        self.assertEqual(list(a & b), [1])
+        self.assertEqual(list(a | b), [0, 1, 2])
+        self.assertEqual(list(a ^ b), [0, 2])
+        self.assertIsInstance(a & b, Bitmask)
+        self.assertIsInstance(1 | a, Bitmask)
+
+    def test_bytes(self):
+        m = Bitmask.from_bytes(b'\x01\x80', 'little')
+        self.assertIsInstance(m, Bitmask)
+        self.assertEqual(list(m), [0, 15])
+        self.assertEqual(m.to_bytes(2, 'little'), b'\x01\x80')
+
+    def test_evdev_bits(self):
+        m = Bitmask(1 << libevdev.EV_KEY.BTN_LEFT.value)
+        self.assertIn(libevdev.EV_KEY.BTN_LEFT, m)
+        self.assertNotIn(libevdev.EV_KEY.BTN_RIGHT, m)
+
+
+class TestCapabilities(unittest.TestCase):
+    def test_snapshot(self):
+        d = libevdev.Device()
+        d.enable(libevdev.EV_REL.REL_X)
+        d.enable(libevdev.INPUT_PROP_POINTER)
+        caps = d.capabilities
+
+        self.assertIsInstance(caps, Capabilities)
+        self.assertIn(libevdev.EV_REL, caps.types)
+        self.assertNotIn(libevdev.EV_KEY, caps.types)
+        self.assertEqual(list(caps.codes(libevdev.EV_REL)), [0])
+        self.assertEqual(list(caps.codes(libevdev.EV_KEY)), [])
+        self.assertIn(libevdev.INPUT_PROP_POINTER, caps.properties)
+        self.assertTrue(caps.has(libevdev.EV_REL.REL_X))
+        self.assertFalse(caps.has(libevdev.EV_REL.REL_Y))
+        self.assertTrue(caps.has(libevdev.INPUT_PROP_POINTER))
+
+        d.enable(libevdev.EV_REL.REL_Y)
+        self.assertFalse(caps.has(libevdev.EV_REL.REL_Y))
+        self.assertTrue(d.capabilities.has(libevdev.EV_REL.REL_Y))
+
+    def test_mirror(self):
+        d = libevdev.Device()
+        d.capabilities
+        d.enable(libevdev.EV_KEY.KEY_A)
+        d.enable(libevdev.EV_KEY.KEY_B)
+        d.enable(libevdev.EV_REL.REL_X)
+        d.disable(libevdev.EV_KEY.KEY_A)
+        self.assertEqual(d.capabilities, d._read_capabilities(False))
+        d.disable(libevdev.EV_KEY)
+        self.assertEqual(d.capabilities, d._read_capabilities(False))
+        # re-enabling the type restores the codes libevdev kept
+        d.enable(libevdev.EV_KEY)
+        self.assertEqual(d.capabilities, d._read_capabilities(False))
+
+    def test_template(self):
+        d = libevdev.Device()
+        d.name = 'template device'
+        d.phys = 'phys'
+        d.id = {'bustype': 3, 'vendor': 1, 'product': 2, 'version': 3}
+        d.enable(libevdev.EV_KEY.BTN_LEFT)
+        d.enable(libevdev.EV_ABS.ABS_X, InputAbsInfo(0, 100, 1, 2, 3, 4))
+        d.enable(libevdev.EV_REP.REP_DELAY, 250)
+        d.enable(libevdev.EV_REP.REP_PERIOD, 33)
+        d.enable(libevdev.INPUT_PROP_POINTER)
+
+        template = DeviceTemplate.from_device(d)
+        self.assertEqual(template.info, d.info)
+        self.assertEqual(template.capabilities, d.capabilities)
+        self.assertEqual(template.absinfo(libevdev.EV_ABS.ABS_X).resolution, 3)
+        self.assertIsNone(template.absinfo(libevdev.EV_ABS.ABS_Y))
+
+        d2 = template.create_device()
+        self.assertIsNot(d2, d)
+        self.assertEqual(d2.info, d.info)
+        self.assertEqual(d2.evbits, d.evbits)
+        self.assertEqual(d2._read_capabilities(False), d.capabilities)
+        self.assertEqual(d2.properties, [libevdev.INPUT_PROP_POINTER])
+        a = d2.absinfo(libevdev.EV_ABS.ABS_X)
+        self.assertEqual((a.minimum, a.maximum, a.fuzz, a.flat, a.resolution),
+                         (0, 100, 1, 2, 3))
+        self.assertEqual(d2.event_value(libevdev.EV_REP.REP_PERIOD), 33)
+
+    @unittest.skipUnless(is_root(), 'Test requires root')
+    def test_template_uinput(self):
+        d = libevdev.Device()
+        d.name = 'template device'
+        d.enable(libevdev.EV_KEY.BTN_LEFT)
+        d.enable(libevdev.INPUT_PROP_POINTER)
+        uidev = d.create_uinput_device()
+        # properties are set on the new device, not the template
+        with open(uidev.devnode, 'rb') as fd:
+            d2 = libevdev.Device(fd)
+            self.assertEqual(d2.name, 'template device')
+            self.assertEqual(d2.properties, [libevdev.INPUT_PROP_POINTER])
+            self.assertTrue(d2.has_event(libevdev.EV_KEY.BTN_LEFT))
+
+    @unittest.skipUnless(is_root(), 'Test requires root')
+    def test_kernel_bits(self):
+        fd = open('/dev/input/event0', 'rb')
+        d = libevdev.Device(fd)
+        self.assertEqual(d._read_capabilities(True),
+                         d._read_capabilities(False))
+        fd.close()
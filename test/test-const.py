@@ -20,9 +20,12 @@
 # FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
 # DEALINGS IN THE SOFTWARE.
 
+import os
+import tempfile
 import unittest
 
 import libevdev
+from libevdev import const
 from libevdev import evbit, propbit
 
 class TestEventBits(unittest.TestCase):
@@ -92,3 +95,82 @@ class TestEventBits(unittest.TestCase):
 
         for p in libevdev.props:
             self.assertEqual(propbit(p.value), p)
+
+    def test_evbit_invalid(self):
+        self.assertIsNone(evbit(-1))
+        self.assertIsNone(evbit(100))
+        self.assertIsNone(evbit(1, -1))
+        self.assertIsNone(evbit(1, libevdev.EV_KEY.max + 1))
+        self.assertIsNone(evbit('EV_FOO'))
+        self.assertIsNone(evbit('EV_KEY', 'KEY_FOO'))
+        self.assertIsNone(evbit('KEY_FOO'))
+
+    def test_evbit_all_codes(self):
+        for t in libevdev.types:
+            for c in t.codes:
+                self.assertIs(evbit(t.value, c.value), c)
+                self.assertIs(evbit(t.name, c.value), c)
+                self.assertEqual(evbit(t.value, c.name).name, c.name)
+
+    def test_propbit_invalid(self):
+        self.assertIsNone(propbit(-1))
+        self.assertIsNone(propbit(1000))
+        self.assertIsNone(propbit('INPUT_PROP_FOO'))
+
+    def test_codes_complete(self):
+        for t in libevdev.types:
+            if t.max is None:
+                self.assertEqual(t.codes, [])
+                continue
+
+            self.assertEqual(len(t.codes), t.max + 1)
+            for c in t.codes:
+                self.assertIs(c.type, t)
+
+        with self.assertRaises(AttributeError):
+            libevdev.EV_REL.REL_FOO
+
+
+class TestConstsCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'consts')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_cache_roundtrip(self):
+        consts = const._query_consts()
+        const._write_cache(self.path, consts)
+        self.assertEqual(const._read_cache(self.path), consts)
+
+        for t, tname, cmax, names in consts['types']:
+            etype = evbit(t)
+            self.assertEqual(etype.name, tname)
+            self.assertEqual(etype.max, cmax)
+            for c, cname in enumerate(names):
+                if cname is not None:
+                    self.assertEqual(etype.codes[c].name, cname)
+
+    def test_cache_missing(self):
+        self.assertIsNone(const._read_cache(self.path))
+
+    def test_cache_invalid(self):
+        with open(self.path, 'w') as f:
+            f.write('garbage')
+        self.assertIsNone(const._read_cache(self.path))
+
+        consts = const._query_consts()
+        consts['version'] = -1
+        const._write_cache(self.path, consts)
+        self.assertIsNone(const._read_cache(self.path))
+
+        consts = const._query_consts()
+        consts['types'][0][3].append('SYN_FOO')
+        const._write_cache(self.path, consts)
+        self.assertIsNone(const._read_cache(self.path))
+
+    def test_cache_without_codes(self):
+        consts = const._query_consts(with_codes=False)
+        for t, tname, cmax, names in consts['types']:
+            self.assertIsNone(names)
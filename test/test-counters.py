@@ -0,0 +1,128 @@
+# -*- coding: latin-1 -*-
+# Copyright © 2017 Red Hat, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice (including the next
+# paragraph) shall be included in all copies or substantial portions of the
+# Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import unittest
+
+import libevdev
+import libevdev.counters as counters
+from libevdev._clib import Libevdev, _LibraryWrapper
+from libevdev.device import InputAbsInfo
+
+
+class TestCounters(unittest.TestCase):
+    def setUp(self):
+        counters.reset()
+
+    def tearDown(self):
+        counters.disable()
+        counters.reset()
+
+    def test_disabled(self):
+        original = Libevdev.__dict__['_has_event_type']
+        release = _LibraryWrapper.__dict__['_release']
+        counters.enable()
+        self.assertTrue(counters.is_enabled())
+        self.assertIsNot(Libevdev.__dict__['_has_event_type'], original)
+        self.assertIsNot(_LibraryWrapper.__dict__['_release'], release)
+        counters.disable()
+        self.assertFalse(counters.is_enabled())
+        self.assertIs(Libevdev.__dict__['_has_event_type'], original)
+        self.assertIs(_LibraryWrapper.__dict__['_release'], release)
+
+        d = libevdev.Device()
+        d._libevdev.has_event(libevdev.EV_REL.value)
+        self.assertEqual(counters.snapshot(), {})
+
+    def test_calls(self):
+        d1 = libevdev.Device()
+        d2 = libevdev.Device()
+        d1.enable(libevdev.EV_ABS.ABS_X, InputAbsInfo(0, 100, 0, 0, 0, 0))
+        counters.enable()
+        for _ in range(3):
+            d1._libevdev.has_event(libevdev.EV_REL.value)
+        d2._libevdev.has_event(libevdev.EV_REL.value)
+        d1.absinfo(libevdev.EV_ABS.ABS_X)
+        list(d1.sync())
+
+        s = counters.snapshot(d1)
+        self.assertEqual(s['calls.has_event_type'], 3)
+        self.assertEqual(s['calls.get_abs_info'], 1)
+        self.assertEqual(s['syncs'], 1)
+        self.assertEqual(counters.snapshot(d2), {'calls.has_event_type': 1})
+        self.assertEqual(counters.snapshot()['calls.has_event_type'], 4)
+
+        counters.reset()
+        self.assertEqual(counters.snapshot(d1), {})
+
+    def test_released(self):
+        counters.enable()
+        d = libevdev.Device()
+        ctx = d._libevdev._ctx
+        d._libevdev.has_event(libevdev.EV_REL.value)
+        self.assertIn(ctx, counters._counters)
+        del d
+        self.assertNotIn(ctx, counters._counters)
+        self.assertEqual(counters.snapshot()['calls.has_event_type'], 1)
+
+        # a context created at a freed address starts from zero
+        d = libevdev.Device()
+        self.assertEqual(counters.snapshot(d), {})
+
+    def test_fake_sync(self):
+        d = libevdev.FakeDevice()
+        d.enable(libevdev.EV_KEY.KEY_A)
+        counters.enable()
+        d.send_events([libevdev.InputEvent(libevdev.EV_KEY.KEY_A, 1),
+                       libevdev.InputEvent(libevdev.EV_SYN.SYN_REPORT, 0)])
+        d.drop()
+        self.assertTrue(d.read_events().dropped)
+        self.assertEqual(len(list(d.sync())), 2)
+        s = counters.snapshot(d)
+        self.assertEqual(s['syncs'], 1)
+        self.assertEqual(s['sync_events'], 2)
+
+    def test_timing(self):
+        d = libevdev.Device()
+        counters.enable(timing=True)
+        d._libevdev.has_event(libevdev.EV_REL.value)
+        self.assertGreaterEqual(counters.snapshot(d)['time.has_event_type'], 0)
+
+    def test_hooks(self):
+        calls = []
+
+        def hook(name, args, result):
+            calls.append(name)
+
+        d = libevdev.Device()
+        counters.add_hook(hook)
+        try:
+            d._libevdev.has_event(libevdev.EV_REL.value)
+            self.assertEqual(calls, [])
+            counters.enable()
+            d._libevdev.has_event(libevdev.EV_REL.value)
+            self.assertEqual(calls, ['has_event_type'])
+        finally:
+            counters.remove_hook(hook)
+
+
+if __name__ == '__main__':
+    unittest.main()
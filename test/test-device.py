@@ -20,11 +20,14 @@
 # FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
 # DEALINGS IN THE SOFTWARE.
 
+import asyncio
 import os
+import time
 import unittest
 
 import libevdev
-from libevdev import evbit, propbit, InputEvent, Device, InvalidFileError, InvalidArgumentException
+from libevdev import evbit, propbit, InputEvent, InputEventBuffer, Device, InvalidFileError, InvalidArgumentException
+from libevdev.device import InputAbsInfo
 
 def is_root():
     return os.getuid() == 0
@@ -71,6 +74,7 @@ class TestDevice(unittest.TestCase):
 
         self.assertEqual([e for e in d.events()], [])
         self.assertEqual([e for e in d.sync()], [])
+        self.assertEqual(len(d.read_events()), 0)
 
         with self.assertRaises(libevdev.InvalidArgumentException):
             d.slot_value(0, libevdev.EV_ABS.ABS_MT_POSITION_X)
@@ -124,6 +128,30 @@ class TestDevice(unittest.TestCase):
         with self.assertRaises(AttributeError):
             d.driver_version = 1
 
+    def test_device_info(self):
+        d = libevdev.Device()
+        d.name = 'test device'
+        d.id = {'bustype': 1, 'vendor': 2, 'product': 3, 'version': 4}
+        info = d.info
+        self.assertIsInstance(info, libevdev.DeviceInfo)
+        self.assertIs(d.info, info)
+        self.assertEqual(info.name, 'test device')
+        self.assertEqual(info.vendor, 2)
+        self.assertEqual(info.id, d.id)
+        with self.assertRaises(AttributeError):
+            info.name = 'foo'
+
+        d.phys = 'foo'
+        self.assertIsNot(d.info, info)
+        self.assertEqual(d.info.phys, 'foo')
+        self.assertIsNone(info.phys)
+
+        # changes behind our back are only picked up after refresh()
+        d._libevdev.name = 'other name'
+        self.assertEqual(d.name, 'test device')
+        d.refresh()
+        self.assertEqual(d.name, 'other name')
+
     def test_garbage_fd(self):
         with self.assertRaises(InvalidFileError):
             libevdev.Device(fd=1)
@@ -170,6 +198,59 @@ class TestDevice(unittest.TestCase):
             # assume at least one code
             self.assertGreater(len(cs), 0)
 
+    @unittest.skipUnless(is_root(), 'Test requires root')
+    def test_read_raw_events(self):
+        fd = open('/dev/input/event0', 'rb')
+        os.set_blocking(fd.fileno(), False)
+        d = libevdev.Device(fd)
+        buf = d.read_raw_events()
+        self.assertLessEqual(len(buf), buf.capacity)
+        self.assertEqual(len(buf.raw), len(buf) * InputEventBuffer._struct.size)
+        # forced sync after raw reads must terminate
+        for e in d.sync():
+            pass
+        self.assertEqual(len(d.read_events()), 0)
+
+    def test_track_latency(self):
+        d = libevdev.Device()
+        self.assertIsNone(d.latency)
+        h = d.track_latency()
+        self.assertIs(d.latency, h)
+
+        now = time.monotonic()
+        sec, usec = int(now - 0.01), int((now - 0.01) % 1 * 1000000)
+        buf = InputEventBuffer(4)
+        s = InputEventBuffer._struct
+        data = b''.join(s.pack(sec, usec, t, c, v) for t, c, v in
+                        [(0x02, 0x00, 1), (0x00, 0x00, 0), (0x02, 0x00, 1), (0x00, 0x00, 0)])
+        memoryview(buf._events).cast('B')[:len(data)] = data
+        buf._filled(4)
+        d._record_latency(buf)
+        self.assertEqual(h.count, 2)
+        self.assertGreaterEqual(h.min, 10000)
+
+        self.assertIsNone(d.track_latency(False))
+        self.assertIsNone(d.latency)
+
+    def test_event_mask_no_fd(self):
+        d = libevdev.Device()
+        with self.assertRaises(InvalidFileError):
+            d.set_event_mask([libevdev.EV_KEY])
+
+    def test_is_masked(self):
+        from libevdev.device import _is_masked
+        mask = {libevdev.EV_KEY.value: None,
+                libevdev.EV_ABS.value: 1 << libevdev.EV_ABS.ABS_Y.value}
+        self.assertFalse(_is_masked(mask, 0x00, 0x00))
+        self.assertFalse(_is_masked(mask, 0x01, 0x110))
+        self.assertFalse(_is_masked(mask, 0x03, 0x01))
+        self.assertTrue(_is_masked(mask, 0x03, 0x00))
+        self.assertTrue(_is_masked(mask, 0x02, 0x00))
+        # types without a code mask in the kernel are never filtered
+        self.assertFalse(_is_masked(mask, libevdev.EV_REP.value, 0x00))
+        self.assertFalse(_is_masked({}, libevdev.EV_PWR.value, 0x00))
+        self.assertTrue(_is_masked({}, libevdev.EV_FF.value, 0x00))
+
     def test_set_bits(self):
         d = libevdev.Device()
         # read-only
@@ -240,6 +321,32 @@ class TestDevice(unittest.TestCase):
         with self.assertRaises(NotImplementedError):
             d.disable(libevdev.INPUT_PROP_BUTTONPAD)
 
+    def test_key_state(self):
+        d = libevdev.Device()
+        self.assertEqual(list(d.key_state()), [])
+        self.assertEqual(list(d.led_state()), [])
+        with self.assertRaises(InvalidFileError):
+            d.switch_state(kernel=True)
+
+        d.enable(libevdev.EV_KEY.KEY_A)
+        d.enable(libevdev.EV_KEY.KEY_B)
+        d.enable(libevdev.EV_LED.LED_CAPSL)
+        d.event_value(libevdev.EV_KEY.KEY_B, 1)
+        d.event_value(libevdev.EV_LED.LED_CAPSL, 1)
+        keys = d.key_state()
+        self.assertNotIn(libevdev.EV_KEY.KEY_A, keys)
+        self.assertIn(libevdev.EV_KEY.KEY_B, keys)
+        self.assertEqual(list(keys), [libevdev.EV_KEY.KEY_B.value])
+        self.assertEqual(list(d.led_state()),
+                         [libevdev.EV_LED.LED_CAPSL.value])
+        self.assertEqual(list(d.sound_state()), [])
+
+    @unittest.skipUnless(is_root(), 'Test requires root')
+    def test_key_state_kernel(self):
+        fd = open('/dev/input/event0', 'rb')
+        d = libevdev.Device(fd)
+        self.assertEqual(d.key_state(kernel=True) & ~d.capabilities.codes(libevdev.EV_KEY), 0)
+
     def test_has_event(self):
         d = libevdev.Device()
 
@@ -265,8 +372,209 @@ class TestDevice(unittest.TestCase):
         with self.assertRaises(InvalidArgumentException):
             d.enable(libevdev.EV_ABS.ABS_X)
 
+    def test_slot_values(self):
+        d = libevdev.Device()
+        with self.assertRaises(InvalidArgumentException):
+            d.slot_values()
+
+        d.enable(libevdev.EV_ABS.ABS_MT_SLOT, InputAbsInfo(0, 4, 0, 0, 0))
+        for c in (libevdev.EV_ABS.ABS_MT_POSITION_X,
+                  libevdev.EV_ABS.ABS_MT_POSITION_Y):
+            d.enable(c, InputAbsInfo(0, 1000, 0, 0, 0))
+
+        values = d.slot_values()
+        self.assertEqual(len(values), 5)
+        self.assertEqual(values.codes, [libevdev.EV_ABS.ABS_MT_POSITION_X,
+                                        libevdev.EV_ABS.ABS_MT_POSITION_Y])
+        self.assertEqual(list(values.values), [0] * 10)
+
+        values[2, libevdev.EV_ABS.ABS_MT_POSITION_Y] = 300
+        d.set_slot_values(values)
+        self.assertEqual(d.slot_value(2, libevdev.EV_ABS.ABS_MT_POSITION_Y), 300)
+
+        values = d.slot_values([libevdev.EV_ABS.ABS_MT_POSITION_Y])
+        self.assertEqual(list(values.values), [0, 0, 300, 0, 0])
+        self.assertEqual(values[2], {libevdev.EV_ABS.ABS_MT_POSITION_Y: 300})
+        with self.assertRaises(KeyError):
+            values[2, libevdev.EV_ABS.ABS_MT_POSITION_X]
+        with self.assertRaises(IndexError):
+            values[5, libevdev.EV_ABS.ABS_MT_POSITION_Y]
+
+        with self.assertRaises(InvalidArgumentException):
+            d.slot_values([libevdev.EV_ABS.ABS_X])
+        with self.assertRaises(InvalidFileError):
+            d.slot_values(kernel=True)
+
     @unittest.skipUnless(is_root(), 'Test requires root')
     def test_uinput_empty(self):
         d = libevdev.Device()
         with self.assertRaises(OSError):
             d.create_uinput_device()
+
+    @unittest.skipUnless(is_root(), 'Test requires root')
+    def test_uinput_send_events(self):
+        d = libevdev.Device()
+        d.name = 'test device'
+        d.enable(libevdev.EV_REL.REL_X)
+        d.enable(libevdev.EV_REL.REL_Y)
+        uidev = d.create_uinput_device()
+
+        with open(uidev.devnode, 'rb') as fd:
+            os.set_blocking(fd.fileno(), False)
+            newdev = libevdev.Device(fd)
+            frame = [InputEvent(libevdev.EV_REL.REL_X, 1),
+                     InputEvent(libevdev.EV_REL.REL_Y, -1),
+                     InputEvent(libevdev.EV_SYN.SYN_REPORT, 0)]
+            uidev.send_events(frame)
+            buf = newdev.read_raw_events()
+            self.assertEqual(list(buf), frame)
+
+            # packed events are written as-is
+            uidev.send_events(buf.raw.tobytes())
+            self.assertEqual(list(newdev.read_raw_events()), frame)
+
+        with self.assertRaises(InvalidArgumentException):
+            uidev.send_events([InputEvent(libevdev.EV_REL, 1)])
+        with self.assertRaises(InvalidArgumentException):
+            uidev.send_events(b'\0' * 3)
+
+    @unittest.skipUnless(is_root(), 'Test requires root')
+    def test_uinput_read_events(self):
+        d = libevdev.Device()
+        d.name = 'test device'
+        d.enable(libevdev.EV_REL.REL_X)
+        d.enable(libevdev.EV_REL.REL_Y)
+        uidev = d.create_uinput_device()
+
+        with open(uidev.devnode, 'rb') as fd:
+            os.set_blocking(fd.fileno(), False)
+            newdev = libevdev.Device(fd)
+            frame = [InputEvent(libevdev.EV_REL.REL_X, 1),
+                     InputEvent(libevdev.EV_REL.REL_Y, -1),
+                     InputEvent(libevdev.EV_SYN.SYN_REPORT, 0)]
+            uidev.send_events(frame * 3)
+
+            # max_events limits the batch, the rest stays pending
+            buf = newdev.read_events(max_events=4)
+            self.assertEqual(list(buf), (frame * 3)[:4])
+            self.assertFalse(buf.dropped)
+            buf = newdev.read_events()
+            self.assertEqual(list(buf), (frame * 3)[4:])
+            self.assertEqual(len(newdev.read_events()), 0)
+
+            # overflow the kernel's buffer, the batch ends at SYN_DROPPED
+            for _ in range(500):
+                uidev.send_events(frame)
+            batches = []
+            buf = newdev.read_events(4096)
+            while len(buf) and not buf.dropped:
+                batches.append(list(buf))
+                buf = newdev.read_events(4096)
+            self.assertTrue(buf.dropped)
+            events = list(buf)
+            self.assertTrue(events[-1].matches(libevdev.EV_SYN.SYN_DROPPED))
+            self.assertEqual(len([e for e in events if e.matches(libevdev.EV_SYN.SYN_DROPPED)]), 1)
+            self.assertFalse(any(e.matches(libevdev.EV_SYN.SYN_DROPPED) for b in batches for e in b))
+
+            list(newdev.sync())
+            while len(newdev.read_events(4096)):
+                pass
+            uidev.send_events(frame)
+            self.assertEqual(list(newdev.read_events()), frame)
+
+    @unittest.skipUnless(is_root(), 'Test requires root')
+    def test_uinput_frames(self):
+        d = libevdev.Device()
+        d.name = 'test device'
+        d.enable(libevdev.EV_REL.REL_X)
+        d.enable(libevdev.EV_REL.REL_Y)
+        uidev = d.create_uinput_device()
+
+        with open(uidev.devnode, 'rb') as fd:
+            os.set_blocking(fd.fileno(), False)
+            newdev = libevdev.Device(fd)
+            frame1 = [InputEvent(libevdev.EV_REL.REL_X, 1),
+                      InputEvent(libevdev.EV_REL.REL_Y, -1),
+                      InputEvent(libevdev.EV_SYN.SYN_REPORT, 0)]
+            frame2 = [InputEvent(libevdev.EV_REL.REL_Y, 2),
+                      InputEvent(libevdev.EV_SYN.SYN_REPORT, 0)]
+            uidev.send_events(frame1 + frame2)
+            frames = list(newdev.frames(max_events=2))
+            self.assertEqual([list(f) for f in frames], [frame1, frame2])
+            self.assertEqual(frames[0].codes, [libevdev.EV_REL.REL_X,
+                                               libevdev.EV_REL.REL_Y])
+            self.assertFalse(frames[0].synced)
+            self.assertEqual(list(newdev.frames()), [])
+
+    @unittest.skipUnless(is_root(), 'Test requires root')
+    def test_uinput_event_mask(self):
+        d = libevdev.Device()
+        d.name = 'test device'
+        d.enable(libevdev.EV_REL.REL_X)
+        d.enable(libevdev.EV_KEY.KEY_A)
+        d.enable(libevdev.EV_KEY.KEY_B)
+        uidev = d.create_uinput_device()
+
+        with open(uidev.devnode, 'rb') as fd:
+            os.set_blocking(fd.fileno(), False)
+            newdev = libevdev.Device(fd)
+            newdev.set_event_mask([libevdev.EV_KEY.KEY_A])
+            uidev.send_events([InputEvent(libevdev.EV_REL.REL_X, 1),
+                               InputEvent(libevdev.EV_SYN.SYN_REPORT, 0),
+                               InputEvent(libevdev.EV_KEY.KEY_A, 1),
+                               InputEvent(libevdev.EV_KEY.KEY_B, 1),
+                               InputEvent(libevdev.EV_SYN.SYN_REPORT, 0)])
+            self.assertEqual(list(newdev.events()),
+                             [InputEvent(libevdev.EV_KEY.KEY_A, 1),
+                              InputEvent(libevdev.EV_SYN.SYN_REPORT, 0)])
+            self.assertEqual(list(newdev.sync(force=True)), [])
+
+            newdev.set_event_mask(None)
+            uidev.send_events([InputEvent(libevdev.EV_REL.REL_X, 1),
+                               InputEvent(libevdev.EV_SYN.SYN_REPORT, 0)])
+            self.assertEqual(len(list(newdev.events())), 2)
+
+    @unittest.skipUnless(is_root(), 'Test requires root')
+    def test_uinput_sound_state(self):
+        d = libevdev.Device()
+        d.name = 'test device'
+        d.enable(libevdev.EV_SND.SND_BELL)
+        d.enable(libevdev.EV_SND.SND_TONE)
+        uidev = d.create_uinput_device()
+
+        with open(uidev.devnode, 'rb') as fd:
+            os.set_blocking(fd.fileno(), False)
+            newdev = libevdev.Device(fd)
+            self.assertEqual(list(newdev.sound_state()), [])
+            uidev.send_events([InputEvent(libevdev.EV_SND.SND_BELL, 1),
+                               InputEvent(libevdev.EV_SYN.SYN_REPORT, 0)])
+            # libevdev never sees EV_SND values, the state comes from the
+            # kernel even when reading the events first
+            list(newdev.events())
+            self.assertEqual(list(newdev.sound_state()),
+                             [libevdev.EV_SND.SND_BELL.value])
+            self.assertEqual(newdev.sound_state(), newdev.sound_state(kernel=True))
+
+    @unittest.skipUnless(is_root(), 'Test requires root')
+    def test_uinput_async_events(self):
+        d = libevdev.Device()
+        d.name = 'test device'
+        d.enable(libevdev.EV_REL.REL_X)
+        uidev = d.create_uinput_device()
+        frame = [InputEvent(libevdev.EV_REL.REL_X, 1),
+                 InputEvent(libevdev.EV_SYN.SYN_REPORT, 0)]
+
+        async def read_frame(device):
+            asyncio.get_running_loop().call_soon(uidev.send_events, frame)
+            events = []
+            async for e in device.async_events():
+                events.append(e)
+                if e.matches(libevdev.EV_SYN.SYN_REPORT):
+                    break
+            return events
+
+        with open(uidev.devnode, 'rb') as fd:
+            newdev = libevdev.Device(fd)
+            events = asyncio.run(asyncio.wait_for(read_frame(newdev), 5))
+            self.assertEqual(events, frame)
+            self.assertEqual(asyncio.run(newdev.async_sync()), [])
@@ -0,0 +1,104 @@
+# -*- coding: latin-1 -*-
+# Copyright © 2017 Red Hat, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice (including the next
+# paragraph) shall be included in all copies or substantial portions of the
+# Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import os
+import time
+import unittest
+
+import libevdev
+from libevdev import DeviceSet, InputEvent, InvalidFileError
+
+
+def is_root():
+    return os.getuid() == 0
+
+
+class TestDeviceSet(unittest.TestCase):
+    def test_empty(self):
+        ds = DeviceSet()
+        self.assertEqual(len(ds), 0)
+        self.assertEqual(ds.devices, [])
+        self.assertEqual(ds.poll(0), [])
+        self.assertEqual(list(ds.events(timeout=0)), [])
+        ds.close()
+
+    def test_no_fd(self):
+        ds = DeviceSet()
+        d = libevdev.Device()
+        with self.assertRaises(InvalidFileError):
+            ds.add(d)
+        self.assertNotIn(d, ds)
+        ds.remove(d)  # noop
+
+    def create_uinput_device(self, name):
+        d = libevdev.Device()
+        d.name = name
+        d.enable(libevdev.EV_REL.REL_X)
+        return d.create_uinput_device()
+
+    @unittest.skipUnless(is_root(), 'Test requires root')
+    def test_fair_draining(self):
+        uidevs = [self.create_uinput_device('test device {}'.format(i)) for i in range(3)]
+        fds = [open(u.devnode, 'rb') for u in uidevs]
+        devices = [libevdev.Device(fd) for fd in fds]
+
+        with DeviceSet(devices, max_events=4) as ds:
+            self.assertEqual(len(ds), 3)
+            for d in devices:
+                self.assertIn(d, ds)
+
+            frame = [InputEvent(libevdev.EV_REL.REL_X, 1),
+                     InputEvent(libevdev.EV_SYN.SYN_REPORT, 0)]
+            # the first device is flooded, the last one sends a single frame
+            uidevs[0].send_events(frame * 10)
+            uidevs[2].send_events(frame)
+
+            batches = ds.poll(timeout=1)
+            self.assertEqual(sorted(devices.index(d) for d, _ in batches), [0, 2])
+            for device, events in batches:
+                self.assertLessEqual(len(events), 4)
+
+            received = {d: [] for d in devices}
+            for device, events in batches + list(ds.events(timeout=0.1)):
+                received[device].extend(events)
+
+            self.assertEqual(received[devices[0]], frame * 10)
+            self.assertEqual(received[devices[1]], [])
+            self.assertEqual(received[devices[2]], frame)
+
+            ds.remove(devices[1])
+            self.assertNotIn(devices[1], ds)
+            self.assertEqual(len(ds), 2)
+
+        for fd in fds:
+            fd.close()
+
+    @unittest.skipUnless(is_root(), 'Test requires root')
+    def test_timeout_after_add(self):
+        uidev = self.create_uinput_device('test device')
+        with open(uidev.devnode, 'rb') as fd:
+            with DeviceSet([libevdev.Device(fd)]) as ds:
+                # a newly added device is read without waiting first, the
+                # timeout must still be honoured after that
+                start = time.monotonic()
+                self.assertEqual(list(ds.events(timeout=0.2)), [])
+                self.assertGreaterEqual(time.monotonic() - start, 0.2)
@@ -20,10 +20,11 @@
 # FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
 # DEALINGS IN THE SOFTWARE.
 
+import struct
 import unittest
 
 import libevdev
-from libevdev import evbit, propbit, InputEvent
+from libevdev import evbit, propbit, InputEvent, InputEventBuffer, Frame
 
 class TestEvents(unittest.TestCase):
     def test_event_matches_type(self):
@@ -52,3 +53,60 @@ class TestEvents(unittest.TestCase):
         e2 = InputEvent(libevdev.EV_REL.REL_Y)
         self.assertNotEqual(e2, e1)
         self.assertNotEqual(e1, e2)
+
+    def test_event_new(self):
+        e1 = InputEvent(libevdev.EV_ABS.ABS_X, 10, 1, 2)
+        e2 = InputEvent._new(libevdev.EV_ABS.ABS_X, 10, 1, 2)
+        self.assertEqual(e1, e2)
+        self.assertEqual(e2.type, libevdev.EV_ABS)
+        self.assertEqual((e2.value, e2.sec, e2.usec), (10, 1, 2))
+        self.assertFalse(hasattr(e2, '__dict__'))
+
+
+class TestInputEventBuffer(unittest.TestCase):
+    def test_empty(self):
+        buf = InputEventBuffer(8)
+        self.assertEqual(buf.capacity, 8)
+        self.assertEqual(len(buf), 0)
+        self.assertFalse(buf.dropped)
+        self.assertEqual(list(buf), [])
+        self.assertEqual(list(buf.tuples()), [])
+        self.assertEqual(len(buf.raw), 0)
+        self.assertEqual(buf[:], [])
+        with self.assertRaises(IndexError):
+            buf[0]
+
+    def test_raw_readonly(self):
+        buf = InputEventBuffer(8)
+        with self.assertRaises(TypeError):
+            buf.raw[0] = 1
+
+    def test_dtype(self):
+        fmt = '@' + ''.join(f for _, f in InputEventBuffer.dtype)
+        self.assertEqual(struct.calcsize(fmt), InputEventBuffer._struct.size)
+
+
+class TestFrame(unittest.TestCase):
+    def pack(self, events):
+        s = InputEventBuffer._struct
+        return b''.join(s.pack(1, 2, t, c, v) for t, c, v in events)
+
+    def test_frame(self):
+        data = self.pack([(0x02, 0x00, 1), (0x02, 0x01, 2), (0x02, 0x00, 3),
+                          (0x00, 0x00, 0)])
+        f = Frame(data)
+        self.assertEqual(len(f), 4)
+        self.assertEqual((f.sec, f.usec), (1, 2))
+        self.assertEqual(f.codes, [libevdev.EV_REL.REL_X, libevdev.EV_REL.REL_Y])
+        self.assertEqual(f.slots, [])
+        self.assertFalse(f.synced)
+        self.assertEqual(list(f)[2], InputEvent(libevdev.EV_REL.REL_X, 3))
+        self.assertEqual(f.raw.tobytes(), data)
+
+    def test_slots(self):
+        data = self.pack([(0x03, 0x35, 1), (0x03, 0x2f, 3), (0x03, 0x36, 2),
+                          (0x00, 0x00, 0)])
+        f = Frame(data, slot=1)
+        self.assertEqual(f.slots, [1, 3])
+        self.assertEqual(f._end_slot(), 3)
+        self.assertEqual(Frame(self.pack([(0x00, 0x00, 0)]), slot=1)._end_slot(), 1)
@@ -0,0 +1,220 @@
+# -*- coding: latin-1 -*-
+# Copyright © 2017 Red Hat, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice (including the next
+# paragraph) shall be included in all copies or substantial portions of the
+# Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import unittest
+
+import libevdev
+from libevdev import FakeDevice, InputEvent, InputEventBuffer, EventsDroppedException
+from libevdev.device import InputAbsInfo
+
+
+def frame(*events):
+    return [InputEvent(c, v) for c, v in events] + [InputEvent(libevdev.EV_SYN.SYN_REPORT, 0)]
+
+
+class TestFakeDevice(unittest.TestCase):
+    def mouse(self, buffer_size=1024):
+        d = libevdev.Device()
+        d.name = 'fake mouse'
+        d.enable(libevdev.EV_REL.REL_X)
+        d.enable(libevdev.EV_REL.REL_Y)
+        d.enable(libevdev.EV_KEY.BTN_LEFT)
+        d.enable(libevdev.EV_KEY.BTN_RIGHT)
+        return FakeDevice.from_template(d, buffer_size)
+
+    def touchscreen(self):
+        d = FakeDevice()
+        a = InputAbsInfo(0, 1000, 0, 0, 0, 0)
+        d.enable(libevdev.EV_ABS.ABS_X, a)
+        d.enable(libevdev.EV_ABS.ABS_MT_SLOT, InputAbsInfo(0, 4, 0, 0, 0, 0))
+        d.enable(libevdev.EV_ABS.ABS_MT_POSITION_X, a)
+        d.enable(libevdev.EV_ABS.ABS_MT_TRACKING_ID, InputAbsInfo(-1, 0xffff, 0, 0, 0, 0))
+        return d
+
+    def test_template(self):
+        d = self.mouse()
+        self.assertEqual(d.name, 'fake mouse')
+        self.assertTrue(d.has_event(libevdev.EV_KEY.BTN_LEFT))
+        self.assertIsNone(d.fd)
+
+    def test_events(self):
+        d = self.mouse()
+        self.assertEqual(list(d.events()), [])
+        d.send_events(frame((libevdev.EV_REL.REL_X, 1)))
+        d.send_events(frame((libevdev.EV_KEY.BTN_LEFT, 1)))
+        self.assertEqual(d.pending, 4)
+        events = list(d.events())
+        self.assertEqual(events, frame((libevdev.EV_REL.REL_X, 1)) +
+                         frame((libevdev.EV_KEY.BTN_LEFT, 1)))
+        self.assertGreater(events[0].sec, 0)
+        self.assertEqual(d.pending, 0)
+        self.assertEqual(d.event_value(libevdev.EV_KEY.BTN_LEFT), 1)
+
+    def test_read_events(self):
+        d = self.mouse()
+        s = InputEventBuffer._struct
+        data = b''.join(s.pack(5, 6, 0x02, 0x00, v) + s.pack(5, 6, 0, 0, 0) for v in range(10))
+        d.send_events(data)
+        buf = d.read_events(8)
+        self.assertEqual(len(buf), 8)
+        self.assertEqual(buf.raw.tobytes(), data[:8 * s.size])
+        buf = d.read_events(64)
+        self.assertEqual(len(buf), 12)
+        self.assertEqual(len(d.read_events()), 0)
+
+    def test_frames(self):
+        d = self.mouse()
+        d.send_events(frame((libevdev.EV_REL.REL_X, 1), (libevdev.EV_REL.REL_Y, 2)) +
+                      [InputEvent(libevdev.EV_REL.REL_X, 3)])
+        frames = list(d.frames())
+        self.assertEqual(len(frames), 1)
+        self.assertEqual(frames[0].codes, [libevdev.EV_REL.REL_X, libevdev.EV_REL.REL_Y])
+        d.send_events(frame())
+        self.assertEqual(len(list(d.frames())[0]), 2)
+
+    def test_state(self):
+        d = self.mouse()
+        d.send_events(frame((libevdev.EV_KEY.BTN_RIGHT, 1)))
+        self.assertEqual(list(d.key_state()), [])
+        self.assertEqual(list(d.key_state(kernel=True)), [libevdev.EV_KEY.BTN_RIGHT.value])
+        list(d.events())
+        self.assertEqual(list(d.key_state()), [libevdev.EV_KEY.BTN_RIGHT.value])
+
+    def test_overflow(self):
+        d = self.mouse(buffer_size=8)
+        d.send_events(frame((libevdev.EV_KEY.BTN_LEFT, 1)))
+        d.send_events(frame((libevdev.EV_REL.REL_X, 1)) * 4)
+        d.send_events(frame((libevdev.EV_KEY.BTN_LEFT, 0), (libevdev.EV_KEY.BTN_RIGHT, 1)))
+
+        buf = d.read_events()
+        self.assertTrue(buf.dropped)
+        self.assertEqual(len(buf), 1)
+        self.assertEqual(d.event_value(libevdev.EV_KEY.BTN_LEFT), 0)
+
+        events = list(d.sync())
+        self.assertEqual(events, frame((libevdev.EV_KEY.BTN_RIGHT, 1)))
+        self.assertEqual(d.pending, 0)
+        self.assertEqual(d.event_value(libevdev.EV_KEY.BTN_RIGHT), 1)
+        self.assertEqual(list(d.sync()), [])
+
+    def test_drop(self):
+        d = self.mouse()
+        d.send_events(frame((libevdev.EV_KEY.BTN_LEFT, 1)))
+        d.drop()
+        events = []
+        with self.assertRaises(EventsDroppedException):
+            for e in d.events():
+                events.append(e)
+        self.assertEqual(events, [InputEvent(libevdev.EV_SYN.SYN_DROPPED, 0)])
+        self.assertEqual(list(d.sync()), frame((libevdev.EV_KEY.BTN_LEFT, 1)))
+
+    def test_unhandled_drop(self):
+        d = self.mouse()
+        d.send_events(frame((libevdev.EV_KEY.BTN_LEFT, 1)))
+        d.drop()
+        self.assertTrue(d.read_events().dropped)
+        d.send_events(frame((libevdev.EV_REL.REL_X, 1)))
+        # not syncing discards the sync events and the queue
+        self.assertEqual(len(d.read_events()), 0)
+        self.assertEqual(d.event_value(libevdev.EV_KEY.BTN_LEFT), 1)
+
+    def test_frames_drop(self):
+        d = self.mouse()
+        d.send_events(frame((libevdev.EV_KEY.BTN_LEFT, 1)))
+        d.drop()
+        frames = list(d.frames())
+        self.assertEqual(len(frames), 1)
+        self.assertTrue(frames[0].synced)
+
+    def test_slots(self):
+        d = self.touchscreen()
+        self.assertEqual(d.num_slots, 5)
+        d.send_events(frame((libevdev.EV_ABS.ABS_MT_SLOT, 0),
+                            (libevdev.EV_ABS.ABS_MT_TRACKING_ID, 1),
+                            (libevdev.EV_ABS.ABS_MT_POSITION_X, 100),
+                            (libevdev.EV_ABS.ABS_MT_SLOT, 2),
+                            (libevdev.EV_ABS.ABS_MT_TRACKING_ID, 2),
+                            (libevdev.EV_ABS.ABS_MT_POSITION_X, 200),
+                            (libevdev.EV_ABS.ABS_X, 100)))
+        tid = libevdev.EV_ABS.ABS_MT_TRACKING_ID
+        px = libevdev.EV_ABS.ABS_MT_POSITION_X
+        self.assertEqual(d.slot_values(kernel=True)[2, px], 200)
+        self.assertEqual(d.slot_values()[2, px], 0)
+        list(d.events())
+        self.assertEqual(d.current_slot, 2)
+        self.assertEqual(d.slot_value(0, px), 100)
+        self.assertEqual(d.slot_values()[2, tid], 2)
+        self.assertEqual(d.event_value(libevdev.EV_ABS.ABS_X), 100)
+
+        # a new touch in slot 0 and a move in slot 2 while dropping
+        d.send_events(frame((libevdev.EV_ABS.ABS_MT_SLOT, 0),
+                            (libevdev.EV_ABS.ABS_MT_TRACKING_ID, 3),
+                            (libevdev.EV_ABS.ABS_MT_SLOT, 2),
+                            (libevdev.EV_ABS.ABS_MT_POSITION_X, 250)))
+        d.drop()
+        self.assertTrue(d.read_events().dropped)
+        events = list(d.sync())
+        slot = libevdev.EV_ABS.ABS_MT_SLOT
+        self.assertEqual(events,
+                         frame((slot, 0), (tid, -1)) +
+                         frame((slot, 0), (tid, 3), (slot, 2), (px, 250)))
+        self.assertEqual(d.current_slot, 2)
+        self.assertEqual(d.slot_value(0, tid), 3)
+
+    def test_event_mask(self):
+        d = self.mouse()
+        d.set_event_mask([libevdev.EV_KEY.BTN_LEFT])
+        d.send_events(frame((libevdev.EV_REL.REL_X, 1)))
+        d.send_events(frame((libevdev.EV_REL.REL_X, 1), (libevdev.EV_KEY.BTN_LEFT, 1),
+                            (libevdev.EV_KEY.BTN_RIGHT, 1)))
+        self.assertEqual(list(d.events()), frame((libevdev.EV_KEY.BTN_LEFT, 1)))
+        self.assertEqual(list(d.key_state(kernel=True)),
+                         [libevdev.EV_KEY.BTN_LEFT.value, libevdev.EV_KEY.BTN_RIGHT.value])
+
+        d.send_events(frame((libevdev.EV_KEY.BTN_RIGHT, 0)))
+        d.send_events(frame((libevdev.EV_KEY.BTN_RIGHT, 1)))
+        d.drop()
+        self.assertTrue(d.read_events().dropped)
+        self.assertEqual(list(d.sync()), [])
+
+        d.set_event_mask(None)
+        list(d.sync(force=True))
+        self.assertEqual(d.event_value(libevdev.EV_KEY.BTN_RIGHT), 1)
+        d.send_events(frame((libevdev.EV_REL.REL_X, 1)))
+        self.assertEqual(list(d.events()), frame((libevdev.EV_REL.REL_X, 1)))
+
+    def test_latency(self):
+        d = self.mouse()
+        h = d.track_latency()
+        d.send_events(frame((libevdev.EV_REL.REL_X, 1)) * 3)
+        d.read_events()
+        self.assertEqual(h.count, 3)
+
+    def test_invalid(self):
+        with self.assertRaises(libevdev.InvalidArgumentException):
+            FakeDevice(buffer_size=1)
+        with self.assertRaises(libevdev.InvalidArgumentException):
+            FakeDevice().send_events(b'\x00' * 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
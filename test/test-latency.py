@@ -0,0 +1,88 @@
+# -*- coding: latin-1 -*-
+# Copyright © 2017 Red Hat, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice (including the next
+# paragraph) shall be included in all copies or substantial portions of the
+# Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import unittest
+
+from libevdev import LatencyHistogram
+
+
+class TestLatencyHistogram(unittest.TestCase):
+    def test_empty(self):
+        h = LatencyHistogram()
+        self.assertEqual(h.count, 0)
+        self.assertIsNone(h.min)
+        self.assertIsNone(h.max)
+        self.assertIsNone(h.mean)
+        self.assertIsNone(h.percentile(99))
+        self.assertEqual(list(h.buckets()), [])
+
+    def test_exact(self):
+        h = LatencyHistogram()
+        for v in range(1, 101):
+            h.record(v)
+        self.assertEqual((h.count, h.min, h.max), (100, 1, 100))
+        self.assertEqual(h.mean, 50.5)
+        self.assertEqual(h.percentile(0), 1)
+        self.assertEqual(h.percentile(50), 50)
+        self.assertEqual(h.percentile(99), 99)
+        self.assertEqual(h.percentile(100), 100)
+
+    def test_precision(self):
+        h = LatencyHistogram()
+        values = [v * 997 for v in range(1, 2000)]
+        for v in values:
+            h.record(v)
+        for p in (10, 50, 90, 99):
+            expected = values[len(values) * p // 100]
+            self.assertLessEqual(abs(h.percentile(p) - expected), expected * 0.016)
+        self.assertEqual(h.percentile(100), values[-1])
+        self.assertEqual(sum(n for _, _, n in h.buckets()), len(values))
+        for low, high, _ in h.buckets():
+            self.assertLessEqual(low, high)
+
+    def test_negative(self):
+        h = LatencyHistogram()
+        h.record(-10)
+        self.assertEqual((h.min, h.max), (0, 0))
+
+    def test_merge(self):
+        h1 = LatencyHistogram()
+        h2 = LatencyHistogram()
+        h1.record(10)
+        h2.record(5)
+        h2.record(100000)
+        h1.merge(h2)
+        self.assertEqual((h1.count, h1.min, h1.max), (3, 5, 100000))
+        self.assertEqual(h1.percentile(50), 10)
+        with self.assertRaises(ValueError):
+            h1.merge(LatencyHistogram(precision=5))
+
+    def test_reset(self):
+        h = LatencyHistogram()
+        h.record(1000)
+        h.reset()
+        self.assertEqual(h.count, 0)
+        self.assertIsNone(h.max)
+
+
+if __name__ == '__main__':
+    unittest.main()
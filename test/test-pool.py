@@ -0,0 +1,99 @@
+# -*- coding: latin-1 -*-
+# Copyright © 2017 Red Hat, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice (including the next
+# paragraph) shall be included in all copies or substantial portions of the
+# Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+
+import os
+import time
+import unittest
+
+import libevdev
+from libevdev import UinputPool, InvalidArgumentException
+
+
+def is_root():
+    return os.getuid() == 0
+
+
+class TestUinputPool(unittest.TestCase):
+    def template(self):
+        d = libevdev.Device()
+        d.name = 'pooled device'
+        d.enable(libevdev.EV_KEY.KEY_A)
+        d.enable(libevdev.EV_KEY.KEY_B)
+        return d
+
+    def test_invalid(self):
+        with self.assertRaises(InvalidArgumentException):
+            UinputPool(self.template(), size=-1)
+
+    @unittest.skipUnless(is_root(), 'Test requires root')
+    def test_reuse(self):
+        with UinputPool(self.template(), size=2) as pool:
+            self.assertEqual(pool.idle, 2)
+            d1 = pool.acquire()
+            d2 = pool.acquire()
+            self.assertEqual(pool.idle, 0)
+            d3 = pool.acquire()
+            self.assertEqual(d3.name, 'pooled device')
+
+            pool.release(d1)
+            self.assertEqual(pool.idle, 1)
+            self.assertIs(pool.acquire(), d1)
+            with self.assertRaises(InvalidArgumentException):
+                pool.release(libevdev.Device())
+
+            for d in (d1, d2, d3):
+                pool.release(d)
+            with self.assertRaises(InvalidArgumentException):
+                pool.release(d1)
+            self.assertEqual(pool.idle, 3)
+
+            with pool.device() as d:
+                self.assertEqual(pool.idle, 2)
+            self.assertEqual(pool.idle, 3)
+
+        self.assertEqual(pool.idle, 0)
+
+    @unittest.skipUnless(is_root(), 'Test requires root')
+    def test_idle_timeout(self):
+        pool = UinputPool(self.template(), size=2, idle_timeout=0.05)
+        with pool.device():
+            pass
+        self.assertEqual(pool.idle, 2)
+        time.sleep(0.1)
+        pool.reap()
+        self.assertEqual(pool.idle, 0)
+
+    @unittest.skipUnless(is_root(), 'Test requires root')
+    def test_reset(self):
+        with UinputPool(self.template(), size=1) as pool:
+            with pool.device() as d:
+                d.send_events([libevdev.InputEvent(libevdev.EV_KEY.KEY_A, 1),
+                               libevdev.InputEvent(libevdev.EV_SYN.SYN_REPORT, 0)])
+                with open(d.devnode, 'rb') as fd:
+                    self.assertIn(libevdev.EV_KEY.KEY_A,
+                                  libevdev.Device(fd).key_state())
+
+            d = pool.acquire()
+            with open(d.devnode, 'rb') as fd:
+                self.assertEqual(list(libevdev.Device(fd).key_state()), [])
+            pool.release(d)
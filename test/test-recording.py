@@ -0,0 +1,101 @@
+# -*- coding: latin-1 -*-
+# Copyright © 2017 Red Hat, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice (including the next
+# paragraph) shall be included in all copies or substantial portions of the
+# Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+
+import os
+import tempfile
+import unittest
+
+import libevdev
+from libevdev import InputEvent, Recorder, Recording, InvalidRecordingError
+from libevdev.device import InputAbsInfo
+
+
+class TestRecording(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp()
+        os.close(fd)
+
+    def tearDown(self):
+        os.unlink(self.path)
+
+    def device(self):
+        d = libevdev.Device()
+        d.name = 'recorded device'
+        d.id = {'bustype': 3, 'vendor': 1, 'product': 2, 'version': 3}
+        d.enable(libevdev.EV_REL.REL_X)
+        d.enable(libevdev.EV_ABS.ABS_X, InputAbsInfo(0, 100, 1, 2, 3))
+        d.enable(libevdev.INPUT_PROP_POINTER)
+        return d
+
+    def test_roundtrip(self):
+        d = self.device()
+        events = [InputEvent(libevdev.EV_REL.REL_X, i, sec=i, usec=i * 10)
+                  for i in range(10)]
+        with Recorder(self.path, d) as recorder:
+            recorder.record(events[:5])
+            recorder.record(libevdev.InputEventBuffer._struct.pack(5, 50, 0x02, 0x00, 5))
+            recorder.record(events[6:])
+            self.assertEqual(recorder.count, 10)
+
+        with Recording(self.path) as rec:
+            self.assertEqual(len(rec), 10)
+            self.assertEqual(rec.name, 'recorded device')
+            self.assertEqual(rec.id, d.id)
+            self.assertEqual(rec.evbits, d.evbits)
+            self.assertEqual(rec.properties, [libevdev.INPUT_PROP_POINTER])
+            self.assertEqual(rec.absinfo(libevdev.EV_ABS.ABS_X).maximum, 100)
+            self.assertIsNone(rec.absinfo(libevdev.EV_ABS.ABS_Y))
+
+            self.assertEqual(list(rec), events)
+            self.assertEqual([(e.sec, e.usec) for e in rec],
+                             [(e.sec, e.usec) for e in events])
+            self.assertEqual(rec[-1], events[-1])
+            with self.assertRaises(IndexError):
+                rec[10]
+
+            sl = rec[3:6]
+            self.assertEqual(len(sl), 3)
+            self.assertEqual(list(sl), events[3:6])
+            self.assertEqual(list(sl.tuples())[0], (3, 30, 0x02, 0x00, 3))
+            sl.close()
+
+            nd = rec.create_device()
+            self.assertEqual(nd.name, d.name)
+            self.assertEqual(nd.evbits, d.evbits)
+            self.assertEqual(nd.absinfo(libevdev.EV_ABS.ABS_X).resolution, 3)
+
+    def test_truncated(self):
+        with Recorder(self.path, self.device()) as recorder:
+            recorder.record([InputEvent(libevdev.EV_REL.REL_X, 1)])
+        with open(self.path, 'ab') as f:
+            f.write(b'\0' * 5)
+        with Recording(self.path) as rec:
+            self.assertEqual(len(rec), 1)
+
+    def test_invalid(self):
+        with self.assertRaises(InvalidRecordingError):
+            Recording(self.path)
+        with open(self.path, 'wb') as f:
+            f.write(b'not a recording at all')
+        with self.assertRaises(InvalidRecordingError):
+            Recording(self.path)
@@ -0,0 +1,111 @@
+# -*- coding: latin-1 -*-
+# Copyright © 2017 Red Hat, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice (including the next
+# paragraph) shall be included in all copies or substantial portions of the
+# Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+
+import os
+import unittest
+
+import libevdev
+from libevdev import Remapper, InvalidArgumentException
+from libevdev.device import InputAbsInfo
+from libevdev.remap import Remap, Drop, Scale, Invert, Swap
+
+
+def is_root():
+    return os.getuid() == 0
+
+
+class TestRemapper(unittest.TestCase):
+    def device(self):
+        d = libevdev.Device()
+        d.enable(libevdev.EV_REL.REL_X)
+        d.enable(libevdev.EV_REL.REL_Y)
+        d.enable(libevdev.EV_REL.REL_WHEEL)
+        d.enable(libevdev.EV_KEY.BTN_LEFT)
+        d.enable(libevdev.EV_KEY.BTN_MIDDLE)
+        d.enable(libevdev.EV_ABS.ABS_X, InputAbsInfo(10, 100, 0, 0, 0))
+        return d
+
+    def pack(self, events):
+        s = libevdev.InputEventBuffer._struct
+        return b''.join(s.pack(1, 2, t, c, v) for t, c, v in events)
+
+    def unpack(self, data):
+        s = libevdev.InputEventBuffer._struct
+        return [e[2:] for e in s.iter_unpack(data)]
+
+    def test_transform(self):
+        r = Remapper(self.device(), [Swap(libevdev.EV_REL.REL_X, libevdev.EV_REL.REL_Y),
+                                     Drop(libevdev.EV_KEY.BTN_MIDDLE),
+                                     Invert(libevdev.EV_REL.REL_WHEEL),
+                                     Invert(libevdev.EV_ABS.ABS_X),
+                                     Remap(libevdev.EV_KEY.BTN_LEFT, libevdev.EV_KEY.BTN_RIGHT)])
+        data = self.pack([(0x02, 0x00, 5), (0x02, 0x01, 7), (0x01, 0x112, 1),
+                          (0x02, 0x08, 1), (0x01, 0x110, 1), (0x03, 0x00, 20),
+                          (0x00, 0x00, 0)])
+        self.assertEqual(self.unpack(r._transform(data)),
+                         [(0x02, 0x01, 5), (0x02, 0x00, 7), (0x02, 0x08, -1),
+                          (0x01, 0x111, 1), (0x03, 0x00, 90), (0x00, 0x00, 0)])
+
+    def test_passthrough(self):
+        r = Remapper(self.device(), [Scale(libevdev.EV_REL.REL_WHEEL, 2)])
+        data = self.pack([(0x02, 0x00, 5), (0x00, 0x00, 0)])
+        self.assertIs(r._transform(data), data)
+        data = self.pack([(0x02, 0x08, 3), (0x00, 0x00, 0)])
+        self.assertEqual(self.unpack(r._transform(data)), [(0x02, 0x08, 6), (0x00, 0x00, 0)])
+
+    def test_scale_clamped(self):
+        r = Remapper(self.device(), [Scale(libevdev.EV_REL.REL_X, 1000),
+                                     Invert(libevdev.EV_REL.REL_Y)])
+        data = self.pack([(0x02, 0x00, 0x7fffff), (0x02, 0x00, -0x7fffff),
+                          (0x02, 0x01, -0x80000000), (0x00, 0x00, 0)])
+        self.assertEqual(self.unpack(r._transform(data)),
+                         [(0x02, 0x00, 0x7fffffff), (0x02, 0x00, -0x80000000),
+                          (0x02, 0x01, 0x7fffffff), (0x00, 0x00, 0)])
+
+    def test_drop_type(self):
+        r = Remapper(self.device(), [Drop(libevdev.EV_KEY)])
+        data = self.pack([(0x01, 0x110, 1), (0x01, 0x112, 1), (0x00, 0x00, 0)])
+        self.assertEqual(self.unpack(r._transform(data)), [(0x00, 0x00, 0)])
+
+    def test_invalid(self):
+        with self.assertRaises(InvalidArgumentException):
+            Remapper(self.device(), [Drop(libevdev.EV_REL.REL_X),
+                                     Scale(libevdev.EV_REL.REL_X, 2)])
+        with self.assertRaises(InvalidArgumentException):
+            Remapper(self.device(), [Invert(libevdev.EV_KEY.BTN_LEFT)])
+        with self.assertRaises(InvalidArgumentException):
+            Remapper(self.device(), [Invert(libevdev.EV_ABS.ABS_Y)])
+        with self.assertRaises(InvalidArgumentException):
+            Remapper(self.device(), [Drop(libevdev.EV_SYN.SYN_REPORT)])
+        with self.assertRaises(InvalidArgumentException):
+            Remapper(self.device(), [Drop(libevdev.EV_SYN)])
+
+    @unittest.skipUnless(is_root(), 'Test requires root')
+    def test_uinput(self):
+        r = Remapper(self.device(), [Remap(libevdev.EV_KEY.BTN_LEFT, libevdev.EV_KEY.BTN_RIGHT),
+                                     Drop(libevdev.EV_KEY.BTN_MIDDLE)])
+        uinput = r.uinput
+        self.assertTrue(uinput.has_event(libevdev.EV_KEY.BTN_RIGHT))
+        self.assertFalse(uinput.has_event(libevdev.EV_KEY.BTN_LEFT))
+        self.assertFalse(uinput.has_event(libevdev.EV_KEY.BTN_MIDDLE))
+        self.assertTrue(uinput.has_event(libevdev.EV_REL.REL_X))
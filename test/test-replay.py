@@ -0,0 +1,102 @@
+# -*- coding: latin-1 -*-
+# Copyright © 2017 Red Hat, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice (including the next
+# paragraph) shall be included in all copies or substantial portions of the
+# Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+
+import os
+import tempfile
+import time
+import unittest
+
+import libevdev
+from libevdev import InputEvent, Recorder, Recording, Replayer, InvalidArgumentException
+
+
+def is_root():
+    return os.getuid() == 0
+
+
+class SendRecorder(object):
+    """Stands in for a uinput device, collecting what is sent"""
+    def __init__(self):
+        self.writes = []
+
+    def send_events(self, data):
+        s = libevdev.InputEventBuffer._struct
+        self.writes.append((time.monotonic(), [e[2:] for e in s.iter_unpack(data)]))
+
+
+class TestReplay(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp()
+        os.close(fd)
+        d = libevdev.Device()
+        d.name = 'replayed device'
+        d.enable(libevdev.EV_REL.REL_X)
+        # 5 frames, 20ms apart
+        with Recorder(self.path, d) as recorder:
+            for i in range(5):
+                recorder.record([InputEvent(libevdev.EV_REL.REL_X, i, sec=10, usec=i * 20000),
+                                 InputEvent(libevdev.EV_SYN.SYN_REPORT, 0, sec=10, usec=i * 20000)])
+        self.recording = Recording(self.path)
+
+    def tearDown(self):
+        self.recording.close()
+        os.unlink(self.path)
+
+    def test_invalid(self):
+        with self.assertRaises(InvalidArgumentException):
+            Replayer(self.recording, speed=0)
+        with self.assertRaises(InvalidArgumentException):
+            Replayer(self.recording, max_batch=0)
+
+    def test_fast(self):
+        dev = SendRecorder()
+        r = Replayer(self.recording, speed=None, device=dev)
+        self.assertEqual(r.run(), 10)
+        self.assertEqual(len(dev.writes), 1)
+        self.assertEqual(dev.writes[0][1][:2], [(0x02, 0x00, 0), (0x00, 0x00, 0)])
+
+    def test_batches(self):
+        dev = SendRecorder()
+        Replayer(self.recording, speed=None, max_batch=5, device=dev).run()
+        # batches end at frame boundaries
+        self.assertEqual([len(w) for _, w in dev.writes], [4, 4, 2])
+
+    def test_timing(self):
+        dev = SendRecorder()
+        start = time.monotonic()
+        Replayer(self.recording, speed=2.0, device=dev).run()
+        self.assertEqual(len(dev.writes), 5)
+        # frames are 20ms apart, at twice the speed 10ms
+        for i, (t, _) in enumerate(dev.writes):
+            self.assertGreaterEqual(t - start, i * 0.01 - 0.001)
+        self.assertLess(dev.writes[-1][0] - start, 0.5)
+
+    @unittest.skipUnless(is_root(), 'Test requires root')
+    def test_uinput(self):
+        r = Replayer(self.recording, speed=None)
+        with open(r.device.devnode, 'rb') as fd:
+            os.set_blocking(fd.fileno(), False)
+            d = libevdev.Device(fd)
+            r.run()
+            events = [e for e in d.events()]
+            self.assertEqual(events, list(self.recording))
@@ -0,0 +1,138 @@
+# -*- coding: latin-1 -*-
+# Copyright © 2017 Red Hat, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice (including the next
+# paragraph) shall be included in all copies or substantial portions of the
+# Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import multiprocessing
+import os
+import subprocess
+import sys
+import unittest
+
+import libevdev
+from libevdev import EventRing, InputEvent, InputEventBuffer
+
+
+def pack(events):
+    s = InputEventBuffer._struct
+    return b''.join(s.pack(1, 2, t, c, v) for t, c, v in events)
+
+
+def frame(value):
+    return pack([(0x02, 0x00, value), (0x00, 0x00, 0)])
+
+
+def consume(name, queue):
+    with EventRing.attach(name) as ring:
+        reader = ring.reader(from_start=True)
+        queue.put(list(reader.read().tuples()))
+
+
+class TestEventRing(unittest.TestCase):
+    def setUp(self):
+        self.ring = EventRing.create(capacity=8)
+
+    def tearDown(self):
+        self.ring.close()
+
+    def test_publish_read(self):
+        reader = self.ring.reader()
+        self.assertEqual(len(reader.read()), 0)
+        self.ring.publish(frame(1))
+        self.ring.publish([InputEvent(libevdev.EV_REL.REL_Y, 5, 3, 4)])
+        self.assertEqual(self.ring.sequence, 3)
+        self.assertEqual(reader.pending, 3)
+
+        buf = reader.read()
+        self.assertEqual(list(buf.tuples()),
+                         [(1, 2, 0x02, 0x00, 1), (1, 2, 0x00, 0x00, 0), (3, 4, 0x02, 0x01, 5)])
+        self.assertFalse(buf.dropped)
+        self.assertEqual(len(reader.read()), 0)
+        self.assertEqual(reader.lost, 0)
+
+    def test_independent_readers(self):
+        r1 = self.ring.reader()
+        self.ring.publish(frame(1))
+        r2 = self.ring.reader()
+        self.ring.publish(frame(2))
+        self.assertEqual([e[4] for e in r1.read().tuples()], [1, 0, 2, 0])
+        self.assertEqual([e[4] for e in r2.read().tuples()], [2, 0])
+
+    def test_wraparound(self):
+        reader = self.ring.reader()
+        for value in range(10):
+            self.ring.publish(frame(value))
+            self.assertEqual([e[4] for e in reader.read(max_events=3).tuples()],
+                             [value, 0])
+
+    def test_overrun(self):
+        reader = self.ring.reader()
+        self.ring.publish(frame(1))
+        self.ring.publish(pack([(0x02, 0x00, 2)] * 8))
+        self.ring.publish(frame(3))
+
+        buf = reader.read()
+        self.assertTrue(buf.dropped)
+        self.assertEqual(len(buf), 1)
+        self.assertEqual(buf[0], InputEvent(libevdev.EV_SYN.SYN_DROPPED))
+
+        # Events up to the next SYN_REPORT are discarded
+        self.ring.publish(pack([(0x02, 0x01, 4), (0x00, 0x00, 0)]))
+        self.ring.publish(frame(5))
+        self.assertEqual([e[4] for e in reader.read().tuples()], [5, 0])
+        self.assertEqual(reader.lost, 10 + 2 + 2)
+
+    def test_from_start(self):
+        for value in range(6):
+            self.ring.publish(frame(value))
+        reader = self.ring.reader(from_start=True)
+        self.assertEqual([e[4] for e in reader.read().tuples()], [3, 0, 4, 0, 5, 0])
+
+    def test_attach(self):
+        ctx = multiprocessing.get_context('spawn')
+        queue = ctx.Queue()
+        self.ring.publish(frame(7))
+        p = ctx.Process(target=consume, args=(self.ring.name, queue))
+        p.start()
+        events = queue.get(timeout=30)
+        p.join()
+        self.assertEqual(events, [(1, 2, 0x02, 0x00, 7), (1, 2, 0x00, 0x00, 0)])
+        self.assertEqual(p.exitcode, 0)
+
+    def test_attach_unrelated(self):
+        # a process with its own resource tracker must not remove the
+        # shared memory when it exits
+        self.ring.publish(frame(3))
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.pathsep.join(p for p in [os.path.dirname(os.path.dirname(libevdev.__file__)),
+                                                        env.get('PYTHONPATH')] if p)
+        script = 'import libevdev; libevdev.EventRing.attach({!r}).close()'.format(self.ring.name)
+        subprocess.check_call([sys.executable, '-c', script], env=env)
+        with EventRing.attach(self.ring.name) as ring:
+            self.assertEqual(ring.sequence, 2)
+
+    def test_attach_publish(self):
+        with EventRing.attach(self.ring.name) as ring:
+            with self.assertRaises(libevdev.InvalidArgumentException):
+                ring.publish(frame(1))
+
+
+if __name__ == '__main__':
+    unittest.main()